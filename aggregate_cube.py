@@ -0,0 +1,147 @@
+"""
+Historical demand aggregate cube
+
+Mean / median / count of `cnt` from day.csv / hour.csv, precomputed into
+dense NumPy arrays indexed directly by the raw codes:
+    daily:  [season, weathersit, workingday, mnth]
+    hourly: [season, weathersit, workingday, mnth, hr]
+A baseline lookup is plain array indexing (scalars or whole batches), so the
+prediction cards can compare against comparable historical conditions
+without pandas at request time. Cells with fewer than `min_count`
+observations back off to a coarser season x workingday (x hr) cube.
+
+Cubes are cached as compact .npz files keyed by the history file's content hash.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtest import BACKTEST_CACHE_DIR, HISTORY_FILES, TARGET_COL
+from prediction_cache import model_fingerprint
+
+# (column, size) per cube axis; sizes allow indexing by the raw 1-based codes
+DAILY_AXES = [('season', 5), ('weathersit', 5), ('workingday', 2), ('mnth', 13)]
+HOURLY_AXES = DAILY_AXES + [('hr', 24)]
+COARSE_COLS = ('season', 'workingday', 'hr')
+MIN_COUNT = 3
+
+
+def _group_stats(flat_idx, values, size):
+    """mean / median / count per flat cell index (NaN where empty)"""
+    count = np.bincount(flat_idx, minlength=size)
+    total = np.bincount(flat_idx, weights=values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+
+    median = np.full(size, np.nan)
+    order = np.lexsort((values, flat_idx))  # by cell, then by value
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    filled = count > 0
+    lo = starts[filled] + (count[filled] - 1) // 2
+    hi = starts[filled] + count[filled] // 2
+    median[filled] = (sorted_values[lo] + sorted_values[hi]) / 2
+    return mean, median, count
+
+
+class AggregateCube:
+    """Dense mean/median/count arrays for one history file, plus a coarse back-off cube"""
+
+    def __init__(self, axes, mean, median, count, coarse_axes, coarse_mean, coarse_median,
+                 coarse_count, min_count=MIN_COUNT):
+        self.axes = [(col, int(size)) for col, size in axes]
+        self.mean, self.median, self.count = mean, median, count
+        self.coarse_axes = [(col, int(size)) for col, size in coarse_axes]
+        self.coarse_mean, self.coarse_median, self.coarse_count = coarse_mean, coarse_median, coarse_count
+        self.min_count = min_count
+        self._coarse_pos = [i for i, (col, _) in enumerate(self.axes) if col in dict(self.coarse_axes)]
+
+    @classmethod
+    def from_history(cls, history, hourly, min_count=MIN_COUNT):
+        axes = HOURLY_AXES if hourly else DAILY_AXES
+        coarse_axes = [(col, size) for col, size in axes if col in COARSE_COLS]
+        values = history[TARGET_COL].to_numpy(dtype=np.float64)
+
+        cubes = []
+        for cube_axes in (axes, coarse_axes):
+            shape = tuple(size for _, size in cube_axes)
+            idx = tuple(history[col].to_numpy(dtype=np.int64) for col, _ in cube_axes)
+            flat = np.ravel_multi_index(idx, shape)
+            mean, median, count = _group_stats(flat, values, int(np.prod(shape)))
+            cubes.append((mean.reshape(shape).astype(np.float32),
+                          median.reshape(shape).astype(np.float32),
+                          count.reshape(shape).astype(np.int32)))
+        (mean, median, count), (coarse_mean, coarse_median, coarse_count) = cubes
+        return cls(axes, mean, median, count, coarse_axes, coarse_mean, coarse_median,
+                   coarse_count, min_count)
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, axes=np.array(self.axes, dtype=object).astype(str),
+                 coarse_axes=np.array(self.coarse_axes, dtype=object).astype(str),
+                 mean=self.mean, median=self.median, count=self.count,
+                 coarse_mean=self.coarse_mean, coarse_median=self.coarse_median,
+                 coarse_count=self.coarse_count, min_count=self.min_count)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls([(col, int(size)) for col, size in data['axes']],
+                       data['mean'], data['median'], data['count'],
+                       [(col, int(size)) for col, size in data['coarse_axes']],
+                       data['coarse_mean'], data['coarse_median'], data['coarse_count'],
+                       int(data['min_count']))
+
+    def lookup(self, *codes):
+        """
+        Baseline for raw codes in axis order (season, weathersit, workingday, mnth[, hr]).
+        Scalars or equal-length arrays. Returns (mean, median, count, backed_off);
+        thin cells come from the coarse cube and are flagged in `backed_off`.
+        """
+        if not any(isinstance(code, (np.ndarray, list, tuple)) for code in codes):
+            return self._lookup_scalar(codes)
+
+        idx = tuple(np.clip(np.asarray(code, dtype=np.int64), 0, size - 1)
+                    for code, (_, size) in zip(codes, self.axes))
+        count = self.count[idx]
+        backed_off = count < self.min_count
+        if not np.any(backed_off):
+            return self.mean[idx], self.median[idx], count, backed_off
+
+        coarse_idx = tuple(idx[i] for i in self._coarse_pos)
+        return (np.where(backed_off, self.coarse_mean[coarse_idx], self.mean[idx]),
+                np.where(backed_off, self.coarse_median[coarse_idx], self.median[idx]),
+                np.where(backed_off, self.coarse_count[coarse_idx], count),
+                backed_off)
+
+    def _lookup_scalar(self, codes):
+        """Single-cell fast path: plain tuple indexing, no array allocation"""
+        idx = tuple(min(max(int(code), 0), size - 1) for code, (_, size) in zip(codes, self.axes))
+        count = int(self.count[idx])
+        if count >= self.min_count:
+            return float(self.mean[idx]), float(self.median[idx]), count, False
+        coarse_idx = tuple(idx[i] for i in self._coarse_pos)
+        return (float(self.coarse_mean[coarse_idx]), float(self.coarse_median[coarse_idx]),
+                int(self.coarse_count[coarse_idx]), True)
+
+
+def load_cube(name, history_path=None, cache_dir=BACKTEST_CACHE_DIR):
+    """Cube for 'daily' / 'hourly' history, built once per history content hash; None if missing"""
+    history_path = history_path or HISTORY_FILES[name]
+    if not os.path.exists(history_path):
+        return None
+    path = os.path.join(cache_dir, f"cube-{name}-{model_fingerprint(history_path)}.npz")
+    if os.path.exists(path):
+        try:
+            return AggregateCube.load(path)
+        except (OSError, ValueError, KeyError):
+            pass  # unreadable cache entry - rebuild
+
+    axes = HOURLY_AXES if name == 'hourly' else DAILY_AXES
+    history = pd.read_csv(history_path, usecols=[col for col, _ in axes] + [TARGET_COL])
+    cube = AggregateCube.from_history(history, hourly=name == 'hourly')
+    os.makedirs(cache_dir, exist_ok=True)
+    cube.save(path)
+    return cube
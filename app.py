@@ -12,11 +12,30 @@ import pdfplumber
 import re
 from datetime import datetime
 import csv
-import pickle
 import os
 from openai import OpenAI
 import qrcode
 from io import BytesIO
+from prediction_engine import (
+    DAILY_FEATURE_COLS, HOURLY_FEATURE_COLS, DAILY_ENCODER, HOURLY_ENCODER, SEASON_MAP, WEATHER_MAP,
+    HOURS_OF_DAY, hourly_profile_inputs
+)
+from prediction_cache import PredictionCache, predict_cached
+from model_readiness import ReadinessState
+from model_registry import ModelRegistry
+from micro_batcher import MicroBatcher
+from backtest import backtest, group_metric
+from prediction_intervals import IntervalTable
+from aggregate_cube import load_cube
+from dashboard_aggregates import (
+    DemandAggregates, dashboard_snapshot, hour_label, seed_from_history, seed_from_log, temp_band, weekday_bin,
+    year_bin
+)
+from prediction_log import PREDICTION_LOG_DIR, PredictionLog
+from range_forecast import forecast_range, monthly_normals, next_days
+from sensitivity import GRID_PRESETS, SWEEP_PARAMS, sensitivity_sweep, sweep_params, what_if_grid
+from shadow_scoring import SHADOW_DIR, ShadowScorer, load_candidate
+from latency_stats import LatencyRecorder, format_ns
 
 # NVIDIA API Configuration - Using Streamlit Secrets
 try:
@@ -33,117 +52,172 @@ nvidia_client = OpenAI(
 )
 
 # ============= MODEL LOADING =============
+# Optional flat-array tree evaluator for low single-row latency (RIDEWISE_FLAT_TREES=1)
+USE_FLAT_TREES = os.environ.get("RIDEWISE_FLAT_TREES", "0") == "1"
+# How often the registry checks the model files for a new version (seconds)
+MODEL_POLL_INTERVAL = float(os.environ.get("RIDEWISE_MODEL_POLL_SECONDS", "5"))
+
+@st.cache_resource
+def get_prediction_cache():
+    """Process-wide prediction LRU shared by all sessions"""
+    return PredictionCache(maxsize=4096, ttl=6 * 3600)
+
+PREDICTION_CACHE = get_prediction_cache()
+
+@st.cache_resource
+def get_sweep_cache():
+    """Whole sensitivity curves / what-if grids keyed on (model version, model, swept parameters, scenario)"""
+    return PredictionCache(maxsize=512, ttl=6 * 3600)
+
+SWEEP_CACHE = get_sweep_cache()
+
+@st.cache_resource
+def get_forecast_cache():
+    """Whole date-range forecasts keyed on (model version, model, date range, hours, weather inputs)"""
+    return PredictionCache(maxsize=64, ttl=6 * 3600)
+
+FORECAST_CACHE = get_forecast_cache()
+
 @st.cache_resource
-def load_models():
-    """Load the trained models - cached for performance"""
+def get_latency_recorder():
+    """Process-wide rolling latency histograms (encode / cache / inference / render)"""
+    return LatencyRecorder(window=2048)
+
+LATENCY_RECORDER = get_latency_recorder()
+
+@st.cache_resource
+def get_readiness_state():
+    """Process-wide readiness flag, mirrored to a file the load balancer health check polls"""
+    return ReadinessState()
+
+READINESS = get_readiness_state()
+
+@st.cache_resource
+def get_model_registry():
+    """
+    Load + warm up the models once per process, then hot-reload them in the
+    background whenever the model files change (validated before the swap).
+    The registry invalidates PREDICTION_CACHE on every version change.
+    """
+    return ModelRegistry(
+        use_flat_trees=USE_FLAT_TREES, poll_interval=MODEL_POLL_INTERVAL,
+        cache=PREDICTION_CACHE, readiness=READINESS
+    ).start()
+
+MODEL_REGISTRY = get_model_registry()
+
+# One snapshot per script run: a hot swap never changes the models mid-prediction
+MODEL_BUNDLE = MODEL_REGISTRY.current
+if MODEL_BUNDLE is not None:
+    DAILY_MODEL, HOURLY_MODEL = MODEL_BUNDLE.models['daily'], MODEL_BUNDLE.models['hourly']
+    DAILY_MODEL_VERSION, HOURLY_MODEL_VERSION = MODEL_BUNDLE.versions['daily'], MODEL_BUNDLE.versions['hourly']
+    DAILY_FEATURE_ENCODER = MODEL_BUNDLE.encoders['daily']
+    HOURLY_FEATURE_ENCODER = MODEL_BUNDLE.encoders['hourly']
+    DAILY_PREDICTOR, HOURLY_PREDICTOR = MODEL_BUNDLE.predictors['daily'], MODEL_BUNDLE.predictors['hourly']
+else:
+    st.error(f"❌ Error loading models: {MODEL_REGISTRY.status()['last_error']}")
+    st.info("💡 Please ensure model files are in the same directory as app")
+    DAILY_MODEL = HOURLY_MODEL = None
+    DAILY_MODEL_VERSION = HOURLY_MODEL_VERSION = None
+    DAILY_FEATURE_ENCODER, HOURLY_FEATURE_ENCODER = DAILY_ENCODER, HOURLY_ENCODER
+    DAILY_PREDICTOR = HOURLY_PREDICTOR = None
+
+@st.cache_resource
+def get_shadow_scorer():
+    """Background shadow scoring of a candidate model (enabled by RIDEWISE_SHADOW_DIR)"""
+    if not SHADOW_DIR:
+        return None
     try:
-        # Load daily model
-        with open('daily_bike_rental_model.pkl', 'rb') as f:
-            daily_model = pickle.load(f)
-        
-        # Load hourly model
-        with open('hourly_bike_rental_model.pkl', 'rb') as f:
-            hourly_model = pickle.load(f)
-        
-        return daily_model, hourly_model
-    
-    except FileNotFoundError as e:
-        st.error(f"❌ Model files not found: {str(e)}")
-        st.info("💡 Please ensure model files are in the same directory as app")
-        return None, None
-    
+        candidates = load_candidate(SHADOW_DIR)
     except Exception as e:
-        st.error(f"❌ Error loading models: {str(e)}")
-        return None, None
+        st.warning(f"⚠️ Shadow model not loaded: {str(e)}")
+        return None
+    return ShadowScorer(candidates) if candidates else None
 
-# Load models at startup
-DAILY_MODEL, HOURLY_MODEL = load_models()
-# ============= END MODEL LOADING =============
-
-# ============= FIXED FEATURE PREPROCESSING FUNCTIONS =============
-# Replace these functions in your app.py file (lines ~40-90)
+SHADOW_SCORER = get_shadow_scorer()
 
-def preprocess_daily_features(season, weather, temperature, humidity, wind_speed, 
-                              year, month, holiday, working_day, day_type):
+@st.cache_resource(max_entries=1)
+def load_backtests(model_version=None):
     """
-    Convert daily prediction inputs to model features
-    IMPORTANT: Column order MUST match training data exactly!
+    Backtest accuracy of the served models on day.csv / hour.csv.
+    Computed once per model version and cached on disk by model hash.
     """
-    import pandas as pd
-    
-    # Map categorical values to numerical
-    season_map = {"Spring": 1, "Summer": 2, "Fall": 3, "Winter": 4}
-    weather_map = {"Clear": 1, "Mist/Cloudy": 2, "Light Rain/Snow": 3, "Heavy Rain/Snow": 4}
-    
-    # Create features dictionary in EXACT ORDER as training
-    # Order: season, yr, mnth, holiday, weekday, workingday, weathersit, 
-    #        temp, atemp, hum, windspeed
-    features = {
-        'season': season_map.get(season, 1),
-        'yr': 1 if year >= 2012 else 0,
-        'mnth': month,
-        'holiday': 1 if holiday == "Yes" else 0,
-        'weekday': 1 if day_type == "Weekday" else 0,
-        'workingday': 1 if working_day == "Yes" else 0,
-        'weathersit': weather_map.get(weather, 1),
-        'temp': temperature / 41.0,  # Normalized temperature
-        'atemp': (temperature + 5) / 50.0,  # Feeling temperature
-        'hum': humidity / 100.0,
-        'windspeed': wind_speed / 67.0
-    }
-    
-    # Convert to DataFrame - pandas will maintain dict order (Python 3.7+)
-    feature_df = pd.DataFrame([features])
-    
-    # Double-check column order matches training
-    expected_cols = ['season', 'yr', 'mnth', 'holiday', 'weekday', 'workingday', 
-                     'weathersit', 'temp', 'atemp', 'hum', 'windspeed']
-    feature_df = feature_df[expected_cols]  # Reorder if needed
-    
-    return feature_df
-
-
-def preprocess_hourly_features(season, weather, temperature, humidity, wind_speed,
-                               year, month, hour, holiday, working_day, day_type):
+    results = {}
+    if MODEL_BUNDLE is None:
+        return results
+    for name in ('daily', 'hourly'):
+        try:
+            results[name] = backtest(name, MODEL_BUNDLE.predictors[name],
+                                     MODEL_BUNDLE.encoders[name].feature_cols, MODEL_BUNDLE.versions[name])
+        except Exception:
+            results[name] = None  # history missing or unreadable: fall back to "n/a"
+    return results
+
+BACKTESTS = load_backtests(None if MODEL_BUNDLE is None else MODEL_BUNDLE.version)
+
+# Conformal prediction intervals from the backtest residuals (None without history files)
+INTERVAL_COVERAGE = 0.9
+DAILY_INTERVALS = IntervalTable.from_backtest(BACKTESTS.get('daily'), INTERVAL_COVERAGE)
+HOURLY_INTERVALS = IntervalTable.from_backtest(BACKTESTS.get('hourly'), INTERVAL_COVERAGE)
+
+@st.cache_resource
+def load_aggregate_cubes():
+    """Historical mean/median/count cubes for "vs Average" baselines (None without history files)"""
+    cubes = {}
+    for name in ('daily', 'hourly'):
+        try:
+            cubes[name] = load_cube(name)
+        except Exception:
+            cubes[name] = None
+    return cubes
+
+AGGREGATE_CUBES = load_aggregate_cubes()
+
+@st.cache_resource
+def get_prediction_log():
+    """Process-wide columnar prediction log, flushed in the background (RIDEWISE_PREDICTION_LOG_DIR, empty = off)"""
+    if not PREDICTION_LOG_DIR:
+        return None
+    try:
+        return PredictionLog(PREDICTION_LOG_DIR)
+    except OSError as e:
+        st.warning(f"⚠️ Prediction log disabled: {str(e)}")
+        return None
+
+PREDICTION_LOG = get_prediction_log()
+
+@st.cache_resource
+def get_dashboard_aggregates():
     """
-    Convert hourly prediction inputs to model features
-    IMPORTANT: Column order MUST match training data exactly!
-    'hr' column MUST be LAST to match training order!
+    Running demand sums/counts for the home dashboard: seeded from history and
+    from predictions logged by earlier runs once, then live
     """
-    import pandas as pd
-    
-    season_map = {"Spring": 1, "Summer": 2, "Fall": 3, "Winter": 4}
-    weather_map = {"Clear": 1, "Mist/Cloudy": 2, "Light Rain/Snow": 3, "Heavy Rain/Snow": 4}
-    
-    # Create features dictionary in EXACT ORDER as training
-    # Order: season, yr, mnth, holiday, weekday, workingday, weathersit, 
-    #        temp, atemp, hum, windspeed, hr (HR IS LAST!)
-    features = {
-        'season': season_map.get(season, 1),
-        'yr': 1 if year >= 2012 else 0,
-        'mnth': month,
-        'holiday': 1 if holiday == "Yes" else 0,
-        'weekday': 1 if day_type == "Weekday" else 0,
-        'workingday': 1 if working_day == "Yes" else 0,
-        'weathersit': weather_map.get(weather, 1),
-        'temp': temperature / 41.0,
-        'atemp': (temperature + 5) / 50.0,
-        'hum': humidity / 100.0,
-        'windspeed': wind_speed / 67.0,
-        'hr': hour  # THIS MUST BE LAST!
-    }
-    
-    # Convert to DataFrame
-    feature_df = pd.DataFrame([features])
-    
-    # Double-check column order matches training
-    expected_cols = ['season', 'yr', 'mnth', 'holiday', 'weekday', 'workingday', 
-                     'weathersit', 'temp', 'atemp', 'hum', 'windspeed', 'hr']
-    feature_df = feature_df[expected_cols]  # Reorder if needed
-    
-    return feature_df
-
-# ============= END FIXED FEATURE PREPROCESSING =============
+    aggregates = seed_from_history(DemandAggregates())
+    return seed_from_log(aggregates) if PREDICTION_LOG is not None else aggregates
+
+DASHBOARD_AGGREGATES = get_dashboard_aggregates()
+
+@st.cache_resource
+def load_monthly_normals():
+    """Typical weather per month from day.csv for long-range forecasts (None without history)"""
+    return monthly_normals()
+
+MONTHLY_NORMALS = load_monthly_normals()
+
+# Coalesce concurrent sessions into one model call per window (RIDEWISE_BATCH_WAIT_MS, 0 = off)
+BATCH_WAIT_MS = float(os.environ.get("RIDEWISE_BATCH_WAIT_MS", "0"))
+
+@st.cache_resource
+def get_micro_batcher(max_wait_ms=0.0):
+    """Process-wide micro-batcher shared by every session"""
+    return MicroBatcher(max_batch_size=256, max_wait_ms=max_wait_ms) if max_wait_ms > 0 else None
+
+MICRO_BATCHER = get_micro_batcher(BATCH_WAIT_MS)
+if MICRO_BATCHER is not None and DAILY_PREDICTOR is not None:
+    DAILY_PREDICTOR = MICRO_BATCHER.wrap(DAILY_PREDICTOR, DAILY_FEATURE_ENCODER.feature_cols)
+    HOURLY_PREDICTOR = MICRO_BATCHER.wrap(HOURLY_PREDICTOR, HOURLY_FEATURE_ENCODER.feature_cols)
+# ============= END MODEL LOADING =============
+
 # ============= END FEATURE PREPROCESSING =============
 # ============= QR CODE GENERATION FEATURE (#23) =============
 
@@ -3562,37 +3636,45 @@ def home_page():
     st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
     st.markdown('<h2 class="section-title">📊 Live Dashboard</h2>', unsafe_allow_html=True)
     
+    # Constant-time reads from the incremental aggregates (history + live predictions)
+    dashboard = dashboard_snapshot(DASHBOARD_AGGREGATES)
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown('''
+        daily_avg = "n/a" if dashboard['daily_mean'] is None else f"{dashboard['daily_mean']:,.0f}"
+        st.markdown(f'''
             <div class="metric-container">
-                <div class="metric-value">2,434</div>
+                <div class="metric-value">{daily_avg}</div>
                 <div class="metric-label">📅 Daily</div>
             </div>
         ''', unsafe_allow_html=True)
     
     with col2:
-        st.markdown('''
+        hourly_avg = "n/a" if dashboard['hourly_mean'] is None else f"{dashboard['hourly_mean']:,.0f}"
+        st.markdown(f'''
             <div class="metric-container">
-                <div class="metric-value">63</div>
+                <div class="metric-value">{hourly_avg}</div>
                 <div class="metric-label">⏰ Hourly</div>
             </div>
         ''', unsafe_allow_html=True)
     
     with col3:
-        st.markdown('''
+        # Real accuracy from the hourly backtest (R² on hour.csv)
+        hourly_backtest = BACKTESTS.get('hourly')
+        accuracy = "n/a" if hourly_backtest is None else f"{hourly_backtest['overall']['r2']:.0%}"
+        st.markdown(f'''
             <div class="metric-container">
-                <div class="metric-value">95%</div>
-                <div class="metric-label">✅ Accuracy</div>
+                <div class="metric-value">{accuracy}</div>
+                <div class="metric-label">✅ Accuracy (R²)</div>
             </div>
         ''', unsafe_allow_html=True)
     
     with col4:
-        st.markdown('''
+        st.markdown(f'''
             <div class="metric-container">
-                <div class="metric-value">24/7</div>
-                <div class="metric-label">⚡ Live</div>
+                <div class="metric-value">{dashboard['live_records']:,}</div>
+                <div class="metric-label">⚡ Live Predictions</div>
             </div>
         ''', unsafe_allow_html=True)
     
@@ -3605,8 +3687,8 @@ def home_page():
         st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
         st.markdown('<h3 class="section-title">📈 Weekly Trends</h3>', unsafe_allow_html=True)
         
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        rentals = [2100, 2300, 2450, 2200, 2600, 3100, 2900]
+        # Average daily rentals per weekday
+        days, rentals = dashboard['weekly']
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
@@ -3644,8 +3726,8 @@ def home_page():
         st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
         st.markdown('<h3 class="section-title">🌤️ Weather Impact</h3>', unsafe_allow_html=True)
         
-        weather = ['Clear', 'Cloudy', 'Rain', 'Snow']
-        impact = [2800, 2200, 1500, 800]
+        # Average daily rentals per weather type
+        weather, impact = dashboard['weather']
         
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -3681,9 +3763,8 @@ def home_page():
     st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
     st.markdown('<h3 class="section-title">⏰ 24-Hour Pattern</h3>', unsafe_allow_html=True)
     
-    hours = list(range(24))
-    hourly_rentals = [20, 15, 10, 8, 12, 35, 80, 120, 90, 70, 60, 75, 
-                     85, 80, 70, 90, 110, 150, 130, 100, 80, 60, 40, 30]
+    # Average rentals per hour of day
+    hours, hourly_rentals = dashboard['hourly']
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -3723,41 +3804,48 @@ def home_page():
     st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
     st.markdown('<h3 class="section-title">🎯 Quick Insights</h3>', unsafe_allow_html=True)
     
+    peak_hour = dashboard['peak_hour']
+    peak_label = "n/a" if peak_hour is None else f"{hour_label(peak_hour)} - {hour_label(peak_hour + 1)}"
+    optimal = dashboard['optimal_temp']
+    optimal_label = "n/a" if optimal is None else f"{optimal[0]}°C - {optimal[1]}°C"
+    growth = dashboard['growth_yoy']
+    growth_label = "n/a" if growth is None else f"{growth:+.0f}% YoY"
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.markdown('''
+        st.markdown(f'''
             <div style="background: rgba(0,0,0,0.6); border: 2px solid rgba(0,255,255,0.3); border-radius: 12px; padding: 1rem; text-align: center;">
                 <div style="font-size: 1.5rem; color: #00ffff; margin-bottom: 0.5rem;">🌟 Peak Hour</div>
-                <div style="font-size: 1.8rem; font-weight: 800; color: #00ffff;">6 PM - 7 PM</div>
+                <div style="font-size: 1.8rem; font-weight: 800; color: #00ffff;">{peak_label}</div>
             </div>
         ''', unsafe_allow_html=True)
-        st.markdown('''
+        st.markdown(f'''
             <div style="background: rgba(0,0,0,0.6); border: 2px solid rgba(138,43,226,0.3); border-radius: 12px; padding: 1rem; text-align: center; margin-top: 0.8rem;">
                 <div style="font-size: 1.5rem; color: #8a2be2; margin-bottom: 0.5rem;">📅 Best Day</div>
-                <div style="font-size: 1.8rem; font-weight: 800; color: #8a2be2;">Saturday</div>
+                <div style="font-size: 1.8rem; font-weight: 800; color: #8a2be2;">{dashboard['best_day'] or "n/a"}</div>
             </div>
         ''', unsafe_allow_html=True)
     
     with col2:
-        st.markdown('''
+        st.markdown(f'''
             <div style="background: rgba(0,0,0,0.6); border: 2px solid rgba(0,255,255,0.3); border-radius: 12px; padding: 1rem; text-align: center;">
                 <div style="font-size: 1.5rem; color: #00ffff; margin-bottom: 0.5rem;">🌤️ Best Weather</div>
-                <div style="font-size: 1.8rem; font-weight: 800; color: #00ffff;">Clear Sky</div>
+                <div style="font-size: 1.8rem; font-weight: 800; color: #00ffff;">{dashboard['best_weather'] or "n/a"}</div>
             </div>
         ''', unsafe_allow_html=True)
-        st.markdown('''
+        st.markdown(f'''
             <div style="background: rgba(0,0,0,0.6); border: 2px solid rgba(138,43,226,0.3); border-radius: 12px; padding: 1rem; text-align: center; margin-top: 0.8rem;">
                 <div style="font-size: 1.5rem; color: #8a2be2; margin-bottom: 0.5rem;">🌡️ Optimal Temp</div>
-                <div style="font-size: 1.8rem; font-weight: 800; color: #8a2be2;">18°C - 25°C</div>
+                <div style="font-size: 1.8rem; font-weight: 800; color: #8a2be2;">{optimal_label}</div>
             </div>
         ''', unsafe_allow_html=True)
     
     with col3:
-        st.markdown('''
+        st.markdown(f'''
             <div style="background: rgba(0,0,0,0.6); border: 2px solid rgba(0,255,255,0.3); border-radius: 12px; padding: 1rem; text-align: center;">
                 <div style="font-size: 1.5rem; color: #00ffff; margin-bottom: 0.5rem;">📊 Growth Rate</div>
-                <div style="font-size: 1.8rem; font-weight: 800; color: #00ffff;">+15% MoM</div>
+                <div style="font-size: 1.8rem; font-weight: 800; color: #00ffff;">{growth_label}</div>
             </div>
         ''', unsafe_allow_html=True)
         st.markdown('''
@@ -3810,13 +3898,169 @@ def predictions_page():
     ''', unsafe_allow_html=True)
     
     # Tabs for Daily and Hourly Predictions
-    tab1, tab2 = st.tabs(["📅 Daily Prediction", "⏰ Hourly Prediction"])
+    tab1, tab2, tab3 = st.tabs(["📅 Daily Prediction", "⏰ Hourly Prediction", "📆 Range Forecast"])
     
     with tab1:
         daily_prediction_tab()
     
     with tab2:
         hourly_prediction_tab()
+    
+    with tab3:
+        range_forecast_tab()
+
+def render_vs_average(prediction, cube, codes, period):
+    """st.metric comparing a prediction with the historical mean for the same conditions"""
+    if cube is None:
+        st.metric("vs Average", "n/a")
+        return
+    mean, _, count, backed_off = cube.lookup(*codes)
+    delta = prediction - mean
+    pct = delta / mean * 100 if mean else 0.0
+    similar = f"{count} similar {period}" + (" (broader match)" if backed_off else "")
+    st.metric("vs Average", f"{delta:+,.0f}", f"{pct:+.1f}% vs {similar}")
+
+def render_sensitivity(name, predictor, model_version, encoder, inputs, key):
+    """Sensitivity mode: sweep one input over its slider range and draw demand as a curve"""
+    if predictor is None:
+        return
+    if not st.checkbox("📈 Sensitivity mode", key=f"{key}_sensitivity",
+                     help="Sweep one input over its whole range with everything else fixed"):
+        return
+    params = sweep_params(encoder)
+    param = st.selectbox("Parameter to sweep", options=params, key=f"{key}_sweep_param",
+                         format_func=lambda p: SWEEP_PARAMS[p][0])
+    timings = {}
+    try:
+        values, curve = sensitivity_sweep(SWEEP_CACHE, name, predictor, model_version, encoder,
+                                          inputs, param, timings=timings)
+    except Exception as e:
+        st.error(f"❌ Sensitivity Error: {str(e)}")
+        return
+    LATENCY_RECORDER.record_all(name, timings)
+    
+    current = inputs[param]
+    values = values.tolist()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=values, y=curve.round().tolist(), mode='lines',
+        line=dict(color='#00ffff', width=3, shape='spline'),
+        fill='tozeroy', fillcolor='rgba(0, 255, 255, 0.15)', name='Predicted'
+    ))
+    if current in values:
+        fig.add_trace(go.Scatter(
+            x=[current], y=[round(float(curve[values.index(current)]))], mode='markers',
+            marker=dict(size=16, color='#8a2be2', line=dict(color='#000000', width=2)),
+            name='Current scenario'
+        ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#00ffff', family='Space Grotesk'),
+        xaxis=dict(gridcolor='rgba(0,255,255,0.1)', title=SWEEP_PARAMS[param][0], showgrid=True, zeroline=False),
+        yaxis=dict(gridcolor='rgba(0,255,255,0.1)', title='Predicted Rentals', showgrid=True, zeroline=False),
+        height=350,
+        margin=dict(l=50, r=20, t=20, b=50),
+        showlegend=False
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    best = int(np.argmax(curve))
+    st.caption(f"{len(values)} points scored in one call · {format_ns(timings['sweep'])} · "
+               f"peak {curve[best]:,.0f} bikes at {values[best]}")
+
+def render_what_if(name, predictor, model_version, encoder, inputs, key):
+    """What-if heatmap: score the full grid of two inputs (other inputs from the form) in one call"""
+    if predictor is None:
+        return
+    if not st.checkbox("🗺️ What-if heatmap", key=f"{key}_what_if",
+                       help="Demand surface over two inputs with everything else fixed"):
+        return
+    params = sweep_params(encoder)
+    default_x, default_y = GRID_PRESETS[name]
+    col_x, col_y = st.columns(2)
+    with col_x:
+        x_param = st.selectbox("X axis", options=params, index=params.index(default_x), key=f"{key}_grid_x",
+                               format_func=lambda p: SWEEP_PARAMS[p][0])
+    with col_y:
+        y_param = st.selectbox("Y axis", options=params, index=params.index(default_y), key=f"{key}_grid_y",
+                               format_func=lambda p: SWEEP_PARAMS[p][0])
+    if x_param == y_param:
+        st.info("💡 Pick two different inputs for the heatmap axes")
+        return
+    
+    timings = {}
+    try:
+        x_values, y_values, grid = what_if_grid(SWEEP_CACHE, name, predictor, model_version, encoder,
+                                                inputs, x_param, y_param, timings=timings)
+    except Exception as e:
+        st.error(f"❌ What-if Error: {str(e)}")
+        return
+    
+    render_start = time.perf_counter_ns()
+    fig = go.Figure(go.Heatmap(
+        x=x_values.tolist(), y=y_values.tolist(), z=grid.round(),
+        colorscale=[[0, '#000000'], [0.5, '#8a2be2'], [1, '#00ffff']],
+        colorbar=dict(title='Rentals'),
+        hovertemplate=f"{SWEEP_PARAMS[x_param][0]}: %{{x}}<br>{SWEEP_PARAMS[y_param][0]}: %{{y}}"
+                      "<br>Predicted: %{z:,.0f}<extra></extra>"
+    ))
+    # Current scenario on the surface
+    fig.add_trace(go.Scatter(
+        x=[inputs[x_param]], y=[inputs[y_param]], mode='markers', hoverinfo='skip', showlegend=False,
+        marker=dict(size=14, color='rgba(0,0,0,0)', line=dict(color='#ffffff', width=3))
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#00ffff', family='Space Grotesk'),
+        xaxis=dict(title=SWEEP_PARAMS[x_param][0]),
+        yaxis=dict(title=SWEEP_PARAMS[y_param][0]),
+        height=450,
+        margin=dict(l=50, r=20, t=20, b=50)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    timings['render'] = time.perf_counter_ns() - render_start
+    LATENCY_RECORDER.record_all(f"{name}.what_if", timings)
+    
+    best_y, best_x = np.unravel_index(int(np.argmax(grid)), grid.shape)
+    st.caption(f"{grid.size:,} scenarios scored in one call · {format_ns(timings['grid'])} · "
+               f"peak {grid[best_y, best_x]:,.0f} bikes at {x_values[best_x]} / {y_values[best_y]}")
+
+def render_latency_diagnostics(prefix, timings):
+    """Per-stage latency breakdown (this request + rolling percentiles) in a diagnostics expander"""
+    with st.expander("🩺 Prediction Diagnostics", expanded=False):
+        st.markdown("**This prediction**")
+        st.markdown(" · ".join(f"{stage}: {format_ns(ns)}" for stage, ns in timings.items()))
+        
+        st.markdown("**Rolling latency (all sessions, this process)**")
+        rows = LATENCY_RECORDER.summary(prefix)
+        if rows:
+            st.dataframe(pd.DataFrame(rows).round(3), use_container_width=True, hide_index=True)
+        
+        st.markdown("**Prediction cache**")
+        st.json(PREDICTION_CACHE.stats())
+        
+        st.markdown("**Model readiness**")
+        st.json(READINESS.to_dict())
+        
+        st.markdown("**Model registry (hot reload)**")
+        st.json(dict(MODEL_REGISTRY.status(), serving=None if MODEL_BUNDLE is None else MODEL_BUNDLE.version))
+        
+        if MICRO_BATCHER is not None:
+            st.markdown("**Micro-batcher**")
+            st.json(MICRO_BATCHER.stats())
+        
+        if PREDICTION_LOG is not None:
+            st.markdown("**Prediction log**")
+            st.json(PREDICTION_LOG.stats())
+        
+        if SHADOW_SCORER is not None:
+            st.markdown("**Shadow model (candidate vs production)**")
+            shadow_rows = SHADOW_SCORER.summary()
+            if shadow_rows:
+                st.dataframe(pd.DataFrame(shadow_rows).round(3), use_container_width=True, hide_index=True)
+            st.json(SHADOW_SCORER.status())
 
 def daily_prediction_tab():
     st.markdown('<div class="prediction-panel">', unsafe_allow_html=True)
@@ -3949,27 +4193,52 @@ def daily_prediction_tab():
     
     with col_btn2:
         if st.button("🚀 Predict Daily Demand", use_container_width=True):
-            with st.spinner("🔮 Analyzing data and generating prediction..."):
-                import time
-                time.sleep(2)
-                
-                # ============= ACTUAL MODEL PREDICTION =============
+            timings = {}
+            
+            # ============= ACTUAL MODEL PREDICTION =============
             if DAILY_MODEL is not None:
                 try:
-                    # Preprocess features
-                    features = preprocess_daily_features(
-                        season, weather, temperature, humidity, wind_speed,
-                        year, month, holiday, working_day, day_type
-                    )
+                    # Encode + predict through the shared prediction cache
+                    # (spinner only while the work is actually running)
+                    inputs = dict(season=season, weather=weather, temperature=temperature,
+                                  humidity=humidity, wind_speed=wind_speed, year=year, month=month,
+                                  holiday=holiday, working_day=working_day, day_type=day_type)
+                    with st.spinner("🔮 Analyzing data and generating prediction..."):
+                        output = predict_cached(
+                            PREDICTION_CACHE, DAILY_PREDICTOR, DAILY_MODEL_VERSION, DAILY_FEATURE_ENCODER,
+                            inputs, timings=timings
+                        )
+                    prediction = int(max(0, output[0]))  # Ensure non-negative integer
+                    
+                    # Interval bounds: a table lookup on the same output, no extra model call
+                    interval = None
+                    if DAILY_INTERVALS is not None:
+                        interval_start = time.perf_counter_ns()
+                        lower, upper = DAILY_INTERVALS.bounds(output, WEATHER_MAP.get(weather, 1))
+                        interval = (int(lower[0]), int(upper[0]))
+                        timings['interval'] = time.perf_counter_ns() - interval_start
                     
-                    # Make prediction
-                    prediction = DAILY_MODEL.predict(features)[0]
-                    prediction = int(max(0, prediction))  # Ensure non-negative integer
+                    # O(1) update of the home dashboard aggregates
+                    DASHBOARD_AGGREGATES.add('daily', prediction,
+                                             weekday=int(weekday_bin([time.time_ns()], [day_type == "Weekday"])[0]),
+                                             weather=WEATHER_MAP.get(weather, 1),
+                                             temp_band=int(temp_band(temperature)), year=int(year_bin(year)))
+                    
+                    # Ring-buffer append; encoding and disk writes happen on the log's flush thread
+                    if PREDICTION_LOG is not None:
+                        PREDICTION_LOG.append("daily", inputs, DAILY_FEATURE_ENCODER, output[0],
+                                              DAILY_MODEL_VERSION, sum(timings.values()),
+                                              st.session_state.username)
+                    
+                    # Candidate model is scored in the background - never delays this response
+                    if SHADOW_SCORER is not None:
+                        SHADOW_SCORER.submit("daily", MODEL_BUNDLE.predictors['daily'], DAILY_FEATURE_ENCODER,
+                                             DAILY_MODEL_VERSION, inputs, output)
                     
                 except Exception as e:
                     st.error(f"❌ Prediction Error: {str(e)}")
                     st.info("💡 Checking feature format...")
-                    st.code(f"Features shape: {features.shape}\nFeatures: {features.columns.tolist()}")
+                    st.code(f"Expected features: {DAILY_FEATURE_COLS}")
                     prediction = None
             else:
                 st.error("❌ Daily model not loaded. Please check model file.")
@@ -3977,6 +4246,12 @@ def daily_prediction_tab():
             # ============= END MODEL PREDICTION =============
             
             if prediction is not None:
+                render_start = time.perf_counter_ns()
+                
+                interval_html = ""
+                if interval is not None:
+                    interval_html = (f'<p style="font-size: 1.1rem; margin-top: 0.5rem; color: #8a2be2; opacity: 0.9;">'
+                                     f'{INTERVAL_COVERAGE:.0%} interval: {interval[0]:,} – {interval[1]:,} bikes</p>')
                 
                 st.markdown(f"""
                     <div style="background: rgba(0, 0, 0, 0.9); border: 3px solid rgba(0, 255, 255, 0.6); border-radius: 18px; padding: 2.5rem; margin: 1rem 0; text-align: center; box-shadow: 0 0 50px rgba(0, 255, 255, 0.4), 0 0 100px rgba(138, 43, 226, 0.3);">
@@ -3985,6 +4260,8 @@ def daily_prediction_tab():
                             {prediction}
                         </div>
                         <p style="font-size: 1.4rem; margin-top: 1rem; color: #00ffff; opacity: 0.9;">bikes expected to be rented</p>
+                        {interval_html}
+                        <p style="font-size: 1rem; margin-top: 0.5rem; color: #00ffc8; opacity: 0.8;">⚡ Scored in {format_ns(sum(timings.values()))}</p>
                     </div>
                 """, unsafe_allow_html=True)
                                     
@@ -3998,12 +4275,32 @@ def daily_prediction_tab():
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    st.metric("Confidence", "94.5%", "↑ 2.3%")
+                    # Backtest error for this weather type + overall R² (day.csv history)
+                    daily_backtest = BACKTESTS.get('daily')
+                    weather_mae = group_metric(daily_backtest, 'weathersit', WEATHER_MAP.get(weather, 1), 'mae')
+                    if weather_mae is not None:
+                        st.metric("Backtest Error", f"±{weather_mae:.0f}",
+                                  f"R² {daily_backtest['overall']['r2']:.1%}", delta_color="off")
+                    else:
+                        st.metric("Backtest Error", "n/a")
                 with col2:
-                    compared_avg = np.random.randint(-200, 300)
-                    st.metric("vs Average", f"{compared_avg:+d}", f"{compared_avg/20:.1f}%")
+                    # Historical mean for the same season / weather / working day / month
+                    render_vs_average(prediction, AGGREGATE_CUBES.get('daily'),
+                                      (SEASON_MAP.get(season, 1), WEATHER_MAP.get(weather, 1),
+                                       working_day == "Yes", month), "days")
                 with col3:
                     st.metric("Trend", "Increasing", "↑ 5%")
+                
+                timings['render'] = time.perf_counter_ns() - render_start
+                LATENCY_RECORDER.record_all("daily", timings)
+                render_latency_diagnostics("daily", timings)
+    
+    # ========== SENSITIVITY SWEEP / WHAT-IF HEATMAP ==========
+    scenario = dict(season=season, weather=weather, temperature=temperature,
+                    humidity=humidity, wind_speed=wind_speed, year=year, month=month,
+                    holiday=holiday, working_day=working_day, day_type=day_type)
+    render_sensitivity("daily", DAILY_PREDICTOR, DAILY_MODEL_VERSION, DAILY_FEATURE_ENCODER, scenario, "daily")
+    render_what_if("daily", DAILY_PREDICTOR, DAILY_MODEL_VERSION, DAILY_FEATURE_ENCODER, scenario, "daily")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -4157,33 +4454,65 @@ def hourly_prediction_tab():
     
     with col_btn2:
         if st.button("🚀 Predict Hourly Demand", use_container_width=True):
-            with st.spinner("🔮 Analyzing data and generating prediction..."):
-                import time
-                import numpy as np
-                time.sleep(2)
-                
-                # ============= ACTUAL MODEL PREDICTION =============
-                if HOURLY_MODEL is not None:
-                    try:
-                        # Preprocess features
-                        features = preprocess_hourly_features(
-                            season, weather, temperature, humidity, wind_speed,
-                            year, month, hour, holiday, working_day, day_type
+            timings = {}
+            
+            # ============= ACTUAL MODEL PREDICTION =============
+            if HOURLY_MODEL is not None:
+                try:
+                    # Score all 24 hours of this scenario in one batched (cached) call;
+                    # the selected hour is read straight out of the same forecast
+                    inputs = hourly_profile_inputs(dict(
+                        season=season, weather=weather, temperature=temperature,
+                        humidity=humidity, wind_speed=wind_speed, year=year, month=month,
+                        hour=hour, holiday=holiday, working_day=working_day, day_type=day_type))
+                    with st.spinner("🔮 Analyzing data and generating prediction..."):
+                        output = predict_cached(
+                            PREDICTION_CACHE, HOURLY_PREDICTOR, HOURLY_MODEL_VERSION, HOURLY_FEATURE_ENCODER,
+                            inputs, timings=timings
                         )
-                        
-                        # Make prediction
-                        prediction = HOURLY_MODEL.predict(features)[0]
-                        prediction = int(max(0, prediction))  # Ensure non-negative integer
-                        
-                    except Exception as e:
-                        st.error(f"❌ Prediction Error: {str(e)}")
-                        st.info("💡 Checking feature format...")
-                        st.code(f"Features shape: {features.shape}\nFeatures: {features.columns.tolist()}")
-                        prediction = None
-                else:
-                    st.error("❌ Hourly model not loaded. Please check model file.")
+                    forecast = [int(max(0, value)) for value in output]  # Ensure non-negative integers
+                    prediction = forecast[hour]
+                    
+                    # Interval bounds for all 24 hours: a table lookup on the same output
+                    forecast_lower = forecast_upper = interval = None
+                    if HOURLY_INTERVALS is not None:
+                        interval_start = time.perf_counter_ns()
+                        lower, upper = HOURLY_INTERVALS.bounds(output, HOURS_OF_DAY)
+                        forecast_lower, forecast_upper = lower.astype(int).tolist(), upper.astype(int).tolist()
+                        interval = (forecast_lower[hour], forecast_upper[hour])
+                        timings['interval'] = time.perf_counter_ns() - interval_start
+                    
+                    # O(1) update of the home dashboard aggregates
+                    DASHBOARD_AGGREGATES.add('hourly', prediction, hour=hour, weather=WEATHER_MAP.get(weather, 1))
+                    
+                    # Log the selected hour; encoding and disk writes happen on the log's flush thread
+                    if PREDICTION_LOG is not None:
+                        PREDICTION_LOG.append("hourly", dict(inputs, hour=hour), HOURLY_FEATURE_ENCODER,
+                                              output[hour], HOURLY_MODEL_VERSION, sum(timings.values()),
+                                              st.session_state.username)
+                    
+                    # Candidate model is scored in the background - never delays this response
+                    if SHADOW_SCORER is not None:
+                        SHADOW_SCORER.submit("hourly", MODEL_BUNDLE.predictors['hourly'], HOURLY_FEATURE_ENCODER,
+                                             HOURLY_MODEL_VERSION, inputs, output)
+                    
+                except Exception as e:
+                    st.error(f"❌ Prediction Error: {str(e)}")
+                    st.info("💡 Checking feature format...")
+                    st.code(f"Expected features: {HOURLY_FEATURE_COLS}")
                     prediction = None
-                # ============= END MODEL PREDICTION =============
+            else:
+                st.error("❌ Hourly model not loaded. Please check model file.")
+                prediction = None
+            # ============= END MODEL PREDICTION =============
+            
+            if prediction is not None:
+                render_start = time.perf_counter_ns()
+                
+                interval_html = ""
+                if interval is not None:
+                    interval_html = (f'<p style="font-size: 1.1rem; margin-top: 0.5rem; color: #8a2be2; opacity: 0.9;">'
+                                     f'{INTERVAL_COVERAGE:.0%} interval: {interval[0]:,} – {interval[1]:,} bikes</p>')
                 
                 st.markdown(f"""
                     <div style="background: rgba(0, 0, 0, 0.9); border: 3px solid rgba(0, 255, 255, 0.6); border-radius: 18px; padding: 2.5rem; margin: 1rem 0; text-align: center; box-shadow: 0 0 50px rgba(0, 255, 255, 0.4), 0 0 100px rgba(138, 43, 226, 0.3);">
@@ -4192,32 +4521,24 @@ def hourly_prediction_tab():
                             {prediction}
                         </div>
                         <p style="font-size: 1.4rem; margin-top: 1rem; color: #00ffff; opacity: 0.9;">bikes expected at {hour}:00</p>
+                        {interval_html}
+                        <p style="font-size: 1rem; margin-top: 0.5rem; color: #00ffc8; opacity: 0.8;">⚡ Scored in {format_ns(sum(timings.values()))}</p>
                     </div>
                 """, unsafe_allow_html=True)
-                                    
+                                
                     # 📱 QR Code for Hourly Prediction
                 conditions_summary = f"{season}, {weather}, {temperature}°C, Hour {hour:02d}:00"
                 display_qr_code_section(prediction, "Hourly Prediction", conditions_summary)
 
-                
+            
                 # Show hourly pattern chart
                 st.markdown("### 📊 Hourly Pattern Forecast")
-                
+            
                 import plotly.graph_objects as go
-                
+            
+                # Forecast comes from the hourly model (scored above for hr = 0..23)
                 hours = list(range(24))
-                current_hour_idx = hour
-                
-                # Generate forecast around current hour
-                forecast = []
-                for h in hours:
-                    if h == current_hour_idx:
-                        forecast.append(prediction)
-                    else:
-                        diff = abs(h - current_hour_idx)
-                        variation = prediction * (1 - diff * 0.05)
-                        forecast.append(int(max(10, variation + np.random.randint(-20, 20))))
-                
+            
                 fig = go.Figure()
                 fig.add_trace(go.Scatter(
                     x=hours,
@@ -4233,6 +4554,18 @@ def hourly_prediction_tab():
                     fillcolor='rgba(0, 255, 255, 0.15)'
                 ))
                 
+                # Shaded conformal interval band around the forecast
+                if forecast_upper is not None:
+                    fig.add_trace(go.Scatter(
+                        x=hours, y=forecast_upper, mode='lines', line=dict(width=0, shape='spline'),
+                        hoverinfo='skip', showlegend=False
+                    ))
+                    fig.add_trace(go.Scatter(
+                        x=hours, y=forecast_lower, mode='lines', line=dict(width=0, shape='spline'),
+                        fill='tonexty', fillcolor='rgba(138, 43, 226, 0.25)',
+                        name=f"{INTERVAL_COVERAGE:.0%} interval", hoverinfo='skip', showlegend=False
+                    ))
+            
                 fig.update_layout(
                     plot_bgcolor='rgba(0,0,0,0)',
                     paper_bgcolor='rgba(0,0,0,0)',
@@ -4252,20 +4585,168 @@ def hourly_prediction_tab():
                     height=400,
                     margin=dict(l=50, r=20, t=20, b=50)
                 )
-                
+            
                 st.plotly_chart(fig, use_container_width=True)
-                
+            
                 # Show insights
                 st.markdown("### 📊 Prediction Insights")
                 col1, col2, col3 = st.columns(3)
-                
+            
                 with col1:
-                    st.metric("Confidence", "92.8%", "↑ 1.5%")
+                    # Backtest error at this hour + overall R² (hour.csv history)
+                    hourly_backtest = BACKTESTS.get('hourly')
+                    hour_mae = group_metric(hourly_backtest, 'hr', hour, 'mae')
+                    if hour_mae is not None:
+                        st.metric("Backtest Error", f"±{hour_mae:.0f}",
+                                  f"R² {hourly_backtest['overall']['r2']:.1%}", delta_color="off")
+                    else:
+                        st.metric("Backtest Error", "n/a")
                 with col2:
                     peak_hour = hours[forecast.index(max(forecast))]
                     st.metric("Peak Hour", f"{peak_hour}:00", f"↑ {max(forecast)} bikes")
                 with col3:
-                    st.metric("Trend", "Steady", "→ 0%")
+                    # Historical mean for the same conditions at this hour
+                    render_vs_average(prediction, AGGREGATE_CUBES.get('hourly'),
+                                      (SEASON_MAP.get(season, 1), WEATHER_MAP.get(weather, 1),
+                                       working_day == "Yes", month, hour), "hours")
+                
+                timings['render'] = time.perf_counter_ns() - render_start
+                LATENCY_RECORDER.record_all("hourly", timings)
+                render_latency_diagnostics("hourly", timings)
+
+    # ========== SENSITIVITY SWEEP / WHAT-IF HEATMAP ==========
+    scenario = dict(season=season, weather=weather, temperature=temperature,
+                    humidity=humidity, wind_speed=wind_speed, year=year, month=month,
+                    hour=hour, holiday=holiday, working_day=working_day, day_type=day_type)
+    render_sensitivity("hourly", HOURLY_PREDICTOR, HOURLY_MODEL_VERSION, HOURLY_FEATURE_ENCODER, scenario, "hourly")
+    render_what_if("hourly", HOURLY_PREDICTOR, HOURLY_MODEL_VERSION, HOURLY_FEATURE_ENCODER, scenario, "hourly")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def range_forecast_tab():
+    st.markdown('<div class="prediction-panel">', unsafe_allow_html=True)
+    st.markdown('<h2 class="section-title">📆 Range Forecast</h2>', unsafe_allow_html=True)
+    st.markdown("Season, month, year, holidays, working days and day type are derived from the calendar for every date.")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("### Date Range")
+        view = st.radio(
+            "Forecast view",
+            options=["Next 7 days × 24 hours", "Next 365 days", "Custom range"],
+            key="range_view"
+        )
+        if view == "Next 7 days × 24 hours":
+            name = "hourly"
+            start, end = next_days(7)
+        elif view == "Next 365 days":
+            name = "daily"
+            start, end = next_days(365)
+        else:
+            name = "hourly" if st.radio("Model", options=["Daily", "Hourly"], horizontal=True,
+                                        key="range_model") == "Hourly" else "daily"
+            today = datetime.now().date()
+            dates = st.date_input("📅 From / to", value=(today, today + timedelta(days=30)), key="range_dates")
+            if not isinstance(dates, (list, tuple)) or len(dates) != 2:
+                st.info("💡 Pick both a start and an end date")
+                st.markdown('</div>', unsafe_allow_html=True)
+                return
+            start, end = dates
+    
+    with col2:
+        st.markdown("### Weather")
+        weather_options = ["Typical for each month (history)", "Fixed conditions"]
+        source = st.radio("Weather inputs", options=weather_options, key="range_weather_source",
+                          index=0 if MONTHLY_NORMALS is not None else 1)
+        conditions = normals = None
+        if source == weather_options[0] and MONTHLY_NORMALS is not None:
+            normals = MONTHLY_NORMALS
+        else:
+            if source == weather_options[0]:
+                st.info("💡 day.csv not found - using fixed conditions")
+            conditions = dict(
+                weather=st.selectbox("🌤️ Weather", options=list(WEATHER_MAP), key="range_weather"),
+                temperature=st.slider("🌡️ Temperature (°C)", min_value=-10, max_value=40, value=18, key="range_temp"),
+                humidity=st.slider("💧 Humidity (%)", min_value=0, max_value=100, value=60, key="range_humidity"),
+                wind_speed=st.slider("💨 Wind Speed (km/h)", min_value=0, max_value=60, value=10, key="range_wind"),
+            )
+    
+    st.markdown("---")
+    
+    predictor = HOURLY_PREDICTOR if name == "hourly" else DAILY_PREDICTOR
+    if predictor is None:
+        st.error(f"❌ {name.title()} model not loaded. Please check model file.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+    
+    timings = {}
+    try:
+        forecast = forecast_range(
+            FORECAST_CACHE, name, predictor,
+            HOURLY_MODEL_VERSION if name == "hourly" else DAILY_MODEL_VERSION,
+            HOURLY_FEATURE_ENCODER if name == "hourly" else DAILY_FEATURE_ENCODER,
+            start, end, conditions=conditions, normals=normals, timings=timings
+        )
+    except Exception as e:
+        st.error(f"❌ Forecast Error: {str(e)}")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+    LATENCY_RECORDER.record_all(f"{name}.range", timings)
+    
+    render_start = time.perf_counter_ns()
+    daily_totals = forecast.groupby(forecast['timestamp'].dt.date)['prediction'].sum()
+    peak = forecast.loc[forecast['prediction'].idxmax()]
+    peak_format = "%a %d %b, %H:00" if name == "hourly" else "%a %d %b %Y"
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Expected Rentals", f"{forecast['prediction'].sum():,.0f}",
+                  f"{len(daily_totals)} days", delta_color="off")
+    with col2:
+        st.metric("Peak", f"{peak['prediction']:,.0f} bikes", peak['timestamp'].strftime(peak_format),
+                  delta_color="off")
+    with col3:
+        busiest = daily_totals.idxmax()
+        st.metric("Busiest Day", busiest.strftime("%a %d %b"), f"{daily_totals.max():,.0f} bikes",
+                  delta_color="off")
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=forecast['timestamp'],
+        y=forecast['prediction'].round(),
+        mode='lines',
+        line=dict(color='#00ffff', width=2),
+        fill='tozeroy',
+        fillcolor='rgba(0, 255, 255, 0.15)'
+    ))
+    holidays = forecast[forecast['holiday'] == "Yes"]['timestamp'].dt.normalize().unique()
+    for day in holidays:
+        fig.add_vline(x=day, line=dict(color='#8a2be2', width=1, dash='dot'))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#00ffff', family='Space Grotesk'),
+        xaxis=dict(gridcolor='rgba(0,255,255,0.1)', title='Date', showgrid=True, zeroline=False),
+        yaxis=dict(gridcolor='rgba(0,255,255,0.1)', title='Predicted Rentals', showgrid=True, zeroline=False),
+        height=400,
+        margin=dict(l=50, r=20, t=20, b=50)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    if len(holidays):
+        st.caption(f"Dotted lines: {len(holidays)} public holiday(s) in range")
+    
+    st.download_button(
+        "⬇️ Download forecast (CSV)",
+        data=forecast.to_csv(index=False).encode('utf-8'),
+        file_name=f"ridewise_{name}_forecast_{start:%Y%m%d}_{end:%Y%m%d}.csv",
+        mime="text/csv",
+        key="range_download"
+    )
+    
+    timings['render'] = time.perf_counter_ns() - render_start
+    st.caption(f"⚡ {len(forecast):,} {'hours' if name == 'hourly' else 'days'} scored in one call · "
+               f"{format_ns(timings['range'])} · rendered in {format_ns(timings['render'])}")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
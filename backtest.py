@@ -0,0 +1,232 @@
+"""
+Backtesting over the UCI bike-sharing history (day.csv / hour.csv)
+
+Replays the historical rows through the daily/hourly models in vectorized
+batches and reports RMSE / MAE / MAPE / R² overall and per season, weather,
+working day (and hour for the hourly model). The history is already in the
+models' training feature space (season, yr, mnth, ..., windspeed, [hr]), so
+rows are scored as stored - no UI encoding involved.
+
+Results are cached as JSON under BACKTEST_CACHE_DIR, keyed by the model
+fingerprint and the history file's content hash, so the app can show real
+accuracy numbers without rescoring.
+
+Usage:
+    python backtest.py [--model daily|hourly|both] [--refresh]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import LAG_INPUTS, feature_matrix, required_columns
+from prediction_cache import model_fingerprint
+from prediction_engine import SEASON_MAP, WEATHER_MAP, model_input
+from prediction_intervals import INTERVAL_GROUP, interval_widths
+
+DAY_FILE = 'day.csv'
+HOUR_FILE = 'hour.csv'
+HISTORY_FILES = {'daily': DAY_FILE, 'hourly': HOUR_FILE}
+TARGET_COL = 'cnt'
+BACKTEST_CACHE_DIR = '.backtest_cache'
+# Bumped whenever the cached result layout changes
+CACHE_FORMAT = 2
+
+GROUP_COLS = {
+    'daily': ['season', 'weathersit', 'workingday'],
+    'hourly': ['season', 'weathersit', 'hr', 'workingday'],
+}
+# Human-readable labels for coded history columns
+GROUP_LABELS = {
+    'season': {code: name for name, code in SEASON_MAP.items()},
+    'weathersit': {code: name for name, code in WEATHER_MAP.items()},
+    'workingday': {0: "No", 1: "Yes"},
+}
+
+BATCH_SIZE = 65536
+
+
+# ============= METRICS =============
+
+def regression_metrics(y_true, y_pred):
+    """RMSE / MAE / MAPE (%) / R² for one set of predictions; MAPE skips zero-demand rows"""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = np.asarray(y_pred, dtype=np.float64) - y_true
+    nonzero = y_true != 0
+    ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+    return {
+        'n': int(len(y_true)),
+        'rmse': float(np.sqrt(np.mean(err ** 2))),
+        'mae': float(np.mean(np.abs(err))),
+        'mape': float(np.mean(np.abs(err[nonzero] / y_true[nonzero])) * 100) if nonzero.any() else None,
+        'r2': float(1 - np.sum(err ** 2) / ss_tot) if ss_tot > 0 else None,
+    }
+
+
+def grouped_metrics(y_true, y_pred, groups):
+    """
+    The same metrics per distinct value of `groups`, computed in one pass
+    with bincount sums instead of a groupby per metric
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = np.asarray(y_pred, dtype=np.float64) - y_true
+    values, codes = np.unique(np.asarray(groups), return_inverse=True)
+    k = len(values)
+
+    n = np.bincount(codes, minlength=k)
+    sq = np.bincount(codes, weights=err ** 2, minlength=k)
+    ab = np.bincount(codes, weights=np.abs(err), minlength=k)
+    y_sum = np.bincount(codes, weights=y_true, minlength=k)
+    y_sq = np.bincount(codes, weights=y_true ** 2, minlength=k)
+    nonzero = y_true != 0
+    ape = np.bincount(codes[nonzero], weights=np.abs(err[nonzero] / y_true[nonzero]), minlength=k)
+    n_nonzero = np.bincount(codes[nonzero], minlength=k)
+    ss_tot = y_sq - y_sum ** 2 / n
+
+    rows = []
+    for i, value in enumerate(values.tolist()):
+        rows.append({
+            'value': value,
+            'n': int(n[i]),
+            'rmse': float(np.sqrt(sq[i] / n[i])),
+            'mae': float(ab[i] / n[i]),
+            'mape': float(ape[i] / n_nonzero[i] * 100) if n_nonzero[i] else None,
+            'r2': float(1 - sq[i] / ss_tot[i]) if ss_tot[i] > 1e-9 else None,
+        })
+    return rows
+
+
+# ============= BACKTEST =============
+
+def load_history(path, feature_cols, extra_cols=()):
+    """Base columns for the features + target (+ any present extra columns) from a UCI history file"""
+    wanted = set(required_columns(feature_cols)) | set(feature_cols) | set(LAG_INPUTS) | {TARGET_COL} | set(extra_cols)
+    return pd.read_csv(path, usecols=lambda col: col in wanted)
+
+
+def predict_history(predictor, feature_cols, history, batch_size=BATCH_SIZE):
+    """Score the history in fixed-size vectorized batches (engineered features built column-wise)"""
+    X = feature_matrix({col: history[col] for col in history.columns if col != TARGET_COL}, list(feature_cols))
+    out = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), batch_size):
+        batch = X[start:start + batch_size]
+        out[start:start + batch_size] = predictor.predict(model_input(predictor, batch, feature_cols))
+    return out
+
+
+def run_backtest(name, predictor, feature_cols, history):
+    """Backtest one model on an in-memory history -> JSON-serializable result"""
+    start = time.perf_counter()
+    y_true = history[TARGET_COL].to_numpy(dtype=np.float64)
+    y_pred = np.maximum(predict_history(predictor, feature_cols, history), 0)  # as served in the app
+    residuals = y_true - y_pred
+
+    by_group = {}
+    for col in GROUP_COLS[name]:
+        if col not in history.columns:
+            continue
+        rows = grouped_metrics(y_true, y_pred, history[col].to_numpy())
+        labels = GROUP_LABELS.get(col, {})
+        for row in rows:
+            row['label'] = labels.get(row['value'], str(row['value']))
+        by_group[col] = rows
+
+    result = {
+        'model': name,
+        'rows': int(len(history)),
+        'overall': regression_metrics(y_true, y_pred),
+        'by_group': by_group,
+        'residual_quantiles': {str(q): float(np.quantile(np.abs(residuals), q))
+                               for q in (0.5, 0.8, 0.9, 0.95)},
+    }
+    interval_col = INTERVAL_GROUP[name]
+    if interval_col in history.columns:
+        # Conformal half-widths for prediction intervals (prediction_intervals.py)
+        result['intervals'] = {
+            'group': interval_col,
+            'widths': interval_widths(np.abs(residuals), history[interval_col].to_numpy()),
+        }
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _cache_path(name, model_version, history_path, cache_dir):
+    data_version = model_fingerprint(history_path)
+    return os.path.join(cache_dir, f"{name}-{model_version}-{data_version}-v{CACHE_FORMAT}.json")
+
+
+def backtest(name, predictor, feature_cols, model_version, history_path=None,
+             cache_dir=BACKTEST_CACHE_DIR, refresh=False):
+    """
+    Cached backtest of one model. Returns None when the history file is missing.
+    The cache key is (model fingerprint, history content hash).
+    """
+    history_path = history_path or HISTORY_FILES[name]
+    if not os.path.exists(history_path):
+        return None
+
+    path = _cache_path(name, model_version, history_path, cache_dir)
+    if not refresh and model_version is not None and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass  # unreadable cache entry - recompute
+
+    history = load_history(history_path, feature_cols, GROUP_COLS[name])
+    result = run_backtest(name, predictor, feature_cols, history)
+    result['model_version'] = model_version
+    if model_version is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+    return result
+
+
+def group_metric(result, col, value, metric='r2'):
+    """Look up one metric for one group value (e.g. hr=8), None when unavailable"""
+    if result is None:
+        return None
+    for row in result['by_group'].get(col, []):
+        if row['value'] == value:
+            return row[metric]
+    return None
+
+
+def main():
+    from model_registry import MODEL_NAMES, ModelBundle, load_models
+
+    parser = argparse.ArgumentParser(description="Backtest the RideWise models on day.csv / hour.csv")
+    parser.add_argument("--model", choices=["daily", "hourly", "both"], default="both")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached results")
+    args = parser.parse_args()
+
+    models, versions = load_models()
+    bundle = ModelBundle(models, versions)
+    names = MODEL_NAMES if args.model == "both" else (args.model,)
+    for name in names:
+        encoder = bundle.encoders[name]
+        result = backtest(name, bundle.predictors[name], encoder.feature_cols, bundle.versions[name],
+                          refresh=args.refresh)
+        if result is None:
+            print(f"⚠️ {name}: {HISTORY_FILES[name]} not found")
+            continue
+        overall = result['overall']
+        print(f"\n📊 {name} model ({result['rows']:,} rows, version {result['model_version']})")
+        print(f"   RMSE {overall['rmse']:.1f} | MAE {overall['mae']:.1f} | "
+              f"MAPE {overall['mape']:.1f}% | R² {overall['r2']:.3f}")
+        for col, rows in result['by_group'].items():
+            print(f"   by {col}:")
+            for row in rows:
+                r2 = "n/a" if row['r2'] is None else f"{row['r2']:.3f}"
+                print(f"     {row['label']:<18} n={row['n']:<6} RMSE {row['rmse']:8.1f}  "
+                      f"MAE {row['mae']:8.1f}  R² {r2}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+RideWise micro-benchmarks
+
+Usage:
+    python benchmark.py encode [--rows 10000] [--repeat 2000] [--model hourly_bike_rental_model.pkl]
+    python benchmark.py trees --model hourly_bike_rental_model.pkl [--repeat 2000] [--batch 1000]
+    python benchmark.py load [--daily daily_bike_rental_model.pkl] [--hourly hourly_bike_rental_model.pkl]
+                             [--artifacts model_artifacts] [--runs 5]
+    python benchmark.py grid [--model hourly_bike_rental_model.pkl] [--x hour] [--y temperature] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from prediction_engine import (
+    DAILY_FEATURE_COLS, HOURLY_FEATURE_COLS, HOURLY_INPUT_COLS, FeatureEncoder,
+    model_input, random_inputs
+)
+from sensitivity import GRID_PRESETS, SWEEP_PARAMS, grid_inputs, what_if_grid
+from tree_ensemble import flatten_model
+
+
+def _timeit(fn, repeat):
+    """Best-of-3 mean seconds per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+# ============= ENCODER BENCHMARK =============
+
+def _legacy_preprocess_hourly(season, weather, temperature, humidity, wind_speed,
+                              year, month, hour, holiday, working_day, day_type):
+    """The original dict -> DataFrame -> reorder path, kept only as a baseline"""
+    season_map = {"Spring": 1, "Summer": 2, "Fall": 3, "Winter": 4}
+    weather_map = {"Clear": 1, "Mist/Cloudy": 2, "Light Rain/Snow": 3, "Heavy Rain/Snow": 4}
+    features = {
+        'season': season_map.get(season, 1),
+        'yr': 1 if year >= 2012 else 0,
+        'mnth': month,
+        'holiday': 1 if holiday == "Yes" else 0,
+        'weekday': 1 if day_type == "Weekday" else 0,
+        'workingday': 1 if working_day == "Yes" else 0,
+        'weathersit': weather_map.get(weather, 1),
+        'temp': temperature / 41.0,
+        'atemp': (temperature + 5) / 50.0,
+        'hum': humidity / 100.0,
+        'windspeed': wind_speed / 67.0,
+        'hr': hour
+    }
+    feature_df = pd.DataFrame([features])
+    return feature_df[HOURLY_FEATURE_COLS]
+
+
+def bench_encode(args):
+    inputs = random_inputs(args.rows)
+    row = inputs.loc[0, HOURLY_INPUT_COLS].tolist()
+    encoder = FeatureEncoder(HOURLY_FEATURE_COLS)
+    encoder32 = FeatureEncoder(HOURLY_FEATURE_COLS, dtype=np.float32)
+    buffer = encoder.new_buffer(args.rows)
+    # Parity with the legacy path is covered by tests/test_prediction_engine.py
+
+    results = [
+        ("legacy dict->DataFrame (1 row)", _timeit(lambda: _legacy_preprocess_hourly(*row), args.repeat), 1),
+        ("FeatureEncoder.encode_row (1 row)", _timeit(lambda: encoder.encode_row(*row), args.repeat), 1),
+        (f"FeatureEncoder.encode float64 ({args.rows} rows)",
+         _timeit(lambda: encoder.encode(inputs, out=buffer), max(1, args.repeat // 100)), args.rows),
+        (f"FeatureEncoder.encode float32 ({args.rows} rows)",
+         _timeit(lambda: encoder32.encode(inputs), max(1, args.repeat // 100)), args.rows),
+    ]
+
+    if args.model:
+        with open(args.model, 'rb') as f:
+            model = pickle.load(f)
+        features = encoder.encode_row(*row).copy()
+        results.append(("model.predict (1 row, for scale)",
+                        _timeit(lambda: model.predict(model_input(model, features, HOURLY_FEATURE_COLS)),
+                                max(1, args.repeat // 10)), 1))
+
+    print(f"{'case':<48}{'per call':>14}{'per row':>14}")
+    for name, seconds, rows in results:
+        print(f"{name:<48}{seconds * 1e6:>11.2f} us{seconds / rows * 1e6:>11.3f} us")
+
+
+# ============= TREE EVALUATOR BENCHMARK =============
+
+def _latencies(fn, repeat):
+    """Per-call latencies in microseconds (after a short warm-up)"""
+    for _ in range(min(20, repeat)):
+        fn()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = (time.perf_counter_ns() - start) / 1e3
+    return samples
+
+
+def bench_trees(args):
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    hourly = getattr(model, 'n_features_in_', len(HOURLY_FEATURE_COLS)) == len(HOURLY_FEATURE_COLS)
+    encoder = FeatureEncoder.for_model(model, HOURLY_FEATURE_COLS if hourly else DAILY_FEATURE_COLS)
+    X = encoder.encode(random_inputs(args.batch, hourly=hourly))
+    flat = flatten_model(model)
+
+    row = X[:1]
+    cases = [
+        ("original predict (1 row)", lambda: model.predict(model_input(model, row, encoder.feature_cols)), args.repeat, 1),
+        (f"original predict ({args.batch} rows)",
+         lambda: model.predict(model_input(model, X, encoder.feature_cols)), max(5, args.repeat // 50), args.batch),
+    ]
+    if flat is None:
+        print(f"{type(model).__name__}: not supported by the flat evaluator - original predict only")
+    else:
+        # Parity with model.predict is covered by tests/test_tree_ensemble.py
+        print(f"{type(model).__name__}: {flat.n_trees} trees, {flat.n_nodes} nodes, depth {flat.max_depth}")
+        cases.insert(1, ("flat evaluator (1 row)", lambda: flat.predict(row), args.repeat, 1))
+        cases.append((f"flat evaluator ({args.batch} rows)", lambda: flat.predict(X), max(5, args.repeat // 50), args.batch))
+    print(f"{'case':<36}{'p50':>12}{'p99':>12}{'rows/s':>14}")
+    for name, fn, repeat, rows in cases:
+        samples = _latencies(fn, repeat)
+        p50, p99 = np.percentile(samples, [50, 99])
+        print(f"{name:<36}{p50:>9.1f} us{p99:>9.1f} us{rows / (p50 / 1e6):>14,.0f}")
+
+
+# ============= MODEL LOAD BENCHMARK =============
+
+def _rss_kb():
+    """Current resident set size in kB (Linux /proc, else peak RSS from resource)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _load_child(args):
+    """Runs in a fresh interpreter: load one model the requested way and report JSON"""
+    import numpy  # noqa: F401 - baseline includes NumPy, which every path needs
+    rss_before = _rss_kb()
+    start = time.perf_counter_ns()
+    if args.method == 'pickle':
+        with open(args.path, 'rb') as f:
+            model = pickle.load(f)
+    else:
+        from model_artifacts import load_artifact, read_manifest
+        entry = read_manifest(args.path)['models'][args.name]
+        model = load_artifact(args.path, entry, mmap=args.method == 'artifact-mmap')
+    load_ns = time.perf_counter_ns() - start
+    rss_loaded = _rss_kb()
+
+    hourly = args.name == 'hourly'
+    encoder = FeatureEncoder.for_model(model, HOURLY_FEATURE_COLS if hourly else DAILY_FEATURE_COLS)
+    X = encoder.encode(random_inputs(256, hourly=hourly))
+    start = time.perf_counter_ns()
+    model.predict(model_input(model, X, encoder.feature_cols))
+    first_predict_ns = time.perf_counter_ns() - start
+
+    print(json.dumps({'load_ms': load_ns / 1e6, 'first_predict_ms': first_predict_ns / 1e6,
+                      'rss_loaded_mb': (rss_loaded - rss_before) / 1024,
+                      'rss_after_predict_mb': (_rss_kb() - rss_before) / 1024}))
+
+
+def bench_load(args):
+    cases = []
+    for name, pkl in [('daily', args.daily), ('hourly', args.hourly)]:
+        cases.append((name, 'pickle', pkl))
+        if os.path.exists(os.path.join(args.artifacts, 'manifest.json')):
+            from model_artifacts import read_manifest
+            cases.append((name, 'artifact', args.artifacts))
+            # XGBoost's native format is parsed, not mapped
+            if read_manifest(args.artifacts)['models'][name]['kind'] == 'flat_trees':
+                cases.append((name, 'artifact-mmap', args.artifacts))
+        else:
+            print(f"(no {args.artifacts}/manifest.json - run `python model_artifacts.py export` to compare)")
+
+    print(f"{'model':<8}{'method':<16}{'load p50':>12}{'1st predict':>14}{'RSS loaded':>13}{'RSS +predict':>14}")
+    for name, method, path in cases:
+        runs = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '_load-child',
+                 '--method', method, '--name', name, '--path', path],
+                capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        med = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+        print(f"{name:<8}{method:<16}{med['load_ms']:>9.1f} ms{med['first_predict_ms']:>11.1f} ms"
+              f"{med['rss_loaded_mb']:>10.1f} MB{med['rss_after_predict_mb']:>11.1f} MB")
+
+
+# ============= WHAT-IF GRID BENCHMARK =============
+
+def bench_grid(args):
+    from prediction_cache import PredictionCache, model_fingerprint
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    hourly = getattr(model, 'n_features_in_', len(HOURLY_FEATURE_COLS)) == len(HOURLY_FEATURE_COLS)
+    name = 'hourly' if hourly else 'daily'
+    encoder = FeatureEncoder.for_model(model, HOURLY_FEATURE_COLS if hourly else DAILY_FEATURE_COLS)
+    default_x, default_y = GRID_PRESETS[name]
+    x_param, y_param = args.x or default_x, args.y or default_y
+    inputs = random_inputs(1, hourly=hourly).iloc[0].to_dict()
+    rows = len(SWEEP_PARAMS[x_param][1]) * len(SWEEP_PARAMS[y_param][1])
+
+    flat = flatten_model(model)  # None for models the flat evaluator does not support
+    version = model_fingerprint(args.model)
+    cache = PredictionCache(maxsize=16)
+    what_if_grid(cache, name, model, version, encoder, inputs, x_param, y_param)  # warm the cache entry
+
+    cases = [
+        ("encode grid", lambda: encoder.encode(grid_inputs(inputs, x_param, y_param)), args.repeat),
+        ("encode + predict", lambda: what_if_grid(None, name, model, version, encoder, inputs,
+                                                  x_param, y_param), args.repeat),
+        ("cached grid", lambda: what_if_grid(cache, name, model, version, encoder, inputs,
+                                             x_param, y_param), args.repeat * 50),
+    ]
+    if flat is not None:
+        cases.insert(2, ("encode + flat evaluator", lambda: what_if_grid(None, name, flat, version, encoder, inputs,
+                                                                        x_param, y_param), args.repeat))
+    print(f"{type(model).__name__} {name} grid: {x_param} x {y_param} = {rows:,} rows")
+    print(f"{'case':<28}{'p50':>12}{'p99':>12}{'rows/s':>16}")
+    for case, fn, repeat in cases:
+        samples = _latencies(fn, repeat)
+        p50, p99 = np.percentile(samples, [50, 99])
+        print(f"{case:<28}{p50 / 1e3:>9.2f} ms{p99 / 1e3:>9.2f} ms{rows / (p50 / 1e6):>16,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RideWise micro-benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("encode", help="per-row feature encoding cost, legacy vs compiled encoder")
+    p.add_argument("--rows", type=int, default=10000)
+    p.add_argument("--repeat", type=int, default=2000)
+    p.add_argument("--model", help="optional pickled hourly model to time predict() against")
+    p.set_defaults(func=bench_encode)
+
+    p = sub.add_parser("trees", help="p50/p99 latency of the flat tree evaluator vs model.predict")
+    p.add_argument("--model", required=True, help="pickled daily or hourly model")
+    p.add_argument("--repeat", type=int, default=2000)
+    p.add_argument("--batch", type=int, default=1000)
+    p.set_defaults(func=bench_trees)
+
+    p = sub.add_parser("load", help="cold-start load time and RSS: pickle vs native/npz artifacts")
+    p.add_argument("--daily", default="daily_bike_rental_model.pkl")
+    p.add_argument("--hourly", default="hourly_bike_rental_model.pkl")
+    p.add_argument("--artifacts", default="model_artifacts")
+    p.add_argument("--runs", type=int, default=5)
+    p.set_defaults(func=bench_load)
+
+    p = sub.add_parser("grid", help="what-if heatmap grid scoring throughput (one vectorized call)")
+    p.add_argument("--model", default="hourly_bike_rental_model.pkl", help="pickled daily or hourly model")
+    p.add_argument("--x", choices=list(SWEEP_PARAMS), help="default: hour (hourly) / month (daily)")
+    p.add_argument("--y", choices=list(SWEEP_PARAMS), help="default: temperature (hourly) / weather (daily)")
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=bench_grid)
+
+    p = sub.add_parser("_load-child")  # internal: one cold load per fresh interpreter
+    p.add_argument("--method", choices=["pickle", "artifact", "artifact-mmap"])
+    p.add_argument("--name", choices=["daily", "hourly"])
+    p.add_argument("--path")
+    p.set_defaults(func=_load_child)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Bulk scorer for CSV / Parquet scenario files
+
+Streams the input in chunks, encodes each chunk with the app's feature
+encoder (same logic as preprocess_daily_features / preprocess_hourly_features),
+scores it through the loaded model and appends the results to the output
+file, so memory stays flat regardless of file size.
+
+Input columns are the raw UI fields: season, weather, temperature, humidity,
+wind_speed, year, month, [hour,] holiday, working_day, day_type.
+
+Usage:
+    python bulk_score.py scenarios.csv --output scored.csv [--model hourly|daily]
+                         [--chunksize 50000] [--workers 4] [--flat-trees]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_registry import (
+    DAILY_MODEL_FILE, HOURLY_MODEL_FILE, MODEL_ARTIFACT_DIR, ModelBundle, load_models
+)
+from prediction_engine import DAILY_INPUT_COLS, HOURLY_INPUT_COLS, model_input
+
+PREDICTION_COL = 'predicted_rentals'
+# Native thread pools capped to one thread inside pool workers
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+# ============= READ / WRITE =============
+
+def _is_parquet(path):
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def iter_chunks(path, chunksize, columns=None):
+    """Yield DataFrame chunks of at most `chunksize` rows"""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq  # optional: only needed for Parquet files
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._wrote_header = False
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a', header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+# ============= SCORING =============
+
+# Per-process model state, set once by _init_worker (or directly when --workers 1)
+_WORKER = {}
+
+
+def _limit_threads(models):
+    """
+    One thread per pool worker - the process pool supplies the parallelism,
+    so per-model all-core thread pools would only oversubscribe the CPU
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = '1'
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)  # OpenMP/BLAS pools already started in this process
+    except ImportError:
+        pass
+    for model in models.values():
+        if hasattr(model, 'get_params') and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+
+
+def _init_worker(model_name, paths, use_flat_trees, single_thread=False):
+    models, versions = load_models(**paths)
+    if single_thread:
+        _limit_threads(models)
+    bundle = ModelBundle(models, versions, use_flat_trees=use_flat_trees)
+    _WORKER['predictor'] = bundle.predictors[model_name]
+    _WORKER['encoder'] = bundle.encoders[model_name]
+    _WORKER['version'] = bundle.versions[model_name]
+
+
+def score_chunk(chunk):
+    """Encode + predict one chunk -> the chunk with a prediction column appended"""
+    predictor, encoder = _WORKER['predictor'], _WORKER['encoder']
+    X = encoder.encode(chunk)
+    out = np.asarray(predictor.predict(model_input(predictor, X, encoder.feature_cols)), dtype=np.float64)
+    chunk = chunk.copy()
+    # Non-negative integer counts, as shown in the app
+    chunk[PREDICTION_COL] = np.maximum(out, 0).astype(np.int64)
+    return chunk
+
+
+def bulk_score(input_path, output_path, model_name, chunksize=50000, workers=1,
+               use_flat_trees=False, paths=None):
+    """Score `input_path` into `output_path`; returns (rows, seconds)"""
+    paths = paths or dict(daily_file=DAILY_MODEL_FILE, hourly_file=HOURLY_MODEL_FILE,
+                          artifact_dir=MODEL_ARTIFACT_DIR)
+    input_cols = HOURLY_INPUT_COLS if model_name == 'hourly' else DAILY_INPUT_COLS
+
+    start = time.perf_counter()
+    writer = ChunkWriter(output_path)
+    rows = 0
+    try:
+        chunks = iter_chunks(input_path, chunksize)
+        if workers <= 1:
+            _init_worker(model_name, paths, use_flat_trees)
+            for chunk in chunks:
+                _check_columns(chunk, input_cols)
+                writer.write(score_chunk(chunk))
+                rows += len(chunk)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_name, paths, use_flat_trees, True)) as pool:
+                # Bounded in-flight window keeps memory flat and output in input order
+                pending = deque()
+                for chunk in chunks:
+                    _check_columns(chunk, input_cols)
+                    pending.append(pool.submit(score_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        scored = pending.popleft().result()
+                        writer.write(scored)
+                        rows += len(scored)
+                while pending:
+                    scored = pending.popleft().result()
+                    writer.write(scored)
+                    rows += len(scored)
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - start
+
+
+def _check_columns(chunk, input_cols):
+    missing = [col for col in input_cols if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing columns: {missing}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of RideWise scenarios")
+    parser.add_argument("input", help="CSV or Parquet file of raw scenario columns")
+    parser.add_argument("--output", required=True, help="CSV or Parquet file to write")
+    parser.add_argument("--model", choices=["daily", "hourly"],
+                        help="default: hourly when the input has an 'hour' column")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=1, help="processes scoring chunks in parallel")
+    parser.add_argument("--flat-trees", action="store_true", help="score through the flat-array evaluator")
+    parser.add_argument("--daily-file", default=DAILY_MODEL_FILE)
+    parser.add_argument("--hourly-file", default=HOURLY_MODEL_FILE)
+    parser.add_argument("--artifacts", default=MODEL_ARTIFACT_DIR)
+    args = parser.parse_args()
+
+    model_name = args.model
+    if model_name is None:
+        first = next(iter_chunks(args.input, 1))
+        model_name = 'hourly' if 'hour' in first.columns else 'daily'
+
+    paths = dict(daily_file=args.daily_file, hourly_file=args.hourly_file, artifact_dir=args.artifacts)
+    try:
+        rows, seconds = bulk_score(args.input, args.output, model_name, args.chunksize,
+                                   args.workers, args.flat_trees, paths)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Scored {rows:,} rows with the {model_name} model in {seconds:.2f}s "
+          f"({rows / seconds if seconds else 0:,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""
+Continual learning from observed actuals
+
+Keeps the served models from going stale between notebook retrains:
+
+1. Observed rental counts are ingested into a bounded per-model training
+   buffer (training_buffer/<model>.csv, UCI feature columns + cnt), either
+   as UCI-format rows (day.csv / hour.csv columns) or as hourly observations
+   (timestamp, count and the observed weathersit / temp / hum) joined with
+   the logged predictions whose inputs match what was observed
+   (`actuals_from_log`).
+2. A background process (`run`) periodically updates each model from the
+   buffer within a time and size budget: XGBoost continues training with
+   extra boosting rounds, sklearn forests / gradient boosting are
+   warm-started with extra trees / stages. The added trees are fit on the
+   new rows plus a replay sample of the UCI history, so they do not forget
+   the seasons the buffer does not cover; existing trees are never dropped.
+3. The candidate must not be worse than the served model on the rows it was
+   updated on, and is scored on a holdout of the newest buffered rows. It is
+   published - written over the model .pkl (and re-exported when pickle-free
+   artifacts are in use) - only when it beats the served model there. The
+   app and the inference service pick it up through load_models() /
+   ModelRegistry hot reload.
+
+Usage:
+    python continual_learning.py ingest --model hourly actuals.csv     (UCI rows with cnt)
+    python continual_learning.py ingest-log observed.csv                (timestamp,count,weathersit,temp,hum)
+    python continual_learning.py update [--model daily|hourly|both]
+    python continual_learning.py run [--interval 3600]
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtest import HISTORY_FILES, TARGET_COL, load_history, regression_metrics
+from demand_state import hour_index
+from feature_pipeline import feature_matrix
+from model_artifacts import MANIFEST_NAME, export_artifacts
+from model_registry import DAILY_MODEL_FILE, HOURLY_MODEL_FILE, MODEL_ARTIFACT_DIR, MODEL_NAMES
+from prediction_cache import model_fingerprint
+from prediction_engine import DAILY_FEATURE_COLS, HOURLY_FEATURE_COLS, FeatureEncoder, model_input
+from prediction_log import PREDICTION_LOG_DIR, scan_log
+from range_forecast import is_holiday
+
+TRAINING_BUFFER_DIR = os.environ.get("RIDEWISE_TRAINING_BUFFER_DIR", "training_buffer")
+STATE_NAME = 'state.json'
+BUFFER_COLS = {'daily': DAILY_FEATURE_COLS, 'hourly': HOURLY_FEATURE_COLS}
+MODEL_FILES = {'daily': DAILY_MODEL_FILE, 'hourly': HOURLY_MODEL_FILE}
+# Wall-clock zone of the observed counts (default: the UCI data's Capital Bikeshare system)
+LOCAL_TIMEZONE = os.environ.get("RIDEWISE_TIMEZONE", "America/New_York")
+
+# Budgets per update
+MAX_BUFFER_ROWS = 200_000           # newest rows kept per model (memory bound for the update)
+MIN_NEW_ROWS = {'daily': 14, 'hourly': 168}  # new actuals needed before an update is attempted
+HOLDOUT_FRACTION = 0.2              # newest buffered rows held out for validation
+UPDATE_SECONDS = 60.0               # training time budget per model update
+REPLAY_ROWS = 5000                  # history rows replayed alongside the new rows
+EXTRA_ROUNDS = 50                   # boosting rounds / stages added per update
+ROUND_STEP = 10                     # gradient boosting stages added per warm start
+MAX_ROUNDS = 2000                   # boosted models are not grown past this
+EXTRA_TREES = 20                    # forest trees added per update (in steps of TREE_STEP)
+TREE_STEP = 5
+MAX_TREES = 500                     # forests are not grown past this
+MIN_IMPROVEMENT = 0.0               # required relative holdout RMSE reduction to publish
+
+# Observed conditions required with each count (UCI hour.csv scales) and how
+# far a logged prediction's inputs may be from them to be labelled
+OBSERVED_COLS = ['weathersit', 'temp', 'hum']
+TEMP_TOLERANCE = 2 / 41.0           # 2 degC on the normalized temp scale
+HUM_TOLERANCE = 0.10                # 10 percentage points of humidity
+
+_NS_PER_HOUR = 3_600_000_000_000
+
+
+# ============= TRAINING BUFFER =============
+
+class TrainingBuffer:
+    """Append-only CSV of labelled rows per model, compacted to the newest `max_rows`"""
+
+    def __init__(self, buffer_dir=TRAINING_BUFFER_DIR, max_rows=MAX_BUFFER_ROWS):
+        self.buffer_dir = buffer_dir
+        self.max_rows = max_rows
+
+    def path(self, name):
+        return os.path.join(self.buffer_dir, f"{name}.csv")
+
+    def append(self, name, frame):
+        """Append UCI-format rows (feature columns + cnt); returns the number of rows added"""
+        cols = BUFFER_COLS[name] + [TARGET_COL]
+        missing = [col for col in cols if col not in frame.columns]
+        if missing:
+            raise ValueError(f"Actuals for the {name} model are missing columns: {missing}")
+        rows = frame[cols].dropna()
+        if rows.empty:
+            return 0
+        rows = rows.assign(ingested_ns=time.time_ns())
+        os.makedirs(self.buffer_dir, exist_ok=True)
+        path = self.path(name)
+        rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+        self._compact(name)
+        return len(rows)
+
+    def _compact(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            lines = sum(1 for _ in f) - 1
+        if lines <= self.max_rows * 2:
+            return  # rewrite at most once per max_rows appended
+        rows = pd.read_csv(path).tail(self.max_rows)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        rows.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+    def load(self, name):
+        """The newest `max_rows` buffered rows, oldest first (empty frame when nothing was ingested)"""
+        path = self.path(name)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=BUFFER_COLS[name] + [TARGET_COL, 'ingested_ns'])
+        return pd.read_csv(path).tail(self.max_rows).reset_index(drop=True)
+
+    def read_state(self):
+        try:
+            with open(os.path.join(self.buffer_dir, STATE_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_state(self, state):
+        os.makedirs(self.buffer_dir, exist_ok=True)
+        path = os.path.join(self.buffer_dir, STATE_NAME)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+
+
+def actuals_from_log(name, observations, log_dir=PREDICTION_LOG_DIR, timezone=LOCAL_TIMEZONE):
+    """
+    Label logged predictions with what was actually observed. `observations`
+    is a DataFrame of hourly timestamp (`timezone` wall-clock time), count and
+    the observed weathersit / temp / hum on the UCI hour.csv scales.
+
+    The logged features are whatever was typed into the app, so a prediction
+    is labelled only when they describe what actually happened: it was made
+    for the hour (hourly model) or day (daily model) it was logged in, its
+    weathersit equals the observed one, its temp and hum are within
+    TEMP_TOLERANCE / HUM_TOLERANCE of the observed values, and its year,
+    holiday, working day and day type are those of that date. For the daily
+    model the day's most common weathersit and mean temp / hum are used, and
+    only days with all 24 hours observed. What-if scenarios fail the check and
+    stay unlabelled. The rows carry the features as the app encoded them for
+    serving.
+    """
+    columns = BUFFER_COLS[name]
+    missing = [col for col in ['timestamp', 'count'] + OBSERVED_COLS if col not in observations.columns]
+    if missing:
+        raise ValueError(f"Observations are missing columns: {missing}")
+    empty = pd.DataFrame(columns=columns + [TARGET_COL])
+    if len(observations) == 0:
+        return empty
+    hours = hour_index(pd.to_datetime(observations['timestamp']).to_numpy())
+    observed = pd.DataFrame({col: np.asarray(observations[col], dtype=np.float64)
+                             for col in ['count'] + OBSERVED_COLS}, index=hours).dropna()
+    observed = observed[~observed.index.duplicated(keep='last')]
+    if name == 'daily':
+        by_day = observed.groupby(observed.index // 24)
+        observed = by_day.agg({'count': 'sum', 'weathersit': lambda codes: codes.mode().iloc[0],
+                               'temp': 'mean', 'hum': 'mean'})[by_day.size() == 24]
+        unit = 24
+    else:
+        unit = 1
+    if observed.empty:
+        return empty
+
+    # Log timestamps are UTC; convert each to local wall-clock time like the
+    # observations (per timestamp, so hours either side of a DST change match).
+    # The scan is widened by a day since the UTC bounds depend on the offset.
+    first, last = int(observed.index.min()), int(observed.index.max()) + 1
+    log = scan_log(log_dir, start=(first * unit - 24) * _NS_PER_HOUR, end=(last * unit + 24) * _NS_PER_HOUR,
+                   columns=[f'feat_{col}' for col in columns], model=name)
+    if len(log['ts_ns']) == 0:
+        return empty
+    local = pd.to_datetime(log['ts_ns'], utc=True).tz_convert(timezone).tz_localize(None)
+    key = hour_index(local.to_numpy()) // unit
+    expected = observed.reindex(key)
+    feat = {col: log[f'feat_{col}'] for col in columns}
+    matched = ((feat['mnth'] == local.month.to_numpy())
+               & (feat['weathersit'] == expected['weathersit'].to_numpy())
+               & (np.abs(feat['temp'] - expected['temp'].to_numpy()) <= TEMP_TOLERANCE)
+               & (np.abs(feat['hum'] - expected['hum'].to_numpy()) <= HUM_TOLERANCE))
+    if name == 'hourly':
+        matched &= feat['hr'] == local.hour.to_numpy()
+
+    # Calendar features as FeatureEncoder derives them from the form inputs
+    days = local.normalize()
+    holiday = is_holiday(days)
+    weekend = days.dayofweek.to_numpy() >= 5
+    matched &= ((feat['yr'] == (days.year.to_numpy() >= 2012)) & (feat['holiday'] == holiday)
+                & (feat['weekday'] == ~weekend) & (feat['workingday'] == ~(weekend | holiday)))
+
+    frame = pd.DataFrame({col: feat[col][matched].astype(np.float64) for col in columns})
+    frame[TARGET_COL] = expected['count'].to_numpy()[matched]
+    return frame.drop_duplicates().reset_index(drop=True)
+
+
+# ============= MODEL UPDATES =============
+
+def _is_xgboost(model):
+    return hasattr(model, 'get_booster')
+
+
+def _update_xgboost(model, X, y, deadline):
+    """Continue boosting from the current trees for up to EXTRA_ROUNDS rounds"""
+    import xgboost as xgb
+
+    class _Deadline(xgb.callback.TrainingCallback):
+        def after_iteration(self, booster, epoch, evals_log):
+            return time.perf_counter() > deadline
+
+    rounds = model.get_booster().num_boosted_rounds()
+    extra = min(EXTRA_ROUNDS, MAX_ROUNDS - rounds)
+    if extra <= 0:
+        raise ValueError(f"model already has {rounds} boosting rounds (limit {MAX_ROUNDS}); retrain it")
+    # The native API continues the booster as-is (the sklearn wrapper re-derives
+    # settings such as base_score from the new rows)
+    params = {key: value for key, value in model.get_xgb_params().items() if value is not None}
+    booster = xgb.train(params, xgb.DMatrix(X, y), extra, xgb_model=model.get_booster(), callbacks=[_Deadline()])
+    candidate = copy.deepcopy(model)
+    candidate.load_model(bytearray(booster.save_raw('ubj')))
+    added = booster.num_boosted_rounds() - rounds
+    candidate.set_params(n_estimators=rounds + added)
+    return candidate, {'added_rounds': added}
+
+
+def _update_ensemble(model, X, y, deadline, extra, step, limit):
+    """Warm-start `extra` more trees / stages, `step` at a time until the budget runs out"""
+    size = len(model.estimators_)
+    extra = min(extra, limit - size)
+    if extra <= 0:
+        raise ValueError(f"model already has {size} estimators (limit {limit}); retrain it")
+    candidate = copy.deepcopy(model)
+    candidate.set_params(warm_start=True)
+    added = 0
+    while added < extra and time.perf_counter() < deadline:
+        added = min(added + step, extra)
+        candidate.set_params(n_estimators=size + added)
+        candidate.fit(X, y)
+    candidate.set_params(n_estimators=len(candidate.estimators_), warm_start=False)
+    return candidate, {'added_trees': len(candidate.estimators_) - size}
+
+
+def update_model(model, X, y, budget_seconds=UPDATE_SECONDS):
+    """Incrementally updated copy of `model` -> (candidate, info); the served model is not touched"""
+    from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+
+    deadline = time.perf_counter() + budget_seconds
+    if _is_xgboost(model):
+        return _update_xgboost(model, X, y, deadline)
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        return _update_ensemble(model, X, y, deadline, EXTRA_TREES, TREE_STEP, MAX_TREES)
+    if isinstance(model, GradientBoostingRegressor):
+        return _update_ensemble(model, X, y, deadline, EXTRA_ROUNDS, ROUND_STEP, MAX_ROUNDS)
+    raise ValueError(f"{type(model).__name__} cannot be updated incrementally")
+
+
+def replay_sample(name, history_path=None, rows=REPLAY_ROWS, seed=0):
+    """Random UCI history rows (feature columns + cnt) to train alongside the new rows; empty without history"""
+    columns = BUFFER_COLS[name] + [TARGET_COL]
+    history_path = history_path or HISTORY_FILES[name]
+    if not os.path.exists(history_path):
+        return pd.DataFrame(columns=columns)
+    history = load_history(history_path, BUFFER_COLS[name])[columns].dropna()
+    if len(history) > rows:
+        history = history.sample(rows, random_state=seed)
+    return history.reset_index(drop=True)
+
+
+def evaluate(model, feature_cols, X, y):
+    """Holdout metrics with predictions clipped at zero, as served"""
+    pred = np.maximum(np.asarray(model.predict(model_input(model, X, feature_cols)), dtype=np.float64), 0)
+    return regression_metrics(y, pred)
+
+
+# ============= PUBLISHING =============
+
+def publish(name, model, model_files=None, artifact_dir=MODEL_ARTIFACT_DIR):
+    """
+    Atomically replace the model file (the previous one is kept as
+    <file>.previous) and refresh pickle-free artifacts if they are in use.
+    Returns the new model version.
+    """
+    model_files = dict(MODEL_FILES, **(model_files or {}))
+    path = model_files[name]
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(model, f)
+    if os.path.exists(path):
+        shutil.copy2(path, f"{path}.previous")
+    os.replace(tmp, path)
+
+    if os.path.exists(os.path.join(artifact_dir, MANIFEST_NAME)):
+        models = {}
+        for other in MODEL_NAMES:
+            with open(model_files[other], 'rb') as f:
+                models[other] = pickle.load(f)
+        export_artifacts(models, artifact_dir, source_files=model_files)
+    return model_fingerprint(path)
+
+
+def update(name, buffer, model_files=None, artifact_dir=MODEL_ARTIFACT_DIR, budget_seconds=UPDATE_SECONDS,
+           min_new_rows=None, force=False, history_path=None):
+    """
+    One update cycle for one model: update from the buffered actuals (plus a
+    replay sample of `history_path`), check the candidate against the served
+    model on those rows and on the holdout and publish only on improvement.
+    Returns a JSON-serializable result (also stored in the buffer's state file).
+    """
+    start = time.perf_counter()
+    state = buffer.read_state()
+    last = state.get(name, {})
+    rows = buffer.load(name)
+    new_rows = int((rows['ingested_ns'] > last.get('trained_through_ns', 0)).sum()) if len(rows) else 0
+    min_new_rows = MIN_NEW_ROWS[name] if min_new_rows is None else min_new_rows
+    result = {'model': name, 'time': datetime.now().isoformat(timespec='seconds'),
+              'buffered_rows': int(len(rows)), 'new_rows': new_rows}
+    if new_rows < min_new_rows and not force:
+        return dict(result, status='skipped', reason=f"{new_rows} new rows (< {min_new_rows})")
+
+    model_file = dict(MODEL_FILES, **(model_files or {}))[name]
+    with open(model_file, 'rb') as f:
+        model = pickle.load(f)
+    columns = BUFFER_COLS[name]
+    feature_cols = FeatureEncoder.for_model(model, columns).feature_cols
+    n_holdout = max(1, int(np.ceil(len(rows) * HOLDOUT_FRACTION)))
+    if len(rows) - n_holdout < 1:
+        return dict(result, status='skipped', reason="not enough rows for a holdout split")
+    holdout = rows.iloc[len(rows) - n_holdout:]
+    train = pd.concat([rows.iloc[:len(rows) - n_holdout][columns + [TARGET_COL]], replay_sample(name, history_path)],
+                      ignore_index=True)
+    X = feature_matrix({col: train[col] for col in columns}, feature_cols)
+    y = train[TARGET_COL].to_numpy(dtype=np.float64)
+    X_holdout = feature_matrix({col: holdout[col] for col in columns}, feature_cols)
+    y_holdout = holdout[TARGET_COL].to_numpy(dtype=np.float64)
+
+    try:
+        candidate, info = update_model(model, model_input(model, X, feature_cols), y, budget_seconds)
+    except ValueError as e:
+        result.update(status='failed', reason=str(e))
+    else:
+        # A correct update never fits its own training rows worse than the served model
+        fit_before = evaluate(model, feature_cols, X, y)
+        fit_after = evaluate(candidate, feature_cols, X, y)
+        before = evaluate(model, feature_cols, X_holdout, y_holdout)
+        after = evaluate(candidate, feature_cols, X_holdout, y_holdout)
+        result.update(info, update_rows=len(train), holdout_rows=n_holdout,
+                      train_rmse_before=fit_before['rmse'], train_rmse_after=fit_after['rmse'],
+                      rmse_before=before['rmse'], rmse_after=after['rmse'])
+        if fit_after['rmse'] > fit_before['rmse']:
+            result.update(status='rejected', reason="candidate fits the update rows worse than the served model")
+        elif after['rmse'] < before['rmse'] * (1 - MIN_IMPROVEMENT):
+            result.update(status='published', model_version=publish(name, candidate, model_files, artifact_dir))
+        else:
+            result.update(status='rejected')
+    result['seconds'] = time.perf_counter() - start
+
+    # Rows seen by this cycle are not "new" for the next one, whatever the outcome
+    state[name] = dict(result, trained_through_ns=int(rows['ingested_ns'].max()))
+    buffer.write_state(state)
+    return result
+
+
+def run(buffer, names=MODEL_NAMES, interval=3600.0, **kwargs):
+    """Background loop: one update cycle per model every `interval` seconds"""
+    while True:
+        for name in names:
+            try:
+                result = update(name, buffer, **kwargs)
+            except Exception as e:
+                result = {'model': name, 'status': 'failed', 'reason': str(e)}
+            _print_result(result)
+        time.sleep(interval)
+
+
+def _print_result(result):
+    status = result['status']
+    icon = {'published': "✅", 'rejected': "↩️", 'skipped': "⏭️"}.get(status, "❌")
+    line = f"{icon} {result['model']}: {status}"
+    if 'rmse_before' in result:
+        line += f" (holdout RMSE {result['rmse_before']:.1f} -> {result['rmse_after']:.1f})"
+    if result.get('reason'):
+        line += f" - {result['reason']}"
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the RideWise models from observed actuals")
+    parser.add_argument("--buffer-dir", default=TRAINING_BUFFER_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("ingest", help="add UCI-format rows (feature columns + cnt)")
+    p.add_argument("--model", choices=list(MODEL_NAMES), required=True)
+    p.add_argument("file")
+    p = sub.add_parser("ingest-log", help="label logged predictions with hourly observations "
+                                          "(timestamp,count,weathersit,temp,hum)")
+    p.add_argument("file")
+    p.add_argument("--log-dir", default=PREDICTION_LOG_DIR or None, required=not PREDICTION_LOG_DIR,
+                   help="prediction log directory (default: RIDEWISE_PREDICTION_LOG_DIR)")
+    p.add_argument("--timezone", default=LOCAL_TIMEZONE,
+                   help="zone of the observation timestamps (default: RIDEWISE_TIMEZONE)")
+    for command in ("update", "run"):
+        p = sub.add_parser(command)
+        p.add_argument("--model", choices=["daily", "hourly", "both"], default="both")
+        p.add_argument("--budget", type=float, default=UPDATE_SECONDS, help="training seconds per model update")
+        if command == "update":
+            p.add_argument("--force", action="store_true", help="update even with few new rows")
+        else:
+            p.add_argument("--interval", type=float,
+                           default=float(os.environ.get("RIDEWISE_UPDATE_INTERVAL_SECONDS", "3600")))
+    args = parser.parse_args()
+
+    buffer = TrainingBuffer(args.buffer_dir)
+    if args.command == "ingest":
+        added = buffer.append(args.model, pd.read_csv(args.file))
+        print(f"✅ {args.model}: {added:,} rows buffered")
+    elif args.command == "ingest-log":
+        observations = pd.read_csv(args.file)
+        for name in MODEL_NAMES:
+            added = buffer.append(name, actuals_from_log(name, observations, args.log_dir, args.timezone))
+            print(f"✅ {name}: {added:,} logged predictions labelled")
+    else:
+        names = MODEL_NAMES if args.model == "both" else (args.model,)
+        if args.command == "update":
+            for name in names:
+                _print_result(update(name, buffer, budget_seconds=args.budget, force=args.force))
+        else:
+            try:
+                run(buffer, names, args.interval, budget_seconds=args.budget)
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main()
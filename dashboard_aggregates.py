@@ -0,0 +1,203 @@
+"""
+Incremental aggregates behind the home dashboard
+
+DemandAggregates keeps running sums and counts of demand per fixed set of
+bins (weekday, weather, hour of day, temperature band, year). It is seeded
+once from day.csv / hour.csv with bincount and then updated in O(1) per
+live prediction - nothing is ever rescanned. Predictions from earlier runs
+are replayed from the prediction log at startup. Every read is over a fixed
+number of bins, so rendering the dashboard costs the same whatever the
+history size.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+from backtest import HISTORY_FILES, TARGET_COL
+from prediction_log import MODEL_CODES, PREDICTION_LOG_DIR, scan_log
+
+WEEKDAY_LABELS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']  # UCI weekday: 0 = Sunday
+WEATHER_LABELS = {1: 'Clear', 2: 'Cloudy', 3: 'Rain', 4: 'Snow'}
+TEMP_BAND_C = 5
+TEMP_MIN_C = -10
+TEMP_DENORM_C = 41.0  # UCI temp is °C / 41 (see FeatureEncoder)
+# Temperature bands with fewer records than this are too thin to call "optimal"
+MIN_BAND_COUNT = 10
+
+# (kind, dimension) -> number of bins
+BINS = {
+    ('daily', 'weekday'): 7,
+    ('daily', 'weather'): 5,
+    ('daily', 'temp_band'): 12,
+    ('daily', 'year'): 2,
+    ('hourly', 'hour'): 24,
+    ('hourly', 'weather'): 5,
+}
+
+
+def temp_band(temperature_c):
+    """5°C band index for a temperature (vectorized)"""
+    band = np.floor((np.asarray(temperature_c, dtype=np.float64) - TEMP_MIN_C) / TEMP_BAND_C)
+    return np.clip(band, 0, BINS[('daily', 'temp_band')] - 1).astype(np.int64)
+
+
+def weekday_bin(timestamps_ns, is_weekday):
+    """
+    UCI weekday (0 = Sunday) of the local day each daily prediction was made
+    on, where that day is of the type chosen in the form (Weekday/Weekend);
+    -1 otherwise - the form has no day of week, so a what-if for the other
+    kind of day has no weekday bin (vectorized)
+    """
+    local = pd.to_datetime(np.asarray(timestamps_ns, dtype=np.int64), utc=True).tz_convert(tzlocal())
+    weekday = (local.dayofweek.to_numpy() + 1) % 7  # pandas: 0 = Monday
+    matches = ((weekday >= 1) & (weekday <= 5)) == np.asarray(is_weekday, dtype=bool)
+    return np.where(matches, weekday, -1)
+
+
+def year_bin(year):
+    """UCI yr bin of a calendar year, as FeatureEncoder encodes it (vectorized)"""
+    return (np.asarray(year) >= 2012).astype(np.int64)
+
+
+class DemandAggregates:
+    """Running sums/counts per bin plus per-kind totals; thread-safe, shared by all sessions"""
+
+    def __init__(self):
+        self._sums = {key: np.zeros(size) for key, size in BINS.items()}
+        self._counts = {key: np.zeros(size, dtype=np.int64) for key, size in BINS.items()}
+        self._totals = {'daily': [0.0, 0], 'hourly': [0.0, 0]}
+        self.live_records = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind, value, live=True, **bins):
+        """One record, e.g. add('hourly', 312, hour=8, weather=1); None / -1 bins are skipped. O(1)."""
+        with self._lock:
+            total = self._totals[kind]
+            total[0] += value
+            total[1] += 1
+            for dim, index in bins.items():
+                if index is None or index < 0:
+                    continue
+                self._sums[(kind, dim)][index] += value
+                self._counts[(kind, dim)][index] += 1
+            if live:
+                self.live_records += 1
+
+    def add_many(self, kind, values, live=False, **bins):
+        """Vectorized seed (history / logged predictions) - bincount per dimension, same result as add() per row"""
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            self._totals[kind][0] += float(values.sum())
+            self._totals[kind][1] += len(values)
+            if live:
+                self.live_records += len(values)
+            for dim, index in bins.items():
+                size = BINS[(kind, dim)]
+                index = np.asarray(index, dtype=np.int64)
+                keep = index >= 0
+                self._sums[(kind, dim)] += np.bincount(index[keep], weights=values[keep], minlength=size)[:size]
+                self._counts[(kind, dim)] += np.bincount(index[keep], minlength=size)[:size]
+
+    def means(self, kind, dim):
+        """Mean demand per bin (NaN for empty bins)"""
+        with self._lock:
+            sums, counts = self._sums[(kind, dim)].copy(), self._counts[(kind, dim)].copy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / counts
+
+    def counts(self, kind, dim):
+        with self._lock:
+            return self._counts[(kind, dim)].copy()
+
+    def mean(self, kind):
+        with self._lock:
+            total, count = self._totals[kind]
+        return total / count if count else None
+
+    def count(self, kind):
+        with self._lock:
+            return self._totals[kind][1]
+
+
+def seed_from_history(aggregates, day_file=HISTORY_FILES['daily'], hour_file=HISTORY_FILES['hourly']):
+    """One vectorized pass over each history file at startup; missing files are skipped"""
+    try:
+        day = pd.read_csv(day_file, usecols=['weekday', 'weathersit', 'temp', 'yr', TARGET_COL])
+        aggregates.add_many('daily', day[TARGET_COL], weekday=day['weekday'], weather=day['weathersit'],
+                            temp_band=temp_band(day['temp'] * TEMP_DENORM_C), year=day['yr'])
+    except (OSError, ValueError):
+        pass
+    try:
+        hour = pd.read_csv(hour_file, usecols=['hr', 'weathersit', TARGET_COL])
+        aggregates.add_many('hourly', hour[TARGET_COL], hour=hour['hr'], weather=hour['weathersit'])
+    except (OSError, ValueError):
+        pass
+    return aggregates
+
+
+def seed_from_log(aggregates, log_dir=PREDICTION_LOG_DIR):
+    """Replay predictions logged by earlier runs (prediction_log.py) as live records"""
+    try:
+        logged = scan_log(log_dir, columns=['model', 'output', 'weather', 'temperature', 'hour', 'weekday', 'year'])
+    except (OSError, ValueError):
+        return aggregates
+    prediction = np.maximum(np.floor(logged['output']), 0)  # as shown in the app
+    daily = logged['model'] == MODEL_CODES['daily']
+    hourly = (logged['model'] == MODEL_CODES['hourly']) & (logged['hour'] >= 0)
+    if daily.any():
+        aggregates.add_many('daily', prediction[daily], live=True,
+                            weekday=weekday_bin(logged['ts_ns'][daily], logged['weekday'][daily]),
+                            weather=logged['weather'][daily], temp_band=temp_band(logged['temperature'][daily]),
+                            year=year_bin(logged['year'][daily]))
+    if hourly.any():
+        aggregates.add_many('hourly', prediction[hourly], live=True, hour=logged['hour'][hourly],
+                            weather=logged['weather'][hourly])
+    return aggregates
+
+
+def hour_label(hour):
+    """12-hour clock label, e.g. 18 -> '6 PM'"""
+    hour %= 24
+    return f"{hour % 12 or 12} {'AM' if hour < 12 else 'PM'}"
+
+
+def _best(means, labels):
+    if np.all(np.isnan(means)):
+        return None
+    return labels[int(np.nanargmax(means))]
+
+
+def dashboard_snapshot(aggregates):
+    """Everything home_page() shows, from fixed-size reads only"""
+    weekday = aggregates.means('daily', 'weekday')
+    daily_weather = aggregates.means('daily', 'weather')
+    hourly = aggregates.means('hourly', 'hour')
+    temps = np.where(aggregates.counts('daily', 'temp_band') >= MIN_BAND_COUNT,
+                     aggregates.means('daily', 'temp_band'), np.nan)
+    years = aggregates.means('daily', 'year')
+
+    # Mon..Sun order for the chart
+    week_order = [1, 2, 3, 4, 5, 6, 0]
+    peak_hour = None if np.all(np.isnan(hourly)) else int(np.nanargmax(hourly))
+    best_band = None if np.all(np.isnan(temps)) else int(np.nanargmax(temps))
+    growth = None
+    if not np.any(np.isnan(years)) and years[0] > 0:
+        growth = float((years[1] - years[0]) / years[0] * 100)
+
+    return {
+        'daily_mean': aggregates.mean('daily'),
+        'hourly_mean': aggregates.mean('hourly'),
+        'live_records': aggregates.live_records,
+        'weekly': ([WEEKDAY_LABELS[d] for d in week_order], weekday[week_order].tolist()),
+        'weather': ([WEATHER_LABELS[w] for w in range(1, 5)], daily_weather[1:5].tolist()),
+        'hourly': (list(range(24)), hourly.tolist()),
+        'peak_hour': peak_hour,
+        'best_day': _best(weekday, ['Sunday', 'Monday', 'Tuesday', 'Wednesday',
+                                    'Thursday', 'Friday', 'Saturday']),
+        'best_weather': _best(daily_weather[1:], [WEATHER_LABELS[w] for w in range(1, 5)]),
+        'optimal_temp': None if best_band is None else (TEMP_MIN_C + best_band * TEMP_BAND_C,
+                                                        TEMP_MIN_C + (best_band + 1) * TEMP_BAND_C),
+        'growth_yoy': growth,
+    }
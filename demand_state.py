@@ -0,0 +1,151 @@
+"""
+Streaming recent-demand state
+
+Per-key (city / station) rolling store of observed hourly rental counts in
+one fixed-size NumPy ring buffer per key (a row of a 2-D array). Slots are
+addressed by absolute hour (hour % window), so an observation is one array
+write and the lag / rolling-window features for any set of keys are one
+fancy-indexing gather - production can serve lag-feature models without
+querying the history on every request.
+
+    state = DemandState()
+    state.observe('dc', '2024-06-01 08:00', 412)
+    state.features(['dc'], at=['2024-06-01 09:00'])   # lag_1 = 412, ...
+
+Hours with no observation are NaN; rolling means skip them.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backtest import HOUR_FILE, TARGET_COL
+
+DEFAULT_KEY = 'dc'  # the UCI history is Washington DC's system-wide count
+LAGS = (1, 2, 3, 24, 168)
+WINDOWS = (3, 24, 168)
+STATE_WINDOW = 168  # hours kept per key (one week)
+
+_NS_PER_HOUR = 3_600_000_000_000
+
+
+def hour_index(timestamps):
+    """Hours since the epoch for timestamps (str / datetime / array-like); ints pass through"""
+    values = np.asarray(timestamps)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+    try:
+        parsed = pd.to_datetime(values.ravel())
+    except ValueError:
+        parsed = pd.to_datetime(values.ravel(), format='mixed')  # formats differ between rows
+    return parsed.values.astype('datetime64[ns]').astype(np.int64).reshape(values.shape) // _NS_PER_HOUR
+
+
+def feature_names(lags=LAGS, windows=WINDOWS):
+    return [f'lag_{lag}' for lag in lags] + [f'rolling_mean_{window}' for window in windows]
+
+
+class DemandState:
+    """Ring buffer of the last `window` hourly counts per key; thread-safe"""
+
+    def __init__(self, window=STATE_WINDOW, initial_keys=16):
+        self.window = window
+        self._buffer = np.full((initial_keys, window), np.nan)
+        self._latest = np.full(initial_keys, np.iinfo(np.int64).min, dtype=np.int64)  # newest hour per key
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.observations = 0
+        self.stale = 0  # observations older than the window, ignored
+
+    def _row(self, key):
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._buffer):
+                # Double the key capacity; amortized O(1) per new key
+                self._buffer = np.vstack([self._buffer, np.full_like(self._buffer, np.nan)])
+                self._latest = np.concatenate([self._latest, np.full_like(self._latest, np.iinfo(np.int64).min)])
+            self._rows[key] = row
+        return row
+
+    def observe(self, key, timestamp, count):
+        """Record the observed count for one key and hour. O(1) (gap clearing is bounded by the window)."""
+        hour = int(timestamp) if isinstance(timestamp, (int, np.integer)) else int(hour_index(timestamp))
+        with self._lock:
+            row = self._row(key)
+            latest = self._latest[row]
+            if latest != np.iinfo(np.int64).min and hour <= latest - self.window:
+                self.stale += 1
+                return False
+            if hour > latest:
+                # Hours skipped since the newest observation are unknown, not last week's values
+                gap = min(hour - latest - 1, self.window) if latest != np.iinfo(np.int64).min else 0
+                if gap:
+                    self._buffer[row, (latest + 1 + np.arange(gap)) % self.window] = np.nan
+                self._latest[row] = hour
+            self._buffer[row, hour % self.window] = count
+            self.observations += 1
+            return True
+
+    def observe_many(self, keys, timestamps, counts):
+        """Replay a batch of observations (e.g. history) in time order"""
+        hours = hour_index(timestamps)
+        order = np.argsort(hours, kind='stable')
+        keys = np.asarray(keys)
+        counts = np.asarray(counts, dtype=np.float64)
+        for i in order:
+            self.observe(keys[i], int(hours[i]), counts[i])
+
+    def features(self, keys, at=None, lags=LAGS, windows=WINDOWS):
+        """
+        {feature: array} for each key at hour `at` (default: the hour after the
+        key's newest observation). lag_k is the count k hours before `at`;
+        rolling_mean_w the mean of the w hours before `at`. Unknown keys or
+        hours outside the window give NaN.
+        """
+        n = len(keys)
+        span = max(max(lags, default=0), max(windows, default=0))
+        if span > self.window:
+            raise ValueError(f"Features need {span} hours but the state keeps {self.window}")
+
+        with self._lock:
+            rows = np.array([self._rows.get(key, -1) for key in keys], dtype=np.int64)
+            known = rows >= 0
+            latest = np.where(known, self._latest[np.maximum(rows, 0)], 0)
+            at_hours = latest + 1 if at is None else np.broadcast_to(hour_index(at), (n,)).astype(np.int64)
+            # hours at-span .. at-1, oldest first
+            hours = at_hours[:, None] - np.arange(span, 0, -1)[None, :]
+            recent = self._buffer[np.maximum(rows, 0)[:, None], hours % self.window]
+
+        valid = known[:, None] & (hours <= latest[:, None]) & (hours > latest[:, None] - self.window)
+        recent = np.where(valid, recent, np.nan)
+
+        out = {f'lag_{lag}': recent[:, span - lag] for lag in lags}
+        with np.errstate(invalid='ignore'):
+            for window in windows:
+                block = recent[:, span - window:]
+                counts = np.sum(~np.isnan(block), axis=1)
+                sums = np.nansum(block, axis=1)
+                out[f'rolling_mean_{window}'] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return out
+
+    def keys(self):
+        with self._lock:
+            return list(self._rows)
+
+    def stats(self):
+        with self._lock:
+            return {'keys': len(self._rows), 'window_hours': self.window,
+                    'observations': self.observations, 'stale': self.stale}
+
+
+def seed_from_history(state, hour_file=HOUR_FILE, key=DEFAULT_KEY, hours=STATE_WINDOW):
+    """Load the last `hours` hours of hour.csv (dteday + hr -> cnt) into the state; skipped when missing"""
+    try:
+        history = pd.read_csv(hour_file, usecols=['dteday', 'hr', TARGET_COL])
+    except (OSError, ValueError):
+        return state
+    history = history.tail(hours)
+    timestamps = pd.to_datetime(history['dteday']) + pd.to_timedelta(history['hr'], unit='h')
+    state.observe_many(np.full(len(history), key, dtype=object), timestamps.values, history[TARGET_COL].to_numpy())
+    return state
@@ -0,0 +1,139 @@
+"""
+Vectorized feature pipeline
+
+The engineered features from the feature-engineering notebook
+(Gyanvi_feature_eng_18-12-25.ipynb: encode_cyclical, time_of_day,
+is_weekend, business_hours, the interactions and
+BikeDemandPredictor.create_real_time_features) as column-wise NumPy
+transforms over the UCI training columns (season, yr, mnth, hr, holiday,
+weekday, workingday, weathersit, temp, atemp, hum, windspeed).
+
+The same functions serve training (add_features on a history DataFrame) and
+the app (FeatureEncoder builds any engineered columns a model was fitted on
+from its encoded base columns), so engineered-feature models are scored in
+batches without a per-row Python loop.
+
+NOTE: definitions follow the notebook exactly, including is_weekend as
+weekday >= 5 on the UCI weekday code (0 = Sunday). The app's forms only know
+"Weekday"/"Weekend", which FeatureEncoder encodes as weekday 1/0.
+"""
+import numpy as np
+
+PEAK_HOURS = (7, 8, 9, 17, 18, 19)
+BUSINESS_HOURS = (8, 18)  # inclusive, working days only
+# pd.cut(hr, bins=[0, 6, 12, 18, 24], include_lowest=True) -> code
+TIME_OF_DAY_LABELS = ['Night', 'Morning', 'Afternoon', 'Evening']
+TIME_OF_DAY_EDGES = np.array([6, 12, 18])
+
+# Recent demand: lag_1 is the most recent hour. Without lags the notebook's
+# real-time defaults apply (100 bikes, flat trend).
+LAG_INPUTS = ['lag_1', 'lag_2', 'lag_3']
+RECENT_MEAN_DEFAULT = 0.1
+DEMAND_SCALE = 1000.0
+# Recent-demand columns a model can be fitted on directly; at serving time
+# they come from the rolling state in demand_state.py, not from the form
+STATE_FEATURES = ['lag_1', 'lag_2', 'lag_3', 'lag_24', 'lag_168',
+                  'rolling_mean_3', 'rolling_mean_24', 'rolling_mean_168']
+
+
+def _recent_mean(c):
+    if all(lag in c for lag in LAG_INPUTS):
+        return (c['lag_1'] + c['lag_2'] + c['lag_3']) / 3 / DEMAND_SCALE
+    return RECENT_MEAN_DEFAULT
+
+
+def _demand_trend(c):
+    if all(lag in c for lag in LAG_INPUTS):
+        return (c['lag_1'] - c['lag_3']) / DEMAND_SCALE
+    return 0.0
+
+
+# Engineered feature -> (base columns it needs, column-wise transform)
+ENGINEERED_FEATURES = {
+    'hr_sin': (('hr',), lambda c: np.sin(2 * np.pi * c['hr'] / 24)),
+    'hr_cos': (('hr',), lambda c: np.cos(2 * np.pi * c['hr'] / 24)),
+    'weekday_sin': (('weekday',), lambda c: np.sin(2 * np.pi * c['weekday'] / 7)),
+    'weekday_cos': (('weekday',), lambda c: np.cos(2 * np.pi * c['weekday'] / 7)),
+    'mnth_sin': (('mnth',), lambda c: np.sin(2 * np.pi * c['mnth'] / 12)),
+    'mnth_cos': (('mnth',), lambda c: np.cos(2 * np.pi * c['mnth'] / 12)),
+    'time_of_day': (('hr',), lambda c: np.searchsorted(TIME_OF_DAY_EDGES, c['hr'], side='left')),
+    'is_weekend': (('weekday',), lambda c: c['weekday'] >= 5),
+    'business_hours': (('hr', 'workingday'), lambda c: (c['hr'] >= BUSINESS_HOURS[0]) &
+                       (c['hr'] <= BUSINESS_HOURS[1]) & (c['workingday'] == 1)),
+    'peak_hour': (('hr',), lambda c: np.isin(c['hr'], PEAK_HOURS)),
+    'hour_weekday_interaction': (('hr', 'weekday'), lambda c: c['hr'] * c['weekday']),
+    'season_hr_interaction': (('season', 'hr'), lambda c: c['season'] * c['hr']),
+    # Recent demand (lag_1..lag_3 when given, else the real-time defaults)
+    'recent_mean': ((), _recent_mean),
+    'demand_trend': ((), _demand_trend),
+}
+# Stored as integers by add_features, as in the notebook
+INTEGER_FEATURES = {'time_of_day', 'is_weekend', 'business_hours', 'peak_hour',
+                    'hour_weekday_interaction', 'season_hr_interaction'}
+
+
+def required_columns(feature_cols):
+    """Base columns needed to build `feature_cols`"""
+    needed = []
+    for col in feature_cols:
+        for base in ENGINEERED_FEATURES[col][0] if col in ENGINEERED_FEATURES else (col,):
+            if base not in needed:
+                needed.append(base)
+    return needed
+
+
+def _as_columns(columns):
+    """Mapping of name -> float64 NumPy column (DataFrame, dict of arrays or scalars)"""
+    return {col: np.asarray(values, dtype=np.float64) for col, values in columns.items()}
+
+
+def feature_matrix(columns, feature_cols, out=None, dtype=np.float64):
+    """
+    (n_rows, len(feature_cols)) matrix from base columns: base features are
+    copied, engineered ones computed column-wise, written into `out` when given
+    """
+    columns = _as_columns(columns)
+    n_rows = max((values.shape[0] for values in columns.values() if values.ndim > 0), default=1)
+    if out is None:
+        out = np.empty((n_rows, len(feature_cols)), dtype=dtype)
+    elif out.shape != (n_rows, len(feature_cols)):
+        raise ValueError(f"Output buffer shape {out.shape} does not match {n_rows} rows")
+
+    for j, col in enumerate(feature_cols):
+        if col in columns:
+            out[:, j] = columns[col]
+        elif col in ENGINEERED_FEATURES:
+            missing = [base for base in ENGINEERED_FEATURES[col][0] if base not in columns]
+            if missing:
+                raise KeyError(f"{col} needs columns {missing}")
+            out[:, j] = ENGINEERED_FEATURES[col][1](columns)
+        elif col in STATE_FEATURES:
+            raise KeyError(f"{col} must be supplied from the recent-demand state")
+        else:
+            raise KeyError(f"Unknown feature column: {col}")
+    return out
+
+
+def add_features(frame, names=None):
+    """
+    Copy of a training/history DataFrame with engineered columns appended -
+    the notebook's feature step. By default every feature its columns allow
+    (recent-demand features only when lag_1..lag_3 are present).
+    """
+    if names is None:
+        has_lags = all(lag in frame.columns for lag in LAG_INPUTS)
+        names = [name for name, (needs, _) in ENGINEERED_FEATURES.items()
+                 if (all(col in frame.columns for col in needs) if needs else has_lags)]
+    out = frame.copy()
+    if not names:
+        return out
+    wanted = set(required_columns(names)) | set(STATE_FEATURES)
+    values = feature_matrix({col: frame[col] for col in frame.columns if col in wanted}, names)
+    for j, name in enumerate(names):
+        out[name] = values[:, j].astype(np.int64) if name in INTEGER_FEATURES else values[:, j]
+    return out
+
+
+def time_of_day_label(code):
+    """Notebook label for a time_of_day code"""
+    return TIME_OF_DAY_LABELS[int(code)]
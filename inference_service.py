@@ -0,0 +1,315 @@
+"""
+Headless HTTP inference service
+
+Serves the same models and feature encoding as the Streamlit app, using
+only the standard library HTTP server - no Streamlit, Plotly, pdfplumber or
+OpenAI imports, so it starts fast and stays small.
+
+    POST /predict/daily    one JSON object or a JSON array of objects
+    POST /predict/hourly   (fields as in the app's input form, see DAILY/HOURLY_INPUT_COLS)
+    POST /observe          observed hourly counts {"key": "dc", "timestamp": ..., "count": ...}
+                           (object or array) for the recent-demand state
+    GET  /health           200 when the models are loaded and warmed up, else 503
+    GET  /stats            latency percentiles, cache and model registry stats
+
+Models fitted on lag / rolling-mean columns (feature_pipeline.STATE_FEATURES)
+get them from the recent-demand state (demand_state.py), seeded from hour.csv
+at startup; such rows may carry "key" (default "dc") and "timestamp" (default:
+the hour after the key's latest observation).
+
+Usage:
+    python inference_service.py [--host 0.0.0.0] [--port 8080] [--flat-trees]
+                                [--batch-wait-ms 2] [--max-batch 256]
+
+Example:
+    curl -X POST localhost:8080/predict/hourly -d '{"season": "Summer", "weather": "Clear",
+         "temperature": 25, "humidity": 50, "wind_speed": 10, "year": 2024, "month": 6,
+         "hour": 8, "holiday": "No", "working_day": "Yes", "day_type": "Weekday"}'
+"""
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from demand_state import DEFAULT_KEY, DemandState, hour_index, seed_from_history
+from latency_stats import LatencyRecorder
+from micro_batcher import MicroBatcher
+from model_readiness import ReadinessState
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, predict_cached
+from prediction_engine import DAILY_INPUT_COLS, HOURLY_INPUT_COLS
+
+MAX_BODY_BYTES = 1 << 20
+MAX_ROWS = 10_000
+
+# Inputs that are numbers; everything else is a label as in the app's selectboxes
+NUMERIC_INPUTS = {'temperature', 'humidity', 'wind_speed', 'year', 'month', 'hour'}
+INPUT_COLS = {'daily': DAILY_INPUT_COLS, 'hourly': HOURLY_INPUT_COLS}
+
+
+class RequestError(Exception):
+    """Client error, reported as HTTP 4xx with a JSON message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_rows(payload, input_cols):
+    """
+    Validate a single object or an array of objects and transpose it into
+    {column: list} for the batch encoder. Returns (columns, was_single).
+    """
+    single = isinstance(payload, dict)
+    rows = [payload] if single else payload
+    if not isinstance(rows, list) or not rows:
+        raise RequestError(400, "Body must be a JSON object or a non-empty array of objects")
+    if len(rows) > MAX_ROWS:
+        raise RequestError(413, f"At most {MAX_ROWS} rows per request")
+
+    columns = {col: [] for col in input_cols}
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise RequestError(400, f"Row {i} is not an object")
+        missing = [col for col in input_cols if col not in row]
+        if missing:
+            raise RequestError(400, f"Row {i} is missing fields: {missing}")
+        for col in input_cols:
+            value = row[col]
+            if col in NUMERIC_INPUTS:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise RequestError(400, f"Row {i}: '{col}' must be a number")
+            elif not isinstance(value, str):
+                raise RequestError(400, f"Row {i}: '{col}' must be a string")
+            columns[col].append(value)
+    return columns, single
+
+
+def _hours(timestamps):
+    try:
+        return hour_index(timestamps)
+    except (ValueError, TypeError, OverflowError):
+        raise RequestError(400, "Could not parse 'timestamp' values")
+
+
+def parse_observations(payload):
+    """Validate observed counts (object or array) -> (keys, hours, counts)"""
+    rows = [payload] if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not rows:
+        raise RequestError(400, "Body must be a JSON object or a non-empty array of objects")
+    if len(rows) > MAX_ROWS:
+        raise RequestError(413, f"At most {MAX_ROWS} rows per request")
+    keys, timestamps, counts = [], [], []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise RequestError(400, f"Row {i} is not an object")
+        count = row.get('count')
+        if isinstance(count, bool) or not isinstance(count, (int, float)) or count < 0:
+            raise RequestError(400, f"Row {i}: 'count' must be a non-negative number")
+        if not isinstance(row.get('timestamp'), str):
+            raise RequestError(400, f"Row {i}: 'timestamp' must be a date-time string")
+        keys.append(str(row.get('key', DEFAULT_KEY)))
+        timestamps.append(row['timestamp'])
+        counts.append(count)
+    return keys, _hours(timestamps), counts
+
+
+def state_columns(state, payload, state_cols):
+    """Recent-demand columns for each request row, from the rolling state (NaN where unknown)"""
+    rows = [payload] if isinstance(payload, dict) else payload
+    keys = [str(row.get('key', DEFAULT_KEY)) for row in rows]
+    at = [row.get('timestamp') for row in rows]
+    if all(value is None for value in at):
+        at = None  # the hour after each key's latest observation
+    elif any(value is None for value in at):
+        raise RequestError(400, "Give 'timestamp' on every row or on none")
+    else:
+        at = _hours(at)
+    features = state.features(keys, at=at)
+    return {col: features[col] for col in state_cols}
+
+
+class InferenceService:
+    """Model registry + prediction cache + latency stats shared by all request threads"""
+
+    def __init__(self, use_flat_trees=False, poll_interval=5.0, ready_file=None,
+                 batch_wait_ms=0.0, max_batch_size=256):
+        # Coalesce concurrent requests into one predict per model (off when batch_wait_ms <= 0)
+        self.batcher = MicroBatcher(max_batch_size, batch_wait_ms) if batch_wait_ms > 0 else None
+        self.cache = PredictionCache(maxsize=65536, ttl=6 * 3600)
+        self.latency = LatencyRecorder(window=8192)
+        self.readiness = ReadinessState(ready_file=ready_file)
+        self.registry = ModelRegistry(use_flat_trees=use_flat_trees, poll_interval=poll_interval,
+                                      cache=self.cache, readiness=self.readiness)
+        # Recent hourly demand per key for lag-feature models
+        self.demand = seed_from_history(DemandState())
+
+    def start(self):
+        self.registry.start()
+        return self
+
+    def predict(self, name, payload):
+        """Score one request body -> response dict"""
+        bundle = self.registry.current  # one model version for the whole request
+        if bundle is None or not self.readiness.ready:
+            raise RequestError(503, "Models are not loaded yet")
+
+        timings = {}
+        with self.latency.stage(f"{name}.parse", timings):
+            columns, single = parse_rows(payload, INPUT_COLS[name])
+        predictor, encoder = bundle.predictors[name], bundle.encoders[name]
+        if encoder.state_cols:
+            with self.latency.stage(f"{name}.state", timings):
+                columns.update(state_columns(self.demand, payload, encoder.state_cols))
+        if self.batcher is not None:
+            predictor = self.batcher.wrap(predictor, encoder.feature_cols)
+        output = predict_cached(self.cache, predictor, bundle.versions[name], encoder, columns, timings=timings)
+        # 'parse' and 'state' were already recorded by stage()
+        self.latency.record_all(name, {k: v for k, v in timings.items() if k not in ('parse', 'state')})
+
+        predictions = [int(max(0, value)) for value in output]  # Non-negative integers, as in the app
+        response = {'model': name, 'model_version': bundle.versions[name]}
+        if single:
+            response['prediction'] = predictions[0]
+        else:
+            response['predictions'] = predictions
+        return response
+
+    def observe(self, payload):
+        """Record observed counts in the recent-demand state -> response dict"""
+        keys, hours, counts = parse_observations(payload)
+        accepted = sum(self.demand.observe(key, int(hour), count) for key, hour, count in zip(keys, hours, counts))
+        return {'accepted': accepted, 'stale': len(keys) - accepted}
+
+    def health(self):
+        state = self.readiness.to_dict()
+        return (200 if self.readiness.ready and self.registry.current is not None else 503), state
+
+    def stats(self):
+        return {
+            'latency': self.latency.summary(),
+            'cache': self.cache.stats(),
+            'registry': self.registry.status(),
+            'batcher': None if self.batcher is None else self.batcher.stats(),
+            'demand_state': self.demand.stats(),
+        }
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for high request rates
+        server_version = "RideWiseInference/1.0"
+        body_read = False
+
+        def _body_pending(self):
+            """True when the request announced a body that has not been read from the socket"""
+            if self.body_read:
+                return False
+            length = self.headers.get("Content-Length", "").strip()
+            return length not in ("", "0") or "Transfer-Encoding" in self.headers
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if self._body_pending():
+                # Unread body bytes would be parsed as the next request on this keep-alive connection
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                raise RequestError(400, "Content-Length must be an integer")
+            if length <= 0:
+                raise RequestError(400, "Empty request body")
+            if length > MAX_BODY_BYTES:
+                raise RequestError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+            data = self.rfile.read(length)
+            self.body_read = True
+            try:
+                return json.loads(data)
+            except ValueError:
+                raise RequestError(400, "Request body is not valid JSON")
+
+        def do_GET(self):
+            self.body_read = False
+            if self.path == "/health":
+                status, state = service.health()
+                self._send_json(status, state)
+            elif self.path == "/stats":
+                self._send_json(200, service.stats())
+            else:
+                self._send_json(404, {'error': f"Unknown endpoint {self.path}"})
+
+        def do_POST(self):
+            start = time.perf_counter_ns()
+            self.body_read = False
+            name = {'/predict/daily': 'daily', '/predict/hourly': 'hourly', '/observe': 'observe'}.get(self.path)
+            try:
+                if name == 'observe':
+                    response = service.observe(self._read_json())
+                elif name is None:
+                    raise RequestError(404, f"Unknown endpoint {self.path}")
+                else:
+                    response = service.predict(name, self._read_json())
+            except RequestError as e:
+                self._send_json(e.status, {'error': str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {'error': f"Prediction failed: {e}"})
+                return
+            self._send_json(200, response)
+            service.latency.record(f"{name}.request", time.perf_counter_ns() - start)
+
+        def log_message(self, format, *args):
+            pass  # per-request access logs cost more than the prediction itself
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RideWise headless inference service")
+    parser.add_argument("--host", default=os.environ.get("RIDEWISE_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RIDEWISE_PORT", "8080")))
+    parser.add_argument("--flat-trees", action="store_true",
+                        default=os.environ.get("RIDEWISE_FLAT_TREES", "0") == "1",
+                        help="serve tree ensembles through the flat-array evaluator")
+    parser.add_argument("--poll", type=float, default=float(os.environ.get("RIDEWISE_MODEL_POLL_SECONDS", "5")),
+                        help="seconds between model file checks (hot reload)")
+    parser.add_argument("--batch-wait-ms", type=float, default=float(os.environ.get("RIDEWISE_BATCH_WAIT_MS", "2")),
+                        help="micro-batching window for concurrent requests (0 = off)")
+    parser.add_argument("--max-batch", type=int, default=int(os.environ.get("RIDEWISE_MAX_BATCH", "256")),
+                        help="max rows per coalesced model call")
+    parser.add_argument("--ready-file", default=None,
+                        help="also mirror readiness to this file for file-based health checks")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = InferenceService(args.flat_trees, args.poll, args.ready_file,
+                               args.batch_wait_ms, args.max_batch).start()
+    status = service.registry.status()
+    if service.registry.current is None:
+        print(f"⚠️ Models not loaded ({status['last_error']}); /health reports 503 until they appear")
+    else:
+        print(f"✅ Models {status['version']} ready in {time.perf_counter() - start:.2f}s")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"🚲 Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.registry.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# ============= LATENCY HISTOGRAMS =============
+
+# Log-spaced bucket edges from 1us to ~17s (nanoseconds), used for display
+BUCKET_EDGES_NS = 1000 * 2.0 ** np.arange(0, 25)
+
+
+class LatencyHistogram:
+    """Rolling window of the most recent latency samples (ns) in a fixed NumPy ring buffer"""
+
+    def __init__(self, window=2048):
+        self._samples = np.zeros(window, dtype=np.int64)
+        self._next = 0
+        self._filled = 0
+        self.count = 0  # lifetime number of samples
+        self.last_ns = None
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ns):
+        with self._lock:
+            self._samples[self._next] = elapsed_ns
+            self._next = (self._next + 1) % len(self._samples)
+            self._filled = min(self._filled + 1, len(self._samples))
+            self.count += 1
+            self.last_ns = elapsed_ns
+
+    def samples(self):
+        with self._lock:
+            return self._samples[:self._filled].copy()
+
+    def percentiles(self, q=(50, 95, 99)):
+        """Percentiles (ns) over the current window, None when empty"""
+        samples = self.samples()
+        if not len(samples):
+            return {p: None for p in q}
+        return {p: float(v) for p, v in zip(q, np.percentile(samples, q))}
+
+    def buckets(self, edges=BUCKET_EDGES_NS):
+        """(upper edge, count) pairs for non-empty buckets (log-spaced ns edges by default)"""
+        counts, _ = np.histogram(self.samples(), bins=np.concatenate(([0], edges)))
+        return [(int(edge), int(n)) for edge, n in zip(edges, counts) if n]
+
+
+class LatencyRecorder:
+    """Named histograms (e.g. 'hourly.inference') shared by every session in the process"""
+
+    def __init__(self, window=2048):
+        self.window = window
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = LatencyHistogram(self.window)
+            return self._histograms[name]
+
+    def record(self, name, elapsed_ns):
+        self.histogram(name).record(elapsed_ns)
+
+    def record_all(self, prefix, timings):
+        """Record a {stage: ns} dict under '<prefix>.<stage>'"""
+        for stage, elapsed_ns in timings.items():
+            self.record(f"{prefix}.{stage}", elapsed_ns)
+
+    @contextmanager
+    def stage(self, name, timings=None):
+        """Time a block with perf_counter_ns; optionally also store the result in `timings`"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self.record(name, elapsed)
+            if timings is not None:
+                timings[name.rsplit('.', 1)[-1]] = elapsed
+
+    def summary(self, prefix=None):
+        """Rows of {stage, count, last/p50/p95/p99 in ms} for display"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        rows = []
+        for name, hist in items:
+            if prefix and not name.startswith(prefix + '.'):
+                continue
+            pct = hist.percentiles()
+            rows.append({
+                'stage': name,
+                'count': hist.count,
+                'last_ms': None if hist.last_ns is None else hist.last_ns / 1e6,
+                'p50_ms': None if pct[50] is None else pct[50] / 1e6,
+                'p95_ms': None if pct[95] is None else pct[95] / 1e6,
+                'p99_ms': None if pct[99] is None else pct[99] / 1e6,
+            })
+        return rows
+
+
+def format_ns(elapsed_ns):
+    """Human-readable duration for a nanosecond count"""
+    if elapsed_ns is None:
+        return "n/a"
+    if elapsed_ns < 1_000_000:
+        return f"{elapsed_ns / 1000:.0f} µs"
+    return f"{elapsed_ns / 1e6:.1f} ms"
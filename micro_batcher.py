@@ -0,0 +1,160 @@
+"""
+Request-coalescing micro-batcher
+
+Concurrent callers (Streamlit sessions, API request threads) hand their
+encoded feature rows to one worker thread, which waits at most `max_wait_ms`
+after the first request for more to arrive (up to `max_batch_size` rows),
+runs a single vectorized predict per model and fans the slices back out.
+Batch-size and queue-wait histograms show the throughput / tail-latency
+trade-off while tuning the two knobs.
+"""
+import queue
+import threading
+import time
+
+import numpy as np
+
+from latency_stats import LatencyHistogram
+from prediction_engine import model_input
+
+# Batch-size buckets: 1, 2, 3-4, 5-8, ... (x.5 edges so integer sizes land inside)
+BATCH_SIZE_EDGES = 2.0 ** np.arange(0, 15) + 0.5
+
+
+class _Request:
+    __slots__ = ('predictor', 'feature_cols', 'X', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, predictor, feature_cols, X):
+        self.predictor = predictor
+        self.feature_cols = feature_cols
+        self.X = X
+        self.enqueued = time.perf_counter_ns()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent predict calls into one model.predict per model and batch window"""
+
+    def __init__(self, max_batch_size=256, max_wait_ms=2.0, window=2048):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ns = int(max_wait_ms * 1e6)
+        self._queue = queue.Queue()
+        self.batch_sizes = LatencyHistogram(window)  # rows per model.predict call
+        self.queue_wait = LatencyHistogram(window)   # ns from submit to dispatch, per request
+        self.batch_latency = LatencyHistogram(window)  # ns spent inside model.predict
+        self.requests = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def predict(self, predictor, feature_cols, X):
+        """Blocking predict of an encoded (n, k) matrix, coalesced with other callers"""
+        request = _Request(predictor, feature_cols, np.asarray(X))
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def wrap(self, predictor, feature_cols):
+        """predict()-compatible proxy, usable wherever a model is expected (e.g. predict_cached)"""
+        return BatchedPredictor(self, predictor, feature_cols)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the window closes"""
+        first = self._queue.get()
+        batch, rows = [first], len(first.X)
+        deadline = first.enqueued + self.max_wait_ns
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter_ns()
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining / 1e9)
+                else:
+                    request = self._queue.get_nowait()  # take what is already waiting
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request.X)
+        return batch
+
+    def _dispatch(self, requests):
+        """One vectorized predict for requests that share a predictor; every request ends with a result or an error"""
+        predictor, feature_cols = requests[0].predictor, requests[0].feature_cols
+        try:
+            X = requests[0].X if len(requests) == 1 else np.concatenate([r.X for r in requests])
+            start = time.perf_counter_ns()
+            out = np.asarray(predictor.predict(model_input(predictor, X, feature_cols)), dtype=np.float64)
+            if len(out) != len(X):
+                raise ValueError(f"Model returned {len(out)} predictions for {len(X)} rows")
+            self.batch_latency.record(time.perf_counter_ns() - start)
+            self.batch_sizes.record(len(X))
+            self.batches += 1
+
+            offset = 0
+            for request in requests:
+                request.result = out[offset:offset + len(request.X)]
+                offset += len(request.X)
+        except Exception as e:
+            for request in requests:
+                request.result, request.error = None, e
+        finally:
+            for request in requests:
+                request.done.set()
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch = self._collect()
+                dispatched = time.perf_counter_ns()
+                for request in batch:
+                    self.queue_wait.record(dispatched - request.enqueued)
+                self.requests += len(batch)
+
+                # Hot reloads can put two model versions in one window - never mix them
+                groups = {}
+                for request in batch:
+                    groups.setdefault(id(request.predictor), []).append(request)
+                for requests in groups.values():
+                    self._dispatch(requests)
+            except Exception as e:
+                # This is the only worker: fail the batch's waiting callers and keep serving
+                for request in batch:
+                    if not request.done.is_set():
+                        request.error = e
+                        request.done.set()
+
+    def stats(self):
+        """Counters plus batch-size / queue-wait percentiles for display"""
+        sizes = self.batch_sizes.percentiles()
+        wait = self.queue_wait.percentiles()
+        samples = self.batch_sizes.samples()
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ns / 1e6,
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_rows': float(samples.mean()) if len(samples) else None,
+            'batch_rows_p50': sizes[50],
+            'batch_rows_p95': sizes[95],
+            'batch_rows_p99': sizes[99],
+            'batch_rows_buckets': self.batch_sizes.buckets(BATCH_SIZE_EDGES),
+            'queue_wait_p50_ms': None if wait[50] is None else wait[50] / 1e6,
+            'queue_wait_p95_ms': None if wait[95] is None else wait[95] / 1e6,
+            'queue_wait_p99_ms': None if wait[99] is None else wait[99] / 1e6,
+        }
+
+
+class BatchedPredictor:
+    """Routes predict(X) through a MicroBatcher; X is the encoded feature matrix"""
+
+    def __init__(self, batcher, predictor, feature_cols):
+        self.batcher = batcher
+        self.predictor = predictor
+        self.feature_cols = feature_cols
+
+    def predict(self, X):
+        return self.batcher.predict(self.predictor, self.feature_cols, X)
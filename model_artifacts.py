@@ -0,0 +1,166 @@
+"""
+Pickle-free model artifacts
+
+XGBoost models are stored in XGBoost's native UBJSON format; sklearn tree
+ensembles are stored as flat node arrays (see tree_ensemble.py) in an
+uncompressed .npz that can be memory-mapped. A small JSON manifest records
+what was exported.
+
+Usage:
+    python model_artifacts.py export [--daily daily_bike_rental_model.pkl]
+                                     [--hourly hourly_bike_rental_model.pkl] [--out model_artifacts]
+"""
+import argparse
+import json
+import os
+import pickle
+import zipfile
+from datetime import datetime
+
+import numpy as np
+
+from prediction_cache import model_fingerprint
+from tree_ensemble import FlatTreeEnsemble
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+# ============= EXPORT =============
+
+def _is_xgboost(model):
+    return hasattr(model, 'get_booster')
+
+
+def export_artifacts(models, out_dir, source_files=None):
+    """
+    Write `models` ({name: fitted model}) to `out_dir` and return the manifest.
+    `source_files` ({name: .pkl path}) lets the manifest carry the source
+    fingerprints, so prediction caches stay valid across the format change.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    source_files = source_files or {}
+    manifest = {'format_version': FORMAT_VERSION,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'models': {}}
+
+    for name, model in models.items():
+        entry = {'model_type': type(model).__name__}
+        if _is_xgboost(model):
+            entry['kind'] = 'xgboost'
+            entry['file'] = f"{name}.ubj"
+            model.save_model(os.path.join(out_dir, entry['file']))
+        else:
+            flat = FlatTreeEnsemble.from_sklearn(model)
+            arrays, params = flat.to_arrays()
+            entry['kind'] = 'flat_trees'
+            entry['file'] = f"{name}.npz"
+            entry['params'] = params
+            # Uncompressed so load_artifacts can memory-map members in place
+            np.savez(os.path.join(out_dir, entry['file']), **arrays)
+
+        source = source_files.get(name)
+        entry['source'] = source
+        entry['source_fingerprint'] = model_fingerprint(source) if source else None
+        entry['fingerprint'] = entry['source_fingerprint'] or model_fingerprint(os.path.join(out_dir, entry['file']))
+        manifest['models'][name] = entry
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# ============= IMPORT =============
+
+def read_manifest(artifact_dir):
+    with open(os.path.join(artifact_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format: {manifest.get('format_version')}")
+    return manifest
+
+
+def artifact_is_current(entry, source_file):
+    """
+    False when `source_file` (the .pkl the entry was exported from) exists and
+    has changed since the export - e.g. a retrained model dropped in place
+    """
+    if not source_file or not os.path.exists(source_file):
+        return True  # artifact-only deployment
+    expected = entry.get('source_fingerprint', entry['fingerprint'] if entry.get('source') else None)
+    return expected is None or model_fingerprint(source_file) == expected
+
+
+def _mmap_npz(path):
+    """
+    Memory-map every array of an uncompressed .npz without reading it.
+    Compressed archives fall back to a normal np.load.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                with np.load(path) as data:
+                    return {key: data[key] for key in data.files}
+            # Local file header: 30 fixed bytes + file name + extra field
+            raw.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(raw.read(4), dtype='<u2')
+            raw.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            arrays[info.filename[:-4]] = np.memmap(
+                path, dtype=dtype, mode='r', offset=raw.tell(), shape=shape,
+                order='F' if fortran_order else 'C'
+            )
+    return arrays
+
+
+def load_artifact(artifact_dir, entry, mmap=True):
+    """Load one manifest entry into an object exposing predict()"""
+    path = os.path.join(artifact_dir, entry['file'])
+    if entry['kind'] == 'xgboost':
+        from xgboost import XGBRegressor
+        model = XGBRegressor()
+        model.load_model(path)
+        return model
+    if entry['kind'] == 'flat_trees':
+        if mmap:
+            arrays = _mmap_npz(path)
+        else:
+            with np.load(path) as data:
+                arrays = {key: data[key] for key in data.files}
+        return FlatTreeEnsemble.from_arrays(arrays, entry['params'])
+    raise ValueError(f"Unknown artifact kind: {entry['kind']}")
+
+
+def load_artifacts(artifact_dir, mmap=True):
+    """Load every model listed in the manifest: {name: predictor}"""
+    manifest = read_manifest(artifact_dir)
+    return {name: load_artifact(artifact_dir, entry, mmap=mmap)
+            for name, entry in manifest['models'].items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export pickled models to the pickle-free artifact format")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export")
+    p.add_argument("--daily", default="daily_bike_rental_model.pkl")
+    p.add_argument("--hourly", default="hourly_bike_rental_model.pkl")
+    p.add_argument("--out", default="model_artifacts")
+    args = parser.parse_args()
+
+    sources = {'daily': args.daily, 'hourly': args.hourly}
+    models = {}
+    for name, path in sources.items():
+        with open(path, 'rb') as f:
+            models[name] = pickle.load(f)
+    manifest = export_artifacts(models, args.out, source_files=sources)
+    for name, entry in manifest['models'].items():
+        print(f"✅ {name}: {entry['model_type']} -> {os.path.join(args.out, entry['file'])} ({entry['kind']})")
+
+
+if __name__ == "__main__":
+    main()
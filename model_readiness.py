@@ -0,0 +1,136 @@
+"""
+Model warm-up and readiness state
+
+After the models are loaded, warm_up_models() scores a representative
+synthetic batch (plus a few single rows) through every model so lazy
+allocations and first-touch page faults happen before real traffic.
+Readiness is kept in-process and mirrored to a small JSON file so a load
+balancer health check can poll it.
+
+Usage (exit code 0 when ready, 1 otherwise):
+    python model_readiness.py check [--file .ridewise_ready.json] [--max-age 0]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from prediction_engine import model_input, random_inputs
+
+READY_FILE = os.environ.get("RIDEWISE_READY_FILE", ".ridewise_ready.json")
+WARMUP_ROWS = int(os.environ.get("RIDEWISE_WARMUP_ROWS", "256"))
+WARMUP_ROUNDS = int(os.environ.get("RIDEWISE_WARMUP_ROUNDS", "3"))
+
+STARTING, WARMING, READY, FAILED = "starting", "warming", "ready", "failed"
+
+
+class ReadinessState:
+    """Thread-safe readiness flag plus warm-up timings, mirrored to READY_FILE"""
+
+    def __init__(self, ready_file=READY_FILE):
+        self.ready_file = ready_file
+        self._lock = threading.Lock()
+        self._state = {
+            'status': STARTING,
+            'model_version': None,
+            'warmup_ms': None,
+            'models': {},
+            'error': None,
+            'updated': None,
+            'pid': os.getpid(),
+        }
+
+    @property
+    def ready(self):
+        with self._lock:
+            return self._state['status'] == READY
+
+    def update(self, **fields):
+        with self._lock:
+            self._state.update(fields)
+            self._state['updated'] = datetime.now().isoformat(timespec='seconds')
+            snapshot = dict(self._state)
+        self._write(snapshot)
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._state)
+
+    def _write(self, snapshot):
+        if not self.ready_file:
+            return
+        # Write-then-rename so a health check never reads a half-written file
+        tmp = f"{self.ready_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.ready_file)
+        except OSError:
+            pass
+
+
+def warm_up_models(state, models, model_version=None, rows=WARMUP_ROWS, rounds=WARMUP_ROUNDS):
+    """
+    Score a synthetic batch and single rows through each model, then mark ready.
+    `models` is {name: (predictor, encoder)}; rows=0 skips the warm-up entirely.
+    """
+    state.update(status=WARMING, model_version=model_version, error=None)
+    start = time.perf_counter_ns()
+    timings = {}
+    try:
+        if rows > 0:
+            for name, (predictor, encoder) in models.items():
+                if predictor is None:
+                    raise RuntimeError(f"{name} model not loaded")
+                model_start = time.perf_counter_ns()
+                X = encoder.encode(random_inputs(rows, hourly=encoder.has_hour, seed=len(name)))
+                for _ in range(max(1, rounds)):
+                    predictor.predict(model_input(predictor, X, encoder.feature_cols))
+                    predictor.predict(model_input(predictor, X[:1], encoder.feature_cols))
+                timings[name] = {
+                    'rows': rows,
+                    'rounds': rounds,
+                    'warmup_ms': (time.perf_counter_ns() - model_start) / 1e6,
+                }
+    except Exception as e:
+        state.update(status=FAILED, models=timings, error=str(e),
+                     warmup_ms=(time.perf_counter_ns() - start) / 1e6)
+        return state
+
+    state.update(status=READY, models=timings, warmup_ms=(time.perf_counter_ns() - start) / 1e6)
+    return state
+
+
+def read_ready_file(path=READY_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RideWise readiness check")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("check", help="exit 0 when the models are warmed up and ready")
+    p.add_argument("--file", default=READY_FILE)
+    p.add_argument("--max-age", type=float, default=0,
+                   help="also fail if the file is older than this many seconds (0 = ignore)")
+    args = parser.parse_args()
+
+    state = read_ready_file(args.file)
+    if state is None:
+        print("not ready: no readiness file")
+        sys.exit(1)
+    if args.max_age and time.time() - os.path.getmtime(args.file) > args.max_age:
+        print("not ready: readiness file is stale")
+        sys.exit(1)
+    print(json.dumps(state))
+    sys.exit(0 if state.get('status') == READY else 1)
+
+
+if __name__ == "__main__":
+    main()
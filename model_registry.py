@@ -0,0 +1,255 @@
+"""
+Model loading and hot-reload registry
+
+load_models() reads the daily/hourly models from disk (pickle-free artifacts
+when exported and still matching their source .pkl, the .pkl otherwise). ModelRegistry keeps the currently served
+models as an immutable ModelBundle and watches the files: when they change
+(mtime/size, then content hash) a new bundle is loaded in the background,
+validated with a smoke batch, warmed up and atomically swapped in. Callers
+grab `registry.current` once per request, so in-flight predictions finish on
+the bundle they started with.
+"""
+import os
+import pickle
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from model_artifacts import MANIFEST_NAME, artifact_is_current, load_artifact, read_manifest
+from model_readiness import ReadinessState, warm_up_models
+from prediction_cache import model_files_signature, model_fingerprint
+from prediction_engine import (
+    DAILY_FEATURE_COLS, HOURLY_FEATURE_COLS, FeatureEncoder, model_input, random_inputs
+)
+from tree_ensemble import flatten_model
+
+DAILY_MODEL_FILE = 'daily_bike_rental_model.pkl'
+HOURLY_MODEL_FILE = 'hourly_bike_rental_model.pkl'
+# Pickle-free artifacts (python model_artifacts.py export) are preferred when present
+MODEL_ARTIFACT_DIR = 'model_artifacts'
+
+MODEL_NAMES = ('daily', 'hourly')
+_DEFAULT_COLS = {'daily': DAILY_FEATURE_COLS, 'hourly': HOURLY_FEATURE_COLS}
+
+
+# ============= LOADING =============
+
+def _artifact_entries(daily_file, hourly_file, artifact_dir):
+    """
+    {name: manifest entry to serve, or None to load the .pkl}. An exported
+    artifact whose source .pkl has since changed is stale and skipped.
+    """
+    files = {'daily': daily_file, 'hourly': hourly_file}
+    if not os.path.exists(os.path.join(artifact_dir, MANIFEST_NAME)):
+        return dict.fromkeys(MODEL_NAMES)
+    entries = read_manifest(artifact_dir)['models']
+    return {name: entries[name] if name in entries and artifact_is_current(entries[name], files[name]) else None
+            for name in MODEL_NAMES}
+
+
+def model_versions(daily_file=DAILY_MODEL_FILE, hourly_file=HOURLY_MODEL_FILE,
+                   artifact_dir=MODEL_ARTIFACT_DIR):
+    """Content fingerprints of the models load_models() would serve, without loading them"""
+    files = {'daily': daily_file, 'hourly': hourly_file}
+    entries = _artifact_entries(daily_file, hourly_file, artifact_dir)
+    return {name: entries[name]['fingerprint'] if entries[name] else model_fingerprint(files[name])
+            for name in MODEL_NAMES}
+
+
+def load_models(daily_file=DAILY_MODEL_FILE, hourly_file=HOURLY_MODEL_FILE,
+                artifact_dir=MODEL_ARTIFACT_DIR):
+    """
+    Load the trained models -> ({'daily': model, 'hourly': model}, {name: fingerprint}).
+    Exported artifacts are preferred; a .pkl that changed after the export wins.
+    Raises on missing or unreadable files; callers decide how to report it.
+    """
+    files = {'daily': daily_file, 'hourly': hourly_file}
+    entries = _artifact_entries(daily_file, hourly_file, artifact_dir)
+    versions = model_versions(daily_file, hourly_file, artifact_dir)
+    models = {}
+    for name in MODEL_NAMES:
+        if entries[name] is not None:
+            # Native XGBoost / memory-mapped .npz artifacts: no pickle code execution
+            models[name] = load_artifact(artifact_dir, entries[name], mmap=True)
+        else:
+            with open(files[name], 'rb') as f:
+                models[name] = pickle.load(f)
+    return models, versions
+
+
+def watched_files_signature(daily_file=DAILY_MODEL_FILE, hourly_file=HOURLY_MODEL_FILE,
+                            artifact_dir=MODEL_ARTIFACT_DIR):
+    """Stat signature of every file load_models() may read"""
+    paths = [daily_file, hourly_file]
+    if os.path.isdir(artifact_dir):
+        paths += sorted(os.path.join(artifact_dir, name) for name in os.listdir(artifact_dir))
+    return model_files_signature(paths)
+
+
+class ModelBundle:
+    """Immutable snapshot of everything needed to serve one model version"""
+
+    def __init__(self, models, versions, use_flat_trees=False):
+        self.models = dict(models)
+        self.versions = dict(versions)
+        self.version = "/".join(str(self.versions[name]) for name in MODEL_NAMES)
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+
+        # Encoders follow each model's fitted column order
+        self.encoders = {name: FeatureEncoder.for_model(model, _DEFAULT_COLS[name])
+                         for name, model in self.models.items()}
+
+        # Optionally serve through flat node arrays, verified against model.predict
+        self.predictors = {}
+        for name, model in self.models.items():
+            flat = None
+            if use_flat_trees:
+                encoder = self.encoders[name]
+                check_X = encoder.encode(random_inputs(256, hourly=encoder.has_hour))
+                flat = flatten_model(model, check_X=model_input(model, check_X, encoder.feature_cols))
+            self.predictors[name] = flat if flat is not None else model
+
+    def validate(self, rows=64):
+        """Smoke batch through every predictor: correct shape and finite outputs"""
+        for name, predictor in self.predictors.items():
+            encoder = self.encoders[name]
+            X = encoder.encode(random_inputs(rows, hourly=encoder.has_hour, seed=7))
+            out = np.asarray(predictor.predict(model_input(predictor, X, encoder.feature_cols)), dtype=np.float64)
+            if out.shape != (rows,):
+                raise ValueError(f"{name} model returned shape {out.shape} for {rows} rows")
+            if not np.all(np.isfinite(out)):
+                raise ValueError(f"{name} model returned non-finite predictions")
+
+
+# ============= REGISTRY =============
+
+class ModelRegistry:
+    """Serves the current ModelBundle and hot-swaps it when the model files change"""
+
+    def __init__(self, daily_file=DAILY_MODEL_FILE, hourly_file=HOURLY_MODEL_FILE,
+                 artifact_dir=MODEL_ARTIFACT_DIR, use_flat_trees=False, poll_interval=5.0,
+                 cache=None, readiness=None, on_swap=None):
+        self.paths = dict(daily_file=daily_file, hourly_file=hourly_file, artifact_dir=artifact_dir)
+        self.use_flat_trees = use_flat_trees
+        self.poll_interval = poll_interval
+        self.cache = cache
+        self.readiness = readiness
+        self.on_swap = on_swap  # called with the new bundle after every successful swap
+
+        self._current = None
+        self._swap_lock = threading.Lock()
+        self._signature = None
+        self._pending_signature = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._status = {'reloads': 0, 'rejected': 0, 'last_error': None,
+                        'last_check': None, 'last_swap': None}
+
+    @property
+    def current(self):
+        """The bundle to use for one whole request (None until the first successful load)"""
+        return self._current
+
+    def status(self):
+        bundle = self._current
+        return dict(self._status,
+                    version=None if bundle is None else bundle.version,
+                    loaded_at=None if bundle is None else bundle.loaded_at,
+                    watching=self._thread is not None and self._thread.is_alive())
+
+    def _load_bundle(self):
+        models, versions = load_models(**self.paths)
+        bundle = ModelBundle(models, versions, use_flat_trees=self.use_flat_trees)
+        bundle.validate()
+        return bundle
+
+    def _swap(self, bundle):
+        with self._swap_lock:
+            self._current = bundle
+            if self.cache is not None:
+                self.cache.set_model_versions([bundle.versions[name] for name in MODEL_NAMES])
+            self._status['last_swap'] = datetime.now().isoformat(timespec='seconds')
+        if self.on_swap is not None:
+            self.on_swap(bundle)
+
+    def _warm_up(self, bundle, readiness):
+        state = warm_up_models(
+            readiness, {name: (bundle.predictors[name], bundle.encoders[name]) for name in MODEL_NAMES},
+            model_version=bundle.version
+        )
+        if state.to_dict()['status'] != 'ready':
+            raise RuntimeError(state.to_dict()['error'])
+
+    def load_initial(self):
+        """Synchronous first load + warm-up; failures are recorded and retried by the watcher"""
+        # Taken before loading so edits made during the load are still picked up
+        signature = watched_files_signature(**self.paths)
+        try:
+            bundle = self._load_bundle()
+            if self.readiness is not None:
+                self._warm_up(bundle, self.readiness)
+        except Exception as e:
+            self._status['last_error'] = str(e)
+            if self.readiness is not None:
+                self.readiness.update(status='failed', error=str(e))
+            return False
+        self._swap(bundle)
+        # Only a served bundle settles the signature; after a failure the watcher keeps retrying
+        self._signature = signature
+        return True
+
+    def check_for_update(self):
+        """
+        One watcher step. Reloads only once the file signature has settled
+        (unchanged across two polls) and the content hashes actually differ.
+        Returns True when a new bundle was swapped in.
+        """
+        self._status['last_check'] = datetime.now().isoformat(timespec='seconds')
+        signature = watched_files_signature(**self.paths)
+        if signature == self._signature:
+            self._pending_signature = None
+            return False
+        if signature != self._pending_signature:
+            # Files are changing (or just changed) - wait for the copy to finish
+            self._pending_signature = signature
+            return False
+
+        self._signature, self._pending_signature = signature, None
+        try:
+            current = self._current
+            if current is not None and model_versions(**self.paths) == current.versions:
+                self._status['last_error'] = None
+                return False  # touched or restored, content unchanged
+            bundle = self._load_bundle()
+            if self.readiness is not None:
+                # Warm the candidate on a scratch state; the live state stays 'ready'
+                self._warm_up(bundle, ReadinessState(ready_file=None))
+        except Exception as e:
+            if self._current is None:
+                self._signature = None  # nothing served yet - retry on the next settled poll
+            self._status['rejected'] += 1
+            self._status['last_error'] = f"reload rejected: {e}"
+            return False
+
+        self._swap(bundle)
+        self._status['reloads'] += 1
+        self._status['last_error'] = None
+        if self.readiness is not None:
+            self.readiness.update(status='ready', model_version=bundle.version, error=None)
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_for_update()
+
+    def start(self):
+        """Initial load, then watch the model files in a daemon thread"""
+        self.load_initial()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from prediction_engine import model_input
+
+# ============= MODEL FINGERPRINTS =============
+
+def model_files_signature(paths):
+    """Cheap (path, size, mtime_ns) signature - changes whenever a model file is replaced"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+@lru_cache(maxsize=16)
+def _content_hash(path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def model_fingerprint(path):
+    """
+    Content hash of a model file. The hash is only recomputed when the file's
+    size/mtime change, so calling this on every Streamlit rerun is cheap.
+    """
+    (_, size, mtime_ns), = model_files_signature([path])
+    if size is None:
+        return None
+    return _content_hash(path, size, mtime_ns)
+
+
+# ============= PREDICTION LRU CACHE =============
+
+_MISSING = object()
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of model outputs keyed on (model fingerprint, encoded features).
+    One instance is shared by every Streamlit session in the process.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl  # seconds, None = entries never expire
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def set_model_versions(self, versions):
+        """Drop every entry as soon as the set of loaded model fingerprints changes"""
+        versions = tuple(versions)
+        with self._lock:
+            if self._versions is not None and versions != self._versions:
+                self._data.clear()
+                self.invalidations += 1
+            self._versions = versions
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+def predict_cached(cache, model, model_version, encoder, inputs, timings=None):
+    """
+    Score inputs (one row or a batch) through the cache.
+    Only rows that miss are sent to the model, in a single predict call.
+    When `timings` is a dict, encode/cache/inference durations (ns) are added to it.
+    """
+    start = time.perf_counter_ns()
+    features = encoder.encode(inputs)
+    encoded = time.perf_counter_ns()
+
+    keys = [(model_version, tuple(row)) for row in features.tolist()]
+    out = np.empty(len(keys), dtype=np.float64)
+    miss_idx = []
+    for i, key in enumerate(keys):
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            miss_idx.append(i)
+        else:
+            out[i] = value
+    looked_up = time.perf_counter_ns()
+
+    if miss_idx:
+        scored = np.asarray(model.predict(model_input(model, features[miss_idx], encoder.feature_cols)),
+                            dtype=np.float64)
+        for i, value in zip(miss_idx, scored):
+            out[i] = value
+            cache.put(keys[i], float(value))
+    done = time.perf_counter_ns()
+
+    if timings is not None:
+        timings['encode'] = encoded - start
+        timings['cache'] = looked_up - encoded
+        timings['inference'] = done - looked_up
+    return out
@@ -0,0 +1,275 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import ENGINEERED_FEATURES, STATE_FEATURES, feature_matrix, required_columns
+
+# ============= FEATURE DEFINITIONS =============
+# Shared by the Streamlit app and any batch/offline scorer.
+# Column order MUST match training data exactly!
+
+SEASON_MAP = {"Spring": 1, "Summer": 2, "Fall": 3, "Winter": 4}
+WEATHER_MAP = {"Clear": 1, "Mist/Cloudy": 2, "Light Rain/Snow": 3, "Heavy Rain/Snow": 4}
+
+DAILY_FEATURE_COLS = ['season', 'yr', 'mnth', 'holiday', 'weekday', 'workingday',
+                      'weathersit', 'temp', 'atemp', 'hum', 'windspeed']
+# 'hr' column MUST be LAST to match training order!
+HOURLY_FEATURE_COLS = DAILY_FEATURE_COLS + ['hr']
+
+# Raw UI inputs, in the same order as the preprocess_* arguments
+DAILY_INPUT_COLS = ['season', 'weather', 'temperature', 'humidity', 'wind_speed',
+                    'year', 'month', 'holiday', 'working_day', 'day_type']
+HOURLY_INPUT_COLS = ['season', 'weather', 'temperature', 'humidity', 'wind_speed',
+                     'year', 'month', 'hour', 'holiday', 'working_day', 'day_type']
+
+
+# ============= COMPILED FEATURE ENCODER =============
+
+def _is_scalar(value):
+    return np.ndim(value) == 0
+
+
+class FeatureEncoder:
+    """
+    Feature encoder compiled once at model-load time.
+    Column positions and label lookup tables are resolved up front, so encoding
+    writes straight into a preallocated float buffer - no dicts, no DataFrames.
+    """
+
+    def __init__(self, feature_cols, dtype=np.float64):
+        self.feature_cols = list(feature_cols)
+        self.dtype = np.dtype(dtype)
+
+        unknown = [col for col in self.feature_cols if col not in HOURLY_FEATURE_COLS
+                   and col not in ENGINEERED_FEATURES and col not in STATE_FEATURES]
+        if unknown:
+            raise ValueError(f"Cannot encode model features: {unknown}")
+        # Engineered columns (feature_pipeline.py) are built from an encoding of the base columns;
+        # recent-demand columns are passed in with the inputs (demand_state.py)
+        self.engineered_cols = [col for col in self.feature_cols if col not in HOURLY_FEATURE_COLS]
+        self.state_cols = [col for col in self.feature_cols if col in STATE_FEATURES]
+        self.has_hour = 'hr' in required_columns(self.feature_cols)
+        self.input_cols = HOURLY_INPUT_COLS if self.has_hour else DAILY_INPUT_COLS
+        self._base = None
+        if self.engineered_cols:
+            self._base = FeatureEncoder(HOURLY_FEATURE_COLS if self.has_hour else DAILY_FEATURE_COLS, dtype)
+        # Output position of each known feature; features the model does not use
+        # go to a trailing scratch column of the row buffer
+        n_features = len(self.feature_cols)
+        self._pos = {col: (self.feature_cols.index(col) if col in self.feature_cols else n_features)
+                     for col in HOURLY_FEATURE_COLS}
+
+        # Lookup tables as sorted label/code arrays (vectorized path) and dicts (scalar path)
+        self._season_labels, self._season_codes = self._compile_table(SEASON_MAP)
+        self._weather_labels, self._weather_codes = self._compile_table(WEATHER_MAP)
+        self._season_map = dict(SEASON_MAP)
+        self._weather_map = dict(WEATHER_MAP)
+
+        self._local = threading.local()
+
+    @classmethod
+    def for_model(cls, model, default_cols, dtype=np.float64):
+        """Build an encoder whose column order matches what `model` was fitted on"""
+        names = getattr(model, 'feature_names_in_', None)
+        if names is None:
+            names = getattr(model, 'feature_names', None)
+        return cls(list(names) if names is not None else default_cols, dtype=dtype)
+
+    def _compile_table(self, mapping):
+        labels = np.array(sorted(mapping))
+        codes = np.array([mapping[label] for label in labels], dtype=self.dtype)
+        return labels, codes
+
+    def _lookup(self, values, labels, codes, default):
+        values = values.astype(str)
+        idx = np.searchsorted(labels, values)
+        idx[idx == len(labels)] = 0
+        found = labels[idx] == values
+        return np.where(found, codes[idx], default)
+
+    def new_buffer(self, n_rows):
+        """Allocate an output buffer callers can reuse across encode() calls"""
+        return np.empty((n_rows, len(self.feature_cols)), dtype=self.dtype)
+
+    def encode(self, inputs, out=None):
+        """
+        Encode raw UI values (DataFrame or dict of columns/scalars) into the
+        model feature matrix, writing into `out` when given
+        """
+        missing = [col for col in self.input_cols if col not in inputs]
+        if missing:
+            raise KeyError(f"Missing input columns: {missing}")
+        if self._base is not None:
+            return self._encode_engineered(inputs, out)
+        if out is None and all(_is_scalar(inputs[col]) for col in self.input_cols):
+            return self.encode_row(*[inputs[col] for col in self.input_cols]).copy()
+
+        columns = [np.asarray(inputs[col]) for col in self.input_cols]
+        n_rows = max((col.shape[0] for col in columns if col.ndim > 0), default=1)
+        columns = dict(zip(self.input_cols, (np.broadcast_to(col, (n_rows,)) for col in columns)))
+        if out is None:
+            out = self.new_buffer(n_rows)
+        elif out.shape != (n_rows, len(self.feature_cols)):
+            raise ValueError(f"Output buffer shape {out.shape} does not match {n_rows} rows")
+
+        temperature = columns['temperature'].astype(np.float64)
+        values = {
+            'season': lambda: self._lookup(columns['season'], self._season_labels, self._season_codes, 1),
+            'yr': lambda: columns['year'].astype(np.float64) >= 2012,
+            'mnth': lambda: columns['month'],
+            'holiday': lambda: columns['holiday'] == "Yes",
+            'weekday': lambda: columns['day_type'] == "Weekday",
+            'workingday': lambda: columns['working_day'] == "Yes",
+            'weathersit': lambda: self._lookup(columns['weather'], self._weather_labels, self._weather_codes, 1),
+            'temp': lambda: temperature / 41.0,  # Normalized temperature
+            'atemp': lambda: (temperature + 5) / 50.0,  # Feeling temperature
+            'hum': lambda: columns['humidity'].astype(np.float64) / 100.0,
+            'windspeed': lambda: columns['wind_speed'].astype(np.float64) / 67.0,
+            'hr': lambda: columns['hour'],
+        }
+        for col in self.feature_cols:
+            out[:, self._pos[col]] = values[col]()
+        return out
+
+    def _encode_engineered(self, inputs, out=None):
+        """Base columns through the compiled encoder, then the engineered ones column-wise"""
+        base = self._base.encode(inputs)
+        columns = dict(zip(self._base.feature_cols, base.T))
+        # Recent-demand inputs (model columns, or lag_1..lag_3 for recent_mean / demand_trend)
+        columns.update({col: inputs[col] for col in STATE_FEATURES if col in inputs})
+        return feature_matrix(columns, self.feature_cols, out=out, dtype=self.dtype)
+
+    def encode_row(self, season, weather, temperature, humidity, wind_speed,
+                   year, month, *rest):
+        """
+        Scalar fast path for a single UI submission. Arguments follow the
+        preprocess_* order; the returned (1, n) row is a per-thread buffer
+        that is overwritten by the next call, so copy it if you keep it.
+        """
+        if self._base is not None:
+            return self._encode_engineered(dict(zip(self.input_cols, (season, weather, temperature, humidity,
+                                                                        wind_speed, year, month) + rest)))
+        if self.has_hour:
+            hour, holiday, working_day, day_type = rest
+        else:
+            (holiday, working_day, day_type), hour = rest, 0
+
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            scratch = np.empty((1, len(self.feature_cols) + 1), dtype=self.dtype)
+            row = self._local.row = scratch[:, :-1]
+        pos = self._pos
+        buf = row.base[0]
+
+        buf[pos['season']] = self._season_map.get(season, 1)
+        buf[pos['yr']] = 1 if year >= 2012 else 0
+        buf[pos['mnth']] = month
+        buf[pos['holiday']] = 1 if holiday == "Yes" else 0
+        buf[pos['weekday']] = 1 if day_type == "Weekday" else 0
+        buf[pos['workingday']] = 1 if working_day == "Yes" else 0
+        buf[pos['weathersit']] = self._weather_map.get(weather, 1)
+        buf[pos['temp']] = temperature / 41.0
+        buf[pos['atemp']] = (temperature + 5) / 50.0
+        buf[pos['hum']] = humidity / 100.0
+        buf[pos['windspeed']] = wind_speed / 67.0
+        if self.has_hour:
+            buf[pos['hr']] = hour
+        return row
+
+
+# Default encoders in canonical training order
+DAILY_ENCODER = FeatureEncoder(DAILY_FEATURE_COLS)
+HOURLY_ENCODER = FeatureEncoder(HOURLY_FEATURE_COLS)
+
+
+def encode_daily_batch(inputs):
+    """
+    Encode raw daily UI values (DataFrame or dict of columns/scalars) into a
+    feature matrix ordered as DAILY_FEATURE_COLS
+    """
+    return DAILY_ENCODER.encode(inputs)
+
+
+def encode_hourly_batch(inputs):
+    """
+    Encode raw hourly UI values (DataFrame or dict of columns/scalars) into a
+    feature matrix ordered as HOURLY_FEATURE_COLS
+    """
+    return HOURLY_ENCODER.encode(inputs)
+
+
+def random_inputs(n_rows, hourly=True, seed=0):
+    """Random raw UI values covering the full slider/selectbox ranges"""
+    rng = np.random.default_rng(seed)
+    inputs = {
+        'season': rng.choice(list(SEASON_MAP), n_rows),
+        'weather': rng.choice(list(WEATHER_MAP), n_rows),
+        'temperature': rng.integers(-10, 41, n_rows),
+        'humidity': rng.integers(0, 101, n_rows),
+        'wind_speed': rng.integers(0, 61, n_rows),
+        'year': rng.integers(2020, 2031, n_rows),
+        'month': rng.integers(1, 13, n_rows),
+        'hour': rng.integers(0, 24, n_rows),
+        'holiday': rng.choice(["No", "Yes"], n_rows),
+        'working_day': rng.choice(["No", "Yes"], n_rows),
+        'day_type': rng.choice(["Weekday", "Weekend"], n_rows),
+    }
+    input_cols = HOURLY_INPUT_COLS if hourly else DAILY_INPUT_COLS
+    return pd.DataFrame({col: inputs[col] for col in input_cols})
+
+
+HOURS_OF_DAY = np.arange(24)
+
+
+def hourly_profile_inputs(inputs):
+    """Expand one hourly scenario into 24 rows (hr = 0..23) with the same weather/calendar inputs"""
+    return dict(inputs, hour=HOURS_OF_DAY)
+
+
+# ============= BATCH PREDICTION =============
+
+def model_input(model, features, feature_cols):
+    """Wrap the feature matrix in a DataFrame only when the model was fitted on named columns"""
+    if getattr(model, 'feature_names_in_', None) is not None:
+        return pd.DataFrame(features, columns=feature_cols, copy=False)
+    return features
+
+
+def predict_daily_batch(model, inputs, encoder=None):
+    """Score many daily scenarios with a single model.predict call"""
+    encoder = encoder or DAILY_ENCODER
+    features = encoder.encode(inputs)
+    return np.asarray(model.predict(model_input(model, features, encoder.feature_cols)), dtype=np.float64)
+
+
+def predict_hourly_batch(model, inputs, encoder=None):
+    """Score many hourly scenarios with a single model.predict call"""
+    encoder = encoder or HOURLY_ENCODER
+    features = encoder.encode(inputs)
+    return np.asarray(model.predict(model_input(model, features, encoder.feature_cols)), dtype=np.float64)
+
+
+# ============= SINGLE-ROW WRAPPERS =============
+
+def preprocess_daily_features(season, weather, temperature, humidity, wind_speed,
+                              year, month, holiday, working_day, day_type):
+    """
+    Convert daily prediction inputs to model features
+    IMPORTANT: Column order MUST match training data exactly!
+    """
+    features = DAILY_ENCODER.encode_row(season, weather, temperature, humidity, wind_speed,
+                                        year, month, holiday, working_day, day_type)
+    return pd.DataFrame(features, columns=DAILY_FEATURE_COLS, copy=True)
+
+
+def preprocess_hourly_features(season, weather, temperature, humidity, wind_speed,
+                               year, month, hour, holiday, working_day, day_type):
+    """
+    Convert hourly prediction inputs to model features
+    IMPORTANT: Column order MUST match training data exactly!
+    'hr' column MUST be LAST to match training order!
+    """
+    features = HOURLY_ENCODER.encode_row(season, weather, temperature, humidity, wind_speed,
+                                         year, month, hour, holiday, working_day, day_type)
+    return pd.DataFrame(features, columns=HOURLY_FEATURE_COLS, copy=True)
@@ -0,0 +1,84 @@
+"""
+Conformal prediction intervals
+
+Interval half-widths are split-conformal quantiles of the absolute backtest
+residuals (see backtest.py), computed per group - hour of day for the hourly
+model, weather type for the daily model - with a global fallback for thin
+groups. At prediction time the bounds are one array lookup on the same
+batch the point forecast came from, so they add microseconds, not a model call.
+
+NOTE: the backtest replays the history the models were trained on, so the
+residuals are in-sample and the intervals can be optimistic until a proper
+holdout is backtested.
+"""
+import math
+
+import numpy as np
+
+INTERVAL_COVERAGES = (0.8, 0.9, 0.95)
+# Backtest group each model's widths are conditioned on
+INTERVAL_GROUP = {'daily': 'weathersit', 'hourly': 'hr'}
+# Groups with fewer residuals than this use the global width
+MIN_GROUP_ROWS = 30
+
+
+def conformal_quantile(abs_residuals, coverage):
+    """Finite-sample corrected split-conformal quantile: the ceil((n+1)*coverage)-th smallest residual"""
+    abs_residuals = np.asarray(abs_residuals, dtype=np.float64)
+    n = len(abs_residuals)
+    if n == 0:
+        return None
+    rank = min(n, math.ceil((n + 1) * coverage))
+    return float(np.partition(abs_residuals, rank - 1)[rank - 1])
+
+
+def interval_widths(abs_residuals, groups, coverages=INTERVAL_COVERAGES, min_group_rows=MIN_GROUP_ROWS):
+    """
+    JSON-serializable widths: {coverage: {'overall': w, 'by_value': {group value: w}}}.
+    Groups are sorted once; each group is a contiguous slice.
+    """
+    abs_residuals = np.asarray(abs_residuals, dtype=np.float64)
+    groups = np.asarray(groups)
+    order = np.argsort(groups, kind='stable')
+    values, starts, counts = np.unique(groups[order], return_index=True, return_counts=True)
+    sorted_residuals = abs_residuals[order]
+
+    widths = {}
+    for coverage in coverages:
+        by_value = {}
+        for value, start, count in zip(values.tolist(), starts, counts):
+            if count >= min_group_rows:
+                by_value[str(value)] = conformal_quantile(sorted_residuals[start:start + count], coverage)
+        widths[str(coverage)] = {'overall': conformal_quantile(abs_residuals, coverage), 'by_value': by_value}
+    return widths
+
+
+class IntervalTable:
+    """Per-group interval half-widths compiled into a dense lookup array"""
+
+    def __init__(self, widths, default_width, coverage, group_col=None):
+        self.coverage = coverage
+        self.group_col = group_col
+        self.default_width = float(default_width)
+        size = max((int(float(v)) for v in widths), default=-1) + 2  # last slot = out of range
+        self._lookup = np.full(size, self.default_width, dtype=np.float64)
+        for value, width in widths.items():
+            self._lookup[int(float(value))] = width
+
+    @classmethod
+    def from_backtest(cls, result, coverage=0.9):
+        """Table for one backtest result, None when there is no backtest or no widths"""
+        if not result or 'intervals' not in result:
+            return None
+        entry = result['intervals']['widths'].get(str(coverage))
+        if entry is None or entry['overall'] is None:
+            return None
+        return cls(entry['by_value'], entry['overall'], coverage, result['intervals']['group'])
+
+    def bounds(self, point, group_values):
+        """Vectorized (lower, upper) for point forecasts; lower is clipped at zero demand"""
+        point = np.asarray(point, dtype=np.float64)
+        idx = np.asarray(group_values, dtype=np.int64)
+        idx = np.where((idx >= 0) & (idx < len(self._lookup) - 1), idx, len(self._lookup) - 1)
+        width = self._lookup[idx]
+        return np.maximum(point - width, 0), point + width
@@ -0,0 +1,368 @@
+"""
+Append-only columnar prediction log
+
+Every prediction the app serves is appended as one record (raw inputs,
+model output, model version, latency, username) to an in-memory ring
+buffer - a lock, a timestamp and a slot store, so logging never blocks the
+UI thread. A background thread drains the buffer in batches, encodes the
+features for the whole batch at once and appends each column to its own
+raw binary file (NumPy dtypes) in the active segment directory:
+
+    prediction_log/seg-000001/ts_ns.bin, output.bin, feat_temp.bin, ... meta.json
+
+Segments rotate once they pass `segment_bytes`. meta.json holds the row
+count and the min/max timestamp, so a time-range scan skips whole segments
+and binary-searches the timestamp column inside the rest, reading only the
+requested columns.
+
+When the buffer is full (the disk cannot keep up) new records are dropped
+and counted rather than delaying a prediction.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from prediction_engine import HOURLY_FEATURE_COLS, SEASON_MAP, WEATHER_MAP
+
+# Empty = logging off; set e.g. RIDEWISE_PREDICTION_LOG_DIR=prediction_log to enable it
+PREDICTION_LOG_DIR = os.environ.get("RIDEWISE_PREDICTION_LOG_DIR", "")
+
+MODEL_CODES = {'daily': 0, 'hourly': 1}
+_FEATURE_POS = {col: j for j, col in enumerate(HOURLY_FEATURE_COLS)}
+MODEL_NAMES = {code: name for name, code in MODEL_CODES.items()}
+
+# Column name -> dtype. Raw inputs are stored as codes (season/weather as in
+# SEASON_MAP / WEATHER_MAP, 0 = unknown; hour = -1 for daily predictions);
+# encoded features are NaN where the serving model does not use them.
+# Engineered / recent-demand model columns are not stored - they derive
+# from the base features (feature_pipeline.py).
+SCHEMA = dict([
+    ('ts_ns', 'int64'),
+    ('model', 'uint8'),
+    ('season', 'int8'),
+    ('weather', 'int8'),
+    ('temperature', 'float32'),
+    ('humidity', 'float32'),
+    ('wind_speed', 'float32'),
+    ('year', 'int16'),
+    ('month', 'int8'),
+    ('hour', 'int8'),
+    ('holiday', 'int8'),
+    ('working_day', 'int8'),
+    ('weekday', 'int8'),
+] + [(f'feat_{col}', 'float32') for col in HOURLY_FEATURE_COLS] + [
+    ('output', 'float32'),
+    ('latency_ns', 'int64'),
+    ('model_version', '<U16'),
+    ('username', '<U32'),
+])
+ROW_BYTES = sum(np.dtype(dtype).itemsize for dtype in SCHEMA.values())
+
+META_NAME = 'meta.json'
+
+
+def _to_ns(value):
+    """datetime / pandas Timestamp / ns integer -> ns since the epoch"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return pd.Timestamp(value).value
+    return int(value)
+
+
+# ============= SEGMENTS =============
+
+def _segment_dirs(log_dir):
+    if not os.path.isdir(log_dir):
+        return []
+    return sorted(os.path.join(log_dir, name) for name in os.listdir(log_dir) if name.startswith('seg-'))
+
+
+def read_meta(segment_dir):
+    """Segment metadata, None when missing or unreadable"""
+    try:
+        with open(os.path.join(segment_dir, META_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class _Segment:
+    """The active segment: one append-only file per column plus meta.json"""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = {'rows': 0, 'bytes': 0, 'min_ts': None, 'max_ts': None, 'sorted': True,
+                     'schema': SCHEMA, 'created': datetime.now().isoformat(timespec='seconds')}
+
+    def append(self, columns):
+        """Append one batch of equal-length columns, then publish the new row count"""
+        for col, dtype in SCHEMA.items():
+            with open(os.path.join(self.path, f"{col}.bin"), 'ab') as f:
+                f.write(np.ascontiguousarray(columns[col], dtype=dtype).tobytes())
+
+        ts = columns['ts_ns']
+        meta = self.meta
+        if meta['max_ts'] is not None and ts[0] < meta['max_ts']:
+            meta['sorted'] = False  # wall clock stepped back - scans fall back to a mask
+        meta['sorted'] = meta['sorted'] and bool(np.all(ts[1:] >= ts[:-1]))
+        meta['min_ts'] = int(ts.min()) if meta['min_ts'] is None else min(meta['min_ts'], int(ts.min()))
+        meta['max_ts'] = int(ts.max()) if meta['max_ts'] is None else max(meta['max_ts'], int(ts.max()))
+        meta['rows'] += len(ts)
+        meta['bytes'] += len(ts) * ROW_BYTES
+        self._write_meta()
+
+    def _write_meta(self):
+        path = os.path.join(self.path, META_NAME)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, path)
+
+
+def _read_column(segment_dir, col, dtype, start, stop):
+    dtype = np.dtype(dtype)
+    return np.fromfile(os.path.join(segment_dir, f"{col}.bin"), dtype=dtype,
+                       count=stop - start, offset=start * dtype.itemsize)
+
+
+def scan_log(log_dir=PREDICTION_LOG_DIR, start=None, end=None, columns=None, model=None):
+    """
+    Records with start <= timestamp < end (datetimes or ns; None = open) as
+    {column: array}. Segments outside the range are skipped from their
+    metadata; inside a segment the range is a binary search on ts_ns.
+    """
+    start_ns, end_ns = _to_ns(start), _to_ns(end)
+    columns = list(SCHEMA) if columns is None else list(dict.fromkeys(['ts_ns'] + list(columns)))
+    unknown = [col for col in columns if col not in SCHEMA]
+    if unknown:
+        raise KeyError(f"Unknown prediction log columns: {unknown}")
+    if model is not None and 'model' not in columns:
+        columns.append('model')
+
+    parts = {col: [] for col in columns}
+    for segment_dir in _segment_dirs(log_dir):
+        meta = read_meta(segment_dir)
+        if not meta or not meta['rows']:
+            continue
+        if (start_ns is not None and meta['max_ts'] < start_ns) or (end_ns is not None and meta['min_ts'] >= end_ns):
+            continue
+
+        rows = meta['rows']
+        ts = _read_column(segment_dir, 'ts_ns', 'int64', 0, rows)
+        if meta['sorted']:
+            lo = 0 if start_ns is None else int(np.searchsorted(ts, start_ns, 'left'))
+            hi = rows if end_ns is None else int(np.searchsorted(ts, end_ns, 'left'))
+            if lo >= hi:
+                continue
+            mask = None
+        else:
+            mask = np.ones(rows, dtype=bool)
+            if start_ns is not None:
+                mask &= ts >= start_ns
+            if end_ns is not None:
+                mask &= ts < end_ns
+            lo, hi = 0, rows
+
+        if model is not None:
+            codes = _read_column(segment_dir, 'model', 'uint8', lo, hi)
+            keep = codes == MODEL_CODES[model]
+            mask = keep if mask is None else mask[lo:hi] & keep
+        elif mask is not None:
+            mask = mask[lo:hi]
+
+        for col in columns:
+            values = ts[lo:hi] if col == 'ts_ns' else _read_column(segment_dir, col, SCHEMA[col], lo, hi)
+            parts[col].append(values if mask is None else values[mask])
+
+    return {col: (np.concatenate(chunks) if chunks else np.empty(0, dtype=SCHEMA[col]))
+            for col, chunks in parts.items()}
+
+
+# ============= LOG =============
+
+class PredictionLog:
+    """Ring-buffered, background-flushed prediction log shared by every session"""
+
+    def __init__(self, log_dir=PREDICTION_LOG_DIR, capacity=65536, flush_rows=4096,
+                 flush_interval=1.0, segment_bytes=64 * 1024 * 1024):
+        self.log_dir = log_dir
+        self.capacity = capacity
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+
+        self._slots = [None] * capacity
+        self._write = 0  # total records appended
+        self._read = 0  # total records drained by the flusher
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+
+        self.appended = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_flush_ns = None
+
+        os.makedirs(log_dir, exist_ok=True)
+        # A restarted process never appends to an older segment
+        existing = _segment_dirs(log_dir)
+        self._next_seq = int(os.path.basename(existing[-1])[4:]) + 1 if existing else 1
+        self._segment = None
+
+        self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, model, inputs, encoder, output, model_version=None, latency_ns=0, username=""):
+        """
+        Queue one prediction: `inputs` are the raw UI values (scalars) and
+        `encoder` the serving model's FeatureEncoder. Returns False if dropped.
+        """
+        record = (model, inputs, encoder, float(output), model_version or "", int(latency_ns), username or "")
+        with self._lock:
+            if self._write - self._read >= self.capacity:
+                self.dropped += 1
+                return False
+            # Timestamped under the lock so each segment's ts_ns column stays sorted
+            self._slots[self._write % self.capacity] = (time.time_ns(),) + record
+            self._write += 1
+            self.appended += 1
+            pending = self._write - self._read
+        if pending >= self.flush_rows:
+            self._wake.set()
+        return True
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Drain everything buffered so far to disk; returns the number of records written"""
+        with self._flush_lock:
+            with self._lock:
+                start, stop = self._read, self._write
+                records = [self._slots[i % self.capacity] for i in range(start, stop)]
+                for i in range(start, stop):
+                    self._slots[i % self.capacity] = None
+                self._read = stop
+            if not records:
+                return 0
+            start_ns = time.perf_counter_ns()
+            try:
+                columns = self._columns(records)
+                self._active_segment().append(columns)
+                self.flushed += len(records)
+                self.flushes += 1
+            except Exception as e:
+                # Partially written columns would misalign this segment: start a new one
+                self.errors += 1
+                self.last_error = str(e)
+                self._segment = None
+                return 0
+            finally:
+                self.last_flush_ns = time.perf_counter_ns() - start_ns
+            return len(records)
+
+    def _active_segment(self):
+        if self._segment is None or self._segment.meta['bytes'] >= self.segment_bytes:
+            os.makedirs(self.log_dir, exist_ok=True)
+            while True:
+                path = os.path.join(self.log_dir, f"seg-{self._next_seq:06d}")
+                self._next_seq += 1
+                try:
+                    # Exclusive create: another process logging to this directory may have taken the number
+                    os.mkdir(path)
+                    break
+                except FileExistsError:
+                    continue
+            self._segment = _Segment(path)
+        return self._segment
+
+    def _columns(self, records):
+        """Records -> SCHEMA columns; features are encoded per encoder in one vectorized call"""
+        n = len(records)
+        ts, models, inputs, encoders, outputs, versions, latencies, users = zip(*records)
+        raw = pd.DataFrame(list(inputs))
+        if 'hour' not in raw.columns:
+            raw['hour'] = -1
+        raw['hour'] = raw['hour'].fillna(-1)
+
+        columns = {
+            'ts_ns': np.array(ts, dtype=np.int64),
+            'model': np.array([MODEL_CODES[m] for m in models], dtype=np.uint8),
+            'season': raw['season'].map(SEASON_MAP).fillna(0).to_numpy(),
+            'weather': raw['weather'].map(WEATHER_MAP).fillna(0).to_numpy(),
+            'temperature': raw['temperature'].to_numpy(),
+            'humidity': raw['humidity'].to_numpy(),
+            'wind_speed': raw['wind_speed'].to_numpy(),
+            'year': raw['year'].to_numpy(),
+            'month': raw['month'].to_numpy(),
+            'hour': raw['hour'].to_numpy(),
+            'holiday': (raw['holiday'] == "Yes").to_numpy(),
+            'working_day': (raw['working_day'] == "Yes").to_numpy(),
+            'weekday': (raw['day_type'] == "Weekday").to_numpy(),
+            'output': np.array(outputs),
+            'latency_ns': np.array(latencies, dtype=np.int64),
+            'model_version': np.array(versions, dtype=SCHEMA['model_version']),
+            'username': np.array(users, dtype=SCHEMA['username']),
+        }
+
+        features = np.full((n, len(HOURLY_FEATURE_COLS)), np.nan, dtype=np.float32)
+        groups = {}
+        for i, encoder in enumerate(encoders):
+            groups.setdefault(id(encoder), (encoder, []))[1].append(i)
+        for encoder, rows in groups.values():
+            rows = np.array(rows)
+            try:
+                encoded = encoder.encode(raw.iloc[rows])
+            except Exception as e:
+                # One encoder's rows keep NaN features rather than losing the whole batch
+                self.last_error = f"feature encoding skipped: {e}"
+                continue
+            for j, col in enumerate(encoder.feature_cols):
+                if col in _FEATURE_POS:
+                    features[rows, _FEATURE_POS[col]] = encoded[:, j]
+        for j, col in enumerate(HOURLY_FEATURE_COLS):
+            columns[f'feat_{col}'] = features[:, j]
+        return columns
+
+    def scan(self, start=None, end=None, columns=None, model=None):
+        """Time-range scan of what has been flushed so far (see scan_log)"""
+        return scan_log(self.log_dir, start, end, columns, model)
+
+    def close(self):
+        """Stop the flusher and write out whatever is still buffered"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = self._write - self._read
+        return {
+            'appended': self.appended,
+            'pending': pending,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'flushes': self.flushes,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_flush_ns': self.last_flush_ns,
+            'segment': None if self._segment is None else os.path.basename(self._segment.path),
+        }
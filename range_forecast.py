@@ -0,0 +1,189 @@
+"""
+Date-range forecasting
+
+Turns a start/end date (plus hours of day for the hourly model) into the
+raw UI inputs for every timestamp - season, year, month, holiday, working
+day and day type derived with vectorized date arithmetic and a precomputed
+holiday calendar - and scores the whole range in one batched predict call.
+
+Weather inputs are either fixed for the whole range (the form's values) or
+monthly normals from the history file (`monthly_normals`), which is what a
+"next 365 days" view needs.
+
+NOTE: season codes follow the UCI data the models were trained on
+(1 = 21 Dec - 20 Mar, 2 = 21 Mar - 20 Jun, 3 = 21 Jun - 22 Sep,
+4 = 23 Sep - 20 Dec), emitted as the matching SEASON_MAP labels.
+"""
+import time
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import Holiday, USFederalHolidayCalendar, nearest_workday
+
+from backtest import DAY_FILE
+from prediction_cache import model_fingerprint
+from prediction_engine import HOURS_OF_DAY, SEASON_MAP, WEATHER_MAP, model_input
+
+SEASON_LABELS = {code: label for label, code in SEASON_MAP.items()}
+WEATHER_LABELS = {code: label for label, code in WEATHER_MAP.items()}
+# (month * 100 + day) on which each UCI season starts
+SEASON_STARTS = [(321, 2), (621, 3), (923, 4), (1221, 1)]
+CONDITION_COLS = ['weather', 'temperature', 'humidity', 'wind_speed']
+
+# Longest range scored in one request (the hourly model scores 24 rows per day)
+MAX_RANGE_DAYS = 731
+
+
+# ============= CALENDAR =============
+
+class DCHolidayCalendar(USFederalHolidayCalendar):
+    """US federal holidays plus DC Emancipation Day - the holiday schedule of the UCI (Washington DC) data"""
+    rules = USFederalHolidayCalendar.rules + [
+        Holiday("DC Emancipation Day", month=4, day=16, start_date="2005-01-01", observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=8)
+def holiday_calendar(first_year=2011, last_year=2040):
+    """Sorted datetime64[D] array of observed holidays, computed once per year span"""
+    holidays = DCHolidayCalendar().holidays(start=f"{first_year}-01-01", end=f"{last_year}-12-31")
+    return holidays.values.astype('datetime64[D]')
+
+
+def is_holiday(days):
+    """Vectorized holiday flag for a DatetimeIndex of days (binary search in the precomputed calendar)"""
+    first_year, last_year = int(days.year.min()), int(days.year.max())
+    calendar = holiday_calendar(min(first_year, 2011), max(last_year, 2040))
+    values = days.values.astype('datetime64[D]')
+    idx = np.minimum(np.searchsorted(calendar, values), len(calendar) - 1)
+    return calendar[idx] == values
+
+
+def season_codes(days):
+    """UCI season code (1-4) per day"""
+    mmdd = days.month.to_numpy() * 100 + days.day.to_numpy()
+    codes = np.ones(len(days), dtype=np.int64)
+    for start, code in SEASON_STARTS:
+        codes[mmdd >= start] = code
+    return codes
+
+
+def calendar_inputs(start, end, hours=None):
+    """
+    Calendar part of the raw UI inputs for every day from `start` to `end`
+    (inclusive), or every (day, hour) when `hours` is given, plus a
+    'timestamp' column
+    """
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+    if len(days) == 0:
+        raise ValueError("End date is before start date")
+    if len(days) > MAX_RANGE_DAYS:
+        raise ValueError(f"Date range is limited to {MAX_RANGE_DAYS} days")
+
+    holiday = is_holiday(days)
+    weekend = days.dayofweek.to_numpy() >= 5
+    frame = pd.DataFrame({
+        'timestamp': days,
+        'season': np.array([SEASON_LABELS[c] for c in range(1, 5)])[season_codes(days) - 1],
+        'year': days.year.to_numpy(),
+        'month': days.month.to_numpy(),
+        'holiday': np.where(holiday, "Yes", "No"),
+        'working_day': np.where(weekend | holiday, "No", "Yes"),
+        'day_type': np.where(weekend, "Weekend", "Weekday"),
+    })
+    if hours is None:
+        return frame
+
+    hours = np.asarray(hours, dtype=np.int64)
+    frame = frame.loc[frame.index.repeat(len(hours))].reset_index(drop=True)
+    frame['hour'] = np.tile(hours, len(days))
+    frame['timestamp'] += pd.to_timedelta(frame['hour'], unit='h')
+    return frame
+
+
+# ============= WEATHER CONDITIONS =============
+
+def monthly_normals(day_file=DAY_FILE):
+    """
+    Typical weather per month (1-12) from the daily history in UI units:
+    modal weather, mean temperature / humidity / wind speed. None without history.
+    """
+    try:
+        history = pd.read_csv(day_file, usecols=['mnth', 'weathersit', 'temp', 'hum', 'windspeed'])
+    except (OSError, ValueError):
+        return None
+    grouped = history.groupby('mnth')
+    normals = pd.DataFrame({
+        'weather': grouped['weathersit'].agg(lambda codes: codes.mode().iloc[0]).map(WEATHER_LABELS),
+        'temperature': (grouped['temp'].mean() * 41.0).round(1),  # inverse of FeatureEncoder scaling
+        'humidity': (grouped['hum'].mean() * 100.0).round(1),
+        'wind_speed': (grouped['windspeed'].mean() * 67.0).round(1),
+    }).reindex(range(1, 13))
+    if normals.isna().any().any():
+        return None  # history does not cover every month
+    normals.attrs['version'] = model_fingerprint(day_file)
+    return normals
+
+
+def with_conditions(calendar, conditions=None, normals=None):
+    """Add weather inputs: monthly `normals` when given, else the fixed `conditions` dict"""
+    frame = calendar.copy()
+    if normals is not None:
+        by_month = normals.loc[frame['month']]
+        for col in CONDITION_COLS:
+            frame[col] = by_month[col].to_numpy()
+    else:
+        for col in CONDITION_COLS:
+            frame[col] = conditions[col]
+    return frame
+
+
+# ============= FORECAST =============
+
+def _range_key(name, model_version, start, end, hours, conditions, normals):
+    weather = ('normals', normals.attrs.get('version')) if normals is not None else \
+        tuple((col, conditions[col]) for col in CONDITION_COLS)
+    return (model_version, name, 'range', str(pd.Timestamp(start).date()), str(pd.Timestamp(end).date()),
+            None if hours is None else tuple(int(h) for h in hours), weather)
+
+
+def forecast_range(cache, name, predictor, model_version, encoder, start, end, conditions=None,
+                   normals=None, hours=None, timings=None):
+    """
+    Forecast every day (daily model) or every (day, hour) (hourly model; all 24
+    hours by default) from `start` to `end` inclusive in one predict call.
+    Returns a DataFrame of the inputs plus 'prediction', cached whole per
+    (model version, date range, hours, weather inputs) - shared, so do not modify it.
+    """
+    if encoder.has_hour and hours is None:
+        hours = HOURS_OF_DAY
+    elif not encoder.has_hour:
+        hours = None
+    if normals is None and conditions is None:
+        raise ValueError("Pass fixed weather conditions or monthly normals")
+
+    key = _range_key(name, model_version, start, end, hours, conditions, normals)
+    use_cache = cache is not None and model_version is not None
+    begin = time.perf_counter_ns()
+    result = cache.get(key) if use_cache else None
+    if result is None:
+        frame = with_conditions(calendar_inputs(start, end, hours), conditions, normals)
+        X = encoder.encode(frame)
+        prediction = np.asarray(predictor.predict(model_input(predictor, X, encoder.feature_cols)), dtype=np.float64)
+        frame['prediction'] = np.maximum(prediction, 0)  # as served in the app
+        result = frame
+        if use_cache:
+            cache.put(key, result)
+    if timings is not None:
+        timings['range'] = time.perf_counter_ns() - begin
+    return result
+
+
+def next_days(days, today=None):
+    """(start, end) for the next `days` days starting today"""
+    today = today or date.today()
+    start = pd.Timestamp(today)
+    return start, start + pd.Timedelta(days=days - 1)
+
@@ -0,0 +1,103 @@
+"""
+Sensitivity sweeps and what-if grids
+
+Takes the current UI scenario, replaces one input (a sweep) or two inputs
+(a grid, e.g. 24 hours x 51 temperatures = 1,224 rows) with their whole UI
+range and scores every point in a single batched predict call, so the
+prediction tabs can draw demand curves and surfaces without a rerun per
+slider position. Results are cached whole per (model version, model,
+swept parameters, rest of the scenario).
+"""
+import time
+
+import numpy as np
+
+from prediction_engine import WEATHER_MAP, model_input
+
+# Swept input -> (axis title, values); ranges match the prediction tab widgets
+SWEEP_PARAMS = {
+    'temperature': ("Temperature (°C)", np.arange(-10, 41)),
+    'humidity': ("Humidity (%)", np.arange(0, 101)),
+    'wind_speed': ("Wind Speed (km/h)", np.arange(0, 61)),
+    'month': ("Month", np.arange(1, 13)),
+    'hour': ("Hour of Day", np.arange(0, 24)),
+    'weather': ("Weather", np.array(list(WEATHER_MAP))),
+}
+
+# Default (x, y) heatmap axes per model
+GRID_PRESETS = {
+    'hourly': ('hour', 'temperature'),
+    'daily': ('month', 'weather'),
+}
+
+
+def sweep_params(encoder):
+    """Parameters that can be swept for a model (hour only for the hourly model)"""
+    return [param for param in SWEEP_PARAMS if param in encoder.input_cols]
+
+
+def sweep_inputs(inputs, param, values=None):
+    """The scenario with `param` replaced by its full range (one row per value)"""
+    values = SWEEP_PARAMS[param][1] if values is None else np.asarray(values)
+    return dict(inputs, **{param: values})
+
+
+def grid_inputs(inputs, x_param, y_param):
+    """The scenario over the full x_param x y_param grid, row-major by y (len(y) * len(x) rows)"""
+    x_values, y_values = SWEEP_PARAMS[x_param][1], SWEEP_PARAMS[y_param][1]
+    return dict(inputs, **{x_param: np.tile(x_values, len(y_values)),
+                           y_param: np.repeat(y_values, len(x_values))})
+
+
+def _scenario_key(inputs, encoder, params):
+    return tuple((col, inputs[col]) for col in encoder.input_cols if col not in params)
+
+
+def _score(predictor, encoder, inputs):
+    """One encode + predict call; clipped at zero demand (as served) and read-only for sharing"""
+    X = encoder.encode(inputs)
+    out = np.maximum(np.asarray(predictor.predict(model_input(predictor, X, encoder.feature_cols)),
+                                dtype=np.float64), 0)
+    out.setflags(write=False)
+    return out
+
+
+def _cached(cache, key, model_version, compute, timings, stage):
+    start = time.perf_counter_ns()
+    use_cache = cache is not None and model_version is not None
+    result = cache.get(key) if use_cache else None
+    if result is None:
+        result = compute()
+        if use_cache:
+            cache.put(key, result)
+    if timings is not None:
+        timings[stage] = time.perf_counter_ns() - start
+    return result
+
+
+def sensitivity_sweep(cache, name, predictor, model_version, encoder, inputs, param, timings=None):
+    """
+    (values, predictions) for `param` swept over its range with everything else
+    fixed at `inputs`. One predict call on a miss; `cache` is a PredictionCache
+    holding whole curves.
+    """
+    values = SWEEP_PARAMS[param][1]
+    key = (model_version, name, param, _scenario_key(inputs, encoder, (param,)))
+    curve = _cached(cache, key, model_version,
+                    lambda: _score(predictor, encoder, sweep_inputs(inputs, param, values)), timings, 'sweep')
+    return values, curve
+
+
+def what_if_grid(cache, name, predictor, model_version, encoder, inputs, x_param, y_param, timings=None):
+    """
+    (x values, y values, predictions of shape (len(y), len(x))) for two inputs
+    swept jointly with everything else fixed at `inputs`. One predict call on a miss.
+    """
+    if x_param == y_param:
+        raise ValueError("Heatmap axes must be two different inputs")
+    key = (model_version, name, (x_param, y_param), _scenario_key(inputs, encoder, (x_param, y_param)))
+    x_values, y_values = SWEEP_PARAMS[x_param][1], SWEEP_PARAMS[y_param][1]
+    grid = _cached(cache, key, model_version,
+                   lambda: _score(predictor, encoder, grid_inputs(inputs, x_param, y_param))
+                   .reshape(len(y_values), len(x_values)), timings, 'grid')
+    return x_values, y_values, grid
@@ -0,0 +1,218 @@
+"""
+Shadow scoring of a candidate model on live traffic
+
+Every live prediction is queued (non-blocking) to a background worker that
+scores the same raw inputs through the candidate model and through the
+production predictor. One compact CSV row per request records both outputs,
+their delta and both latencies; summary() aggregates disagreement and
+relative speed per model.
+
+The candidate lives in its own directory laid out like the app's
+(daily/hourly .pkl files and/or a model_artifacts/ export), e.g.
+    RIDEWISE_SHADOW_DIR=candidate/ streamlit run app.py
+"""
+import csv
+import os
+import pickle
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from latency_stats import LatencyHistogram
+from model_artifacts import MANIFEST_NAME, artifact_is_current, load_artifact, read_manifest
+from model_registry import DAILY_MODEL_FILE, HOURLY_MODEL_FILE, MODEL_ARTIFACT_DIR
+from prediction_cache import model_fingerprint
+from prediction_engine import DAILY_FEATURE_COLS, HOURLY_FEATURE_COLS, FeatureEncoder, model_input
+
+SHADOW_DIR = os.environ.get("RIDEWISE_SHADOW_DIR")
+SHADOW_LOG_FILE = os.environ.get("RIDEWISE_SHADOW_LOG", "shadow_log.csv")
+
+# A request "disagrees" when any row differs by more than this many bikes
+DISAGREE_THRESHOLD = 25
+
+LOG_FIELDS = ['timestamp', 'model', 'rows', 'production_version', 'candidate_version',
+              'production_mean', 'candidate_mean', 'mean_abs_delta', 'max_abs_delta',
+              'production_ms', 'candidate_ms']
+
+_DEFAULT_COLS = {'daily': DAILY_FEATURE_COLS, 'hourly': HOURLY_FEATURE_COLS}
+
+
+def load_candidate(candidate_dir):
+    """
+    Load whichever candidate models exist in `candidate_dir`:
+    {name: (predictor, encoder, version)}. An up-to-date artifact export wins over .pkl files.
+    """
+    artifact_dir = os.path.join(candidate_dir, MODEL_ARTIFACT_DIR)
+    entries = {}
+    if os.path.exists(os.path.join(artifact_dir, MANIFEST_NAME)):
+        entries = read_manifest(artifact_dir)['models']
+    models, versions = {}, {}
+    for name, filename in (('daily', DAILY_MODEL_FILE), ('hourly', HOURLY_MODEL_FILE)):
+        path = os.path.join(candidate_dir, filename)
+        if name in entries and artifact_is_current(entries[name], path):
+            models[name] = load_artifact(artifact_dir, entries[name], mmap=True)
+            versions[name] = entries[name]['fingerprint']
+        elif os.path.exists(path):
+            # No export, or the .pkl changed after it
+            with open(path, 'rb') as f:
+                models[name] = pickle.load(f)
+            versions[name] = model_fingerprint(path)
+
+    return {name: (model, FeatureEncoder.for_model(model, _DEFAULT_COLS[name]), versions[name])
+            for name, model in models.items() if name in _DEFAULT_COLS}
+
+
+class ShadowScorer:
+    """Background worker comparing a candidate model against production on live inputs"""
+
+    def __init__(self, candidates, log_file=SHADOW_LOG_FILE, max_queue=256, window=2048):
+        self.candidates = candidates
+        self.log_file = log_file
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.window = window
+        self.submitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, predictor, encoder, version, inputs, production_output):
+        """
+        Queue one live request. Never blocks: when the worker falls behind
+        the request is dropped (and counted) instead of delaying the user.
+        """
+        if name not in self.candidates or predictor is None:
+            return False
+        try:
+            self._queue.put_nowait((name, predictor, encoder, version, inputs,
+                                    np.asarray(production_output, dtype=np.float64)))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _score(self, predictor, encoder, inputs):
+        X = encoder.encode(inputs)
+        start = time.perf_counter_ns()
+        out = np.asarray(predictor.predict(model_input(predictor, X, encoder.feature_cols)), dtype=np.float64)
+        return out, time.perf_counter_ns() - start
+
+    def _run(self):
+        while True:
+            name, predictor, encoder, version, inputs, production_output = self._queue.get()
+            try:
+                candidate, candidate_encoder, candidate_version = self.candidates[name]
+                # Time both models here, on the same rows and thread, for a fair speed comparison
+                _, production_ns = self._score(predictor, encoder, inputs)
+                candidate_output, candidate_ns = self._score(candidate, candidate_encoder, inputs)
+                self._record(name, version, candidate_version, production_output,
+                             candidate_output, production_ns, candidate_ns)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+            finally:
+                self._queue.task_done()
+
+    def _model_stats(self, name):
+        if name not in self._stats:
+            self._stats[name] = {
+                'requests': 0, 'rows': 0, 'disagreements': 0, 'abs_delta_sum': 0.0,
+                'signed_delta_sum': 0.0, 'max_abs_delta': 0.0,
+                'abs_delta': LatencyHistogram(self.window),  # ring buffer, reused for deltas
+                'production_ns': LatencyHistogram(self.window),
+                'candidate_ns': LatencyHistogram(self.window),
+            }
+        return self._stats[name]
+
+    def _record(self, name, production_version, candidate_version, production_output,
+                candidate_output, production_ns, candidate_ns):
+        delta = candidate_output - production_output
+        abs_delta = np.abs(delta)
+        row = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'model': name,
+            'rows': len(delta),
+            'production_version': production_version,
+            'candidate_version': candidate_version,
+            'production_mean': round(float(production_output.mean()), 3),
+            'candidate_mean': round(float(candidate_output.mean()), 3),
+            'mean_abs_delta': round(float(abs_delta.mean()), 3),
+            'max_abs_delta': round(float(abs_delta.max()), 3),
+            'production_ms': round(production_ns / 1e6, 4),
+            'candidate_ms': round(candidate_ns / 1e6, 4),
+        }
+
+        with self._lock:
+            stats = self._model_stats(name)
+            stats['requests'] += 1
+            stats['rows'] += len(delta)
+            stats['disagreements'] += int(abs_delta.max() > DISAGREE_THRESHOLD)
+            stats['abs_delta_sum'] += float(abs_delta.sum())
+            stats['signed_delta_sum'] += float(delta.sum())
+            stats['max_abs_delta'] = max(stats['max_abs_delta'], float(abs_delta.max()))
+            stats['abs_delta'].record(int(round(abs_delta.max() * 1000)))  # milli-bikes
+            stats['production_ns'].record(production_ns)
+            stats['candidate_ns'].record(candidate_ns)
+            self._append_log(row)
+
+    def _append_log(self, row):
+        if not self.log_file:
+            return
+        file_exists = os.path.isfile(self.log_file)
+        try:
+            with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerow(row)
+        except OSError as e:
+            self.last_error = str(e)
+
+    def summary(self):
+        """Rows of per-model disagreement and relative speed for display"""
+        rows = []
+        with self._lock:
+            for name, stats in sorted(self._stats.items()):
+                prod_p50 = stats['production_ns'].percentiles((50,))[50]
+                cand_p50 = stats['candidate_ns'].percentiles((50,))[50]
+                delta_p95 = stats['abs_delta'].percentiles((95,))[95]
+                rows.append({
+                    'model': name,
+                    'requests': stats['requests'],
+                    'rows': stats['rows'],
+                    'disagreement_rate': stats['disagreements'] / stats['requests'],
+                    'mean_abs_delta': stats['abs_delta_sum'] / stats['rows'],
+                    'mean_delta': stats['signed_delta_sum'] / stats['rows'],
+                    'p95_max_abs_delta': None if delta_p95 is None else delta_p95 / 1000,
+                    'max_abs_delta': stats['max_abs_delta'],
+                    'production_p50_ms': None if prod_p50 is None else prod_p50 / 1e6,
+                    'candidate_p50_ms': None if cand_p50 is None else cand_p50 / 1e6,
+                    'candidate_speedup': (prod_p50 / cand_p50) if prod_p50 and cand_p50 else None,
+                })
+        return rows
+
+    def status(self):
+        with self._lock:
+            submitted, dropped = self.submitted, self.dropped
+        return {
+            'candidates': {name: version for name, (_, _, version) in self.candidates.items()},
+            'submitted': submitted,
+            'dropped': dropped,
+            'pending': self._queue.qsize(),
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'log_file': self.log_file,
+        }
+
+    def join(self):
+        """Block until every queued request has been scored (tests / offline use)"""
+        self._queue.join()
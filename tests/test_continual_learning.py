@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import prediction_log
+from continual_learning import BUFFER_COLS, TARGET_COL, TrainingBuffer, actuals_from_log
+from prediction_engine import DAILY_ENCODER, HOURLY_ENCODER
+
+TZ = "America/New_York"
+INPUTS = dict(season="Spring", weather="Clear", temperature=20.0, humidity=50.0, wind_speed=10.0,
+              year=2024, month=3, holiday="No", working_day="No", day_type="Weekend")
+
+
+class _Clock:
+    """time module whose time_ns() is set by the test"""
+
+    def __init__(self):
+        self.ns = 0
+
+    def time_ns(self):
+        return self.ns
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def _utc_ns(local):
+    return pd.Timestamp(local).tz_localize(TZ).tz_convert('UTC').value
+
+
+@pytest.fixture
+def write_log(tmp_path, monkeypatch):
+    """Write (local wall-clock time, model, inputs) predictions through the real PredictionLog"""
+    clock = _Clock()
+    monkeypatch.setattr(prediction_log, 'time', clock)
+
+    def write(records):
+        log = prediction_log.PredictionLog(str(tmp_path / 'log'))
+        for local, model, inputs in records:
+            clock.ns = _utc_ns(local)
+            encoder = HOURLY_ENCODER if model == 'hourly' else DAILY_ENCODER
+            assert log.append(model, inputs, encoder, 100.0)
+        log.close()
+        return str(tmp_path / 'log')
+    return write
+
+
+def _observations(hours, counts, weathersit=1, temp=20 / 41.0, hum=0.5):
+    return pd.DataFrame({'timestamp': hours, 'count': counts, 'weathersit': weathersit, 'temp': temp, 'hum': hum})
+
+
+def test_hourly_labels_match_across_dst_change(write_log):
+    # 2024-03-10 (a Sunday): New York clocks jump from 02:00 to 03:00
+    hours = ["2024-03-10 00:00", "2024-03-10 01:00", "2024-03-10 03:00", "2024-03-10 04:00"]
+    log_dir = write_log([(h.replace(":00", ":30", 1), 'hourly', dict(INPUTS, hour=int(h[11:13]))) for h in hours])
+    labelled = actuals_from_log('hourly', _observations(hours, [10, 11, 13, 14]), log_dir, TZ)
+    assert labelled['hr'].tolist() == [0, 1, 3, 4]
+    assert labelled[TARGET_COL].tolist() == [10, 11, 13, 14]
+    assert list(labelled.columns) == BUFFER_COLS['hourly'] + [TARGET_COL]
+
+
+def test_what_if_scenarios_are_not_labelled(write_log):
+    hour = "2024-03-10 12:00"
+    log_dir = write_log([
+        ("2024-03-10 12:10", 'hourly', dict(INPUTS, hour=12)),                            # what happened
+        ("2024-03-10 12:20", 'hourly', dict(INPUTS, hour=12, weather="Heavy Rain/Snow")),  # other weather
+        ("2024-03-10 12:30", 'hourly', dict(INPUTS, hour=12, temperature=5.0)),           # other temperature
+        ("2024-03-10 12:40", 'hourly', dict(INPUTS, hour=12, humidity=90.0)),             # other humidity
+        ("2024-03-10 12:50", 'hourly', dict(INPUTS, hour=12, working_day="Yes", day_type="Weekday")),
+        ("2024-03-10 12:55", 'hourly', dict(INPUTS, hour=18)),                            # another hour
+    ])
+    labelled = actuals_from_log('hourly', _observations([hour], [250]), log_dir, TZ)
+    assert len(labelled) == 1
+    assert labelled.loc[0, 'weathersit'] == 1 and labelled.loc[0, TARGET_COL] == 250
+
+
+def test_small_condition_differences_are_tolerated(write_log):
+    log_dir = write_log([("2024-03-10 12:10", 'hourly', dict(INPUTS, hour=12, temperature=21.0, humidity=55.0))])
+    assert len(actuals_from_log('hourly', _observations(["2024-03-10 12:00"], [250]), log_dir, TZ)) == 1
+
+
+def test_daily_labels_need_a_full_observed_day(write_log):
+    day = pd.date_range("2024-06-05", periods=24, freq='h')  # a Wednesday
+    inputs = dict(INPUTS, season="Summer", month=6, working_day="Yes", day_type="Weekday")
+    log_dir = write_log([("2024-06-05 12:00", 'daily', inputs)])
+    observed = _observations(day.astype(str), np.full(24, 10), weathersit=[1] * 20 + [2] * 4)
+    labelled = actuals_from_log('daily', observed, log_dir, TZ)
+    assert labelled[TARGET_COL].tolist() == [240]
+    assert actuals_from_log('daily', observed.iloc[:23], log_dir, TZ).empty
+
+
+def test_observed_conditions_are_required(tmp_path):
+    with pytest.raises(ValueError, match="weathersit"):
+        actuals_from_log('hourly', pd.DataFrame({'timestamp': ["2024-03-10 12:00"], 'count': [1]}), str(tmp_path))
+
+
+def test_buffer_keeps_newest_rows(tmp_path):
+    buffer = TrainingBuffer(str(tmp_path), max_rows=5)
+    cols = BUFFER_COLS['daily'] + [TARGET_COL]
+    for start in range(0, 30, 6):
+        rows = pd.DataFrame({col: np.arange(start, start + 6, dtype=float) for col in cols})
+        assert buffer.append('daily', rows) == 6
+    loaded = buffer.load('daily')
+    assert loaded[TARGET_COL].tolist() == [25, 26, 27, 28, 29]
@@ -0,0 +1,144 @@
+import http.client
+import json
+import socket
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from demand_state import DEFAULT_KEY, hour_index
+from inference_service import MAX_BODY_BYTES, MAX_ROWS, RequestError, make_handler, parse_observations, parse_rows
+from latency_stats import LatencyRecorder
+from prediction_engine import HOURLY_INPUT_COLS
+
+ROW = {"season": "Summer", "weather": "Clear", "temperature": 25, "humidity": 50, "wind_speed": 10,
+       "year": 2024, "month": 6, "hour": 8, "holiday": "No", "working_day": "Yes", "day_type": "Weekday"}
+
+
+# ============= REQUEST PARSING =============
+
+def test_parse_rows_single_object():
+    columns, single = parse_rows(ROW, HOURLY_INPUT_COLS)
+    assert single
+    assert columns == {col: [ROW[col]] for col in HOURLY_INPUT_COLS}
+
+
+def test_parse_rows_array_is_transposed():
+    rows = [ROW, dict(ROW, hour=9, weather="Mist/Cloudy")]
+    columns, single = parse_rows(rows, HOURLY_INPUT_COLS)
+    assert not single
+    assert columns['hour'] == [8, 9] and columns['weather'] == ["Clear", "Mist/Cloudy"]
+
+
+@pytest.mark.parametrize("payload, status, message", [
+    ([], 400, "non-empty array"),
+    ("text", 400, "non-empty array"),
+    ([ROW, 3], 400, "Row 1 is not an object"),
+    ({k: v for k, v in ROW.items() if k != 'hour'}, 400, "missing fields"),
+    (dict(ROW, temperature="25"), 400, "'temperature' must be a number"),
+    (dict(ROW, year=True), 400, "'year' must be a number"),
+    (dict(ROW, season=1), 400, "'season' must be a string"),
+    ([ROW] * (MAX_ROWS + 1), 413, "At most"),
+])
+def test_parse_rows_rejects_bad_payloads(payload, status, message):
+    with pytest.raises(RequestError) as e:
+        parse_rows(payload, HOURLY_INPUT_COLS)
+    assert e.value.status == status
+    assert message in str(e.value)
+
+
+def test_parse_observations():
+    keys, hours, counts = parse_observations([
+        {"key": "dc", "timestamp": "2024-06-01 08:00", "count": 120},
+        {"timestamp": "2024-06-01T09:00:00", "count": 95.5},
+    ])
+    assert keys == ["dc", DEFAULT_KEY]
+    assert list(hours) == list(hour_index(["2024-06-01 08:00", "2024-06-01 09:00"]))
+    assert counts == [120, 95.5]
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"timestamp": "2024-06-01 08:00", "count": -1}, "'count' must be a non-negative number"),
+    ({"timestamp": "2024-06-01 08:00", "count": True}, "'count' must be a non-negative number"),
+    ({"timestamp": "2024-06-01 08:00"}, "'count' must be a non-negative number"),
+    ({"timestamp": 1717228800, "count": 5}, "'timestamp' must be a date-time string"),
+    ({"timestamp": "not a date", "count": 5}, "Could not parse 'timestamp'"),
+    ([], "non-empty array"),
+])
+def test_parse_observations_rejects_bad_payloads(payload, message):
+    with pytest.raises(RequestError) as e:
+        parse_observations(payload)
+    assert e.value.status == 400
+    assert message in str(e.value)
+
+
+# ============= KEEP-ALIVE =============
+
+class _StubService:
+    """Just enough of InferenceService for the handler"""
+
+    def __init__(self):
+        self.latency = LatencyRecorder()
+
+    def predict(self, name, payload):
+        return {'model': name, 'rows': len(payload) if isinstance(payload, list) else 1}
+
+    def health(self):
+        return 200, {'ready': True}
+
+    def stats(self):
+        return {'stub': True}
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(_StubService()))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def _raw(address, data):
+    """Send raw bytes on one connection and read until the server closes it (or goes quiet)"""
+    with socket.create_connection(address, timeout=2) as sock:
+        sock.sendall(data)
+        received = b''
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                received += chunk
+        except socket.timeout:
+            pass
+    return received
+
+
+def test_valid_request_keeps_connection_alive(server):
+    conn = http.client.HTTPConnection(*server, timeout=2)
+    for _ in range(2):
+        conn.request("POST", "/predict/hourly", body=json.dumps(ROW))
+        response = conn.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read()) == {'model': 'hourly', 'rows': 1}
+        assert response.getheader("Connection") is None
+    conn.close()
+
+
+@pytest.mark.parametrize("path, length, status", [
+    ("/nope", None, 404),
+    ("/predict/daily", str(MAX_BODY_BYTES + 1), 413),
+    ("/predict/daily", "-5", 400),
+    ("/predict/daily", "abc", 400),
+])
+def test_unread_body_is_never_parsed_as_a_request(server, path, length, status):
+    smuggled = b"GET /stats HTTP/1.1\r\nHost: x\r\n\r\n"
+    length = str(len(smuggled)) if length is None else length
+    received = _raw(server, f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n".encode()
+                    + smuggled)
+    assert received.startswith(f"HTTP/1.1 {status}".encode())
+    assert b"Connection: close" in received
+    assert received.count(b"HTTP/1.1 ") == 1  # /stats was not served
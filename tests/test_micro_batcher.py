@@ -0,0 +1,100 @@
+import threading
+
+import numpy as np
+import pytest
+
+import micro_batcher
+from micro_batcher import MicroBatcher
+
+
+class _SumModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        X = np.asarray(X)
+        self.calls.append(len(X))
+        return X.sum(axis=1)
+
+
+def _concurrent(batcher, model, matrices):
+    """Submit every matrix from its own thread at once; returns results (or exceptions) in order"""
+    results = [None] * len(matrices)
+    barrier = threading.Barrier(len(matrices))
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = batcher.predict(model, None, matrices[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(matrices))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads), "a caller never got an answer"
+    return results
+
+
+def test_results_fan_out_to_each_caller():
+    batcher = MicroBatcher(max_batch_size=1000, max_wait_ms=200)
+    model = _SumModel()
+    matrices = [np.full((i + 1, 3), float(i)) for i in range(8)]
+    results = _concurrent(batcher, model, matrices)
+    for X, result in zip(matrices, results):
+        assert np.array_equal(result, X.sum(axis=1))
+    assert sum(model.calls) == sum(len(X) for X in matrices)
+    assert len(model.calls) < len(matrices)  # coalesced
+    assert batcher.stats()['requests'] == len(matrices)
+
+
+def test_predictors_are_never_mixed_in_one_call():
+    batcher = MicroBatcher(max_wait_ms=100)
+    a, b = _SumModel(), _SumModel()
+    X = np.ones((2, 3))
+    results = [None, None]
+    threads = [threading.Thread(target=lambda i=i, m=m: results.__setitem__(i, batcher.predict(m, None, X)))
+               for i, m in enumerate((a, b))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert a.calls == [2] and b.calls == [2]
+    assert all(np.array_equal(result, [3.0, 3.0]) for result in results)
+
+
+def test_model_error_reaches_every_caller_and_worker_survives():
+    class Broken:
+        def predict(self, X):
+            raise RuntimeError("boom")
+
+    batcher = MicroBatcher(max_wait_ms=50)
+    results = _concurrent(batcher, Broken(), [np.ones((1, 2))] * 3)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert np.array_equal(batcher.predict(_SumModel(), None, np.ones((1, 2))), [2.0])
+
+
+def test_failed_concatenate_does_not_kill_the_worker(monkeypatch):
+    batcher = MicroBatcher(max_wait_ms=300)  # long enough for the three callers to share a batch
+
+    def no_memory(*args, **kwargs):
+        raise MemoryError("coalesced batch too large")
+
+    monkeypatch.setattr(micro_batcher.np, 'concatenate', no_memory)
+    results = _concurrent(batcher, _SumModel(), [np.ones((1, 2))] * 3)
+    assert all(isinstance(result, MemoryError) for result in results)
+    monkeypatch.undo()
+    assert batcher._thread.is_alive()
+    assert np.array_equal(batcher.predict(_SumModel(), None, np.ones((1, 2))), [2.0])
+
+
+def test_wrong_output_length_is_an_error():
+    class Short:
+        def predict(self, X):
+            return np.zeros(len(X) - 1)
+
+    batcher = MicroBatcher(max_wait_ms=0)
+    with pytest.raises(ValueError):
+        batcher.predict(Short(), None, np.ones((3, 2)))
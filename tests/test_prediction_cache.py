@@ -0,0 +1,85 @@
+import numpy as np
+
+import prediction_cache
+from prediction_cache import PredictionCache, predict_cached
+from prediction_engine import HOURLY_FEATURE_COLS, FeatureEncoder, random_inputs
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _CountingModel:
+    def __init__(self):
+        self.rows = []
+
+    def predict(self, X):
+        X = np.asarray(X)
+        self.rows.append(len(X))
+        return X.sum(axis=1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    cache = PredictionCache(ttl=10)
+    cache.put('a', 1.0)
+    clock.now += 9
+    assert cache.get('a') == 1.0
+    clock.now += 2
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['hits'] == 1 and stats['misses'] == 1 and stats['size'] == 0
+
+
+def test_without_ttl_entries_never_expire(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    cache = PredictionCache()
+    cache.put('a', 1.0)
+    clock.now += 1e9
+    assert cache.get('a') == 1.0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = PredictionCache(maxsize=2)
+    cache.put('a', 1.0)
+    cache.put('b', 2.0)
+    cache.get('a')
+    cache.put('c', 3.0)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1.0 and cache.get('c') == 3.0
+    assert cache.stats()['evictions'] == 1
+
+
+def test_model_version_change_invalidates():
+    cache = PredictionCache()
+    cache.set_model_versions(['d1', 'h1'])
+    cache.put('a', 1.0)
+    cache.set_model_versions(['d1', 'h1'])
+    assert cache.get('a') == 1.0
+    cache.set_model_versions(['d1', 'h2'])
+    assert cache.get('a') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_predict_cached_scores_only_misses():
+    encoder = FeatureEncoder(HOURLY_FEATURE_COLS)
+    model = _CountingModel()
+    cache = PredictionCache()
+    inputs = random_inputs(10, seed=3)
+    first = predict_cached(cache, model, 'v1', encoder, inputs.iloc[:6])
+    timings = {}
+    second = predict_cached(cache, model, 'v1', encoder, inputs, timings=timings)
+    assert model.rows == [6, 4]
+    assert np.array_equal(second[:6], first)
+    assert np.allclose(second, encoder.encode(inputs).sum(axis=1))
+    assert set(timings) == {'encode', 'cache', 'inference'}
+
+    # Another model version never reuses the entries
+    predict_cached(cache, model, 'v2', encoder, inputs)
+    assert model.rows[-1] == 10
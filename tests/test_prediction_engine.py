@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction_engine import (
+    DAILY_FEATURE_COLS, DAILY_INPUT_COLS, HOURLY_FEATURE_COLS, HOURLY_INPUT_COLS, FeatureEncoder,
+    preprocess_daily_features, preprocess_hourly_features, random_inputs
+)
+
+SEASON_MAP = {"Spring": 1, "Summer": 2, "Fall": 3, "Winter": 4}
+WEATHER_MAP = {"Clear": 1, "Mist/Cloudy": 2, "Light Rain/Snow": 3, "Heavy Rain/Snow": 4}
+
+
+def legacy_features(season, weather, temperature, humidity, wind_speed, year, month, *rest):
+    """The original app.py preprocess_* dict -> DataFrame path, as the reference"""
+    if len(rest) == 4:
+        hour, holiday, working_day, day_type = rest
+    else:
+        (holiday, working_day, day_type), hour = rest, None
+    features = {
+        'season': SEASON_MAP.get(season, 1),
+        'yr': 1 if year >= 2012 else 0,
+        'mnth': month,
+        'holiday': 1 if holiday == "Yes" else 0,
+        'weekday': 1 if day_type == "Weekday" else 0,
+        'workingday': 1 if working_day == "Yes" else 0,
+        'weathersit': WEATHER_MAP.get(weather, 1),
+        'temp': temperature / 41.0,
+        'atemp': (temperature + 5) / 50.0,
+        'hum': humidity / 100.0,
+        'windspeed': wind_speed / 67.0,
+    }
+    cols = DAILY_FEATURE_COLS
+    if hour is not None:
+        features['hr'] = hour
+        cols = HOURLY_FEATURE_COLS
+    return pd.DataFrame([features])[cols].to_numpy(dtype=np.float64)
+
+
+@pytest.mark.parametrize("hourly", [True, False])
+def test_encode_row_matches_legacy_preprocess(hourly):
+    feature_cols, input_cols = (HOURLY_FEATURE_COLS, HOURLY_INPUT_COLS) if hourly else \
+        (DAILY_FEATURE_COLS, DAILY_INPUT_COLS)
+    encoder = FeatureEncoder(feature_cols)
+    inputs = random_inputs(200, hourly=hourly, seed=1)
+    for row in inputs[input_cols].itertuples(index=False):
+        assert np.array_equal(encoder.encode_row(*row), legacy_features(*row))
+
+
+@pytest.mark.parametrize("hourly", [True, False])
+def test_batch_encode_matches_rows(hourly):
+    feature_cols, input_cols = (HOURLY_FEATURE_COLS, HOURLY_INPUT_COLS) if hourly else \
+        (DAILY_FEATURE_COLS, DAILY_INPUT_COLS)
+    encoder = FeatureEncoder(feature_cols)
+    inputs = random_inputs(500, hourly=hourly, seed=2)
+    batch = encoder.encode(inputs)
+    rows = np.vstack([encoder.encode_row(*row).copy() for row in inputs[input_cols].itertuples(index=False)])
+    assert batch.shape == (500, len(feature_cols))
+    assert np.array_equal(batch, rows)
+
+    out = encoder.new_buffer(500)
+    assert encoder.encode(inputs, out=out) is out
+    assert np.allclose(FeatureEncoder(feature_cols, dtype=np.float32).encode(inputs), batch, atol=1e-6)
+
+
+def test_unknown_labels_fall_back_like_legacy():
+    row = ("Monsoon", "Hail", 20.0, 50.0, 10.0, 2024, 6, 12, "No", "Yes", "Weekday")
+    assert np.array_equal(FeatureEncoder(HOURLY_FEATURE_COLS).encode_row(*row), legacy_features(*row))
+
+
+def test_missing_input_column_raises():
+    inputs = random_inputs(3).drop(columns=['humidity'])
+    with pytest.raises(KeyError):
+        FeatureEncoder(HOURLY_FEATURE_COLS).encode(inputs)
+
+
+def test_preprocess_wrappers_keep_training_column_order():
+    daily = preprocess_daily_features("Summer", "Clear", 25.0, 60.0, 12.0, 2025, 7, "No", "Yes", "Weekday")
+    hourly = preprocess_hourly_features("Summer", "Clear", 25.0, 60.0, 12.0, 2025, 7, 8, "No", "Yes", "Weekday")
+    assert list(daily.columns) == DAILY_FEATURE_COLS
+    assert list(hourly.columns) == HOURLY_FEATURE_COLS
+    assert hourly.columns[-1] == 'hr'
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from prediction_intervals import IntervalTable, conformal_quantile, interval_widths
+
+
+def test_conformal_quantile_is_the_corrected_order_statistic():
+    residuals = np.arange(1, 20, dtype=float)  # n = 19
+    # ceil((19 + 1) * 0.9) = 18th smallest
+    assert conformal_quantile(residuals[::-1], 0.9) == 18.0
+    assert conformal_quantile(residuals, 0.5) == 10.0
+
+
+def test_conformal_quantile_caps_at_the_largest_residual():
+    assert conformal_quantile([3.0, 1.0, 2.0], 0.95) == 3.0
+
+
+def test_conformal_quantile_empty():
+    assert conformal_quantile([], 0.9) is None
+
+
+@pytest.mark.parametrize("coverage", [0.8, 0.9, 0.95])
+def test_conformal_quantile_covers_new_residuals(coverage):
+    rng = np.random.default_rng(0)
+    calibration, fresh = np.abs(rng.normal(size=2000)), np.abs(rng.normal(size=20000))
+    width = conformal_quantile(calibration, coverage)
+    assert abs(np.mean(fresh <= width) - coverage) < 0.03
+
+
+def test_thin_groups_fall_back_to_overall_width():
+    residuals = np.concatenate([np.full(40, 1.0), np.full(5, 100.0)])
+    groups = np.array([0] * 40 + [1] * 5)
+    widths = interval_widths(residuals, groups, coverages=(0.9,), min_group_rows=30)['0.9']
+    assert widths['by_value'] == {'0': 1.0}
+    table = IntervalTable(widths['by_value'], widths['overall'], 0.9)
+    lower, upper = table.bounds([10.0, 10.0, 0.5], [0, 1, 0])
+    assert np.array_equal(upper, [11.0, 10.0 + widths['overall'], 1.5])
+    assert np.array_equal(lower, [9.0, max(0.0, 10.0 - widths['overall']), 0.0])
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from range_forecast import MAX_RANGE_DAYS, calendar_inputs, is_holiday, season_codes
+
+
+@pytest.mark.parametrize("day", [
+    "2011-04-15",  # DC Emancipation Day, 16 Apr fell on a Saturday
+    "2012-04-16",
+    "2017-04-17",  # 16 Apr fell on a Sunday
+    "2024-01-01", "2024-01-15", "2024-02-19", "2024-05-27", "2024-06-19",
+    "2024-07-04", "2024-09-02", "2024-10-14", "2024-11-11", "2024-11-28", "2024-12-25",
+    "2020-07-03",  # 4 Jul fell on a Saturday
+    "2022-12-26",  # 25 Dec fell on a Sunday
+])
+def test_dc_holidays(day):
+    assert is_holiday(pd.DatetimeIndex([day]))[0]
+
+
+@pytest.mark.parametrize("day", ["2011-04-16", "2024-03-15", "2024-11-29", "2024-12-24", "2035-08-01"])
+def test_regular_days(day):
+    assert not is_holiday(pd.DatetimeIndex([day]))[0]
+
+
+def test_uci_season_boundaries():
+    days = pd.DatetimeIndex(["2024-03-20", "2024-03-21", "2024-06-20", "2024-06-21",
+                             "2024-09-22", "2024-09-23", "2024-12-20", "2024-12-21"])
+    assert season_codes(days).tolist() == [1, 2, 2, 3, 3, 4, 4, 1]
+
+
+def test_calendar_inputs_days_and_hours():
+    daily = calendar_inputs("2024-07-04", "2024-07-06")
+    assert daily['holiday'].tolist() == ["Yes", "No", "No"]
+    assert daily['working_day'].tolist() == ["No", "Yes", "No"]
+    assert daily['day_type'].tolist() == ["Weekday", "Weekday", "Weekend"]
+
+    hourly = calendar_inputs("2024-07-04", "2024-07-05", hours=[0, 8, 17])
+    assert len(hourly) == 6
+    assert hourly['hour'].tolist() == [0, 8, 17] * 2
+    assert hourly['timestamp'].iloc[4] == pd.Timestamp("2024-07-05 08:00")
+    assert np.all(hourly['month'] == 7)
+
+
+def test_calendar_inputs_rejects_bad_ranges():
+    with pytest.raises(ValueError):
+        calendar_inputs("2024-07-05", "2024-07-04")
+    with pytest.raises(ValueError):
+        calendar_inputs("2024-01-01", pd.Timestamp("2024-01-01") + pd.Timedelta(days=MAX_RANGE_DAYS))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeRegressor
+
+from prediction_engine import HOURLY_FEATURE_COLS, FeatureEncoder, random_inputs
+from tree_ensemble import FlatTreeEnsemble, flatten_model
+
+
+@pytest.fixture(scope='module')
+def data():
+    X = FeatureEncoder(HOURLY_FEATURE_COLS).encode(random_inputs(600, seed=4))
+    rng = np.random.default_rng(0)
+    y = 50 + 200 * X[:, HOURLY_FEATURE_COLS.index('temp')] + 10 * X[:, -1] + rng.normal(0, 5, len(X))
+    return X[:500], y[:500], X[500:]
+
+
+SKLEARN_MODELS = [
+    DecisionTreeRegressor(max_depth=6, random_state=0),
+    RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0),
+    ExtraTreesRegressor(n_estimators=15, max_depth=8, random_state=0),
+    GradientBoostingRegressor(n_estimators=40, max_depth=3, random_state=0),
+]
+
+
+@pytest.mark.parametrize("model", SKLEARN_MODELS, ids=lambda m: type(m).__name__)
+def test_flat_matches_sklearn_predict(model, data):
+    X, y, X_new = data
+    model.fit(X, y)
+    flat = flatten_model(model, check_X=X[:50])
+    assert flat is not None
+    assert np.allclose(flat.predict(X_new), model.predict(X_new), rtol=1e-6, atol=1e-6)
+
+
+def test_flat_matches_xgboost_predict(data):
+    xgb = pytest.importorskip('xgboost')
+    X, y, X_new = data
+    model = xgb.XGBRegressor(n_estimators=30, max_depth=4, n_jobs=1).fit(X, y)
+    flat = flatten_model(model, check_X=X[:50])
+    assert flat is not None
+    assert np.allclose(flat.predict(X_new), model.predict(X_new), rtol=1e-5, atol=1e-3)
+
+
+def test_array_round_trip(data):
+    X, y, X_new = data
+    flat = flatten_model(RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y))
+    arrays, params = flat.to_arrays()
+    restored = FlatTreeEnsemble.from_arrays(arrays, params)
+    assert np.array_equal(restored.predict(X_new), flat.predict(X_new))
+
+
+def test_unsupported_model_is_left_alone(data):
+    X, y, _ = data
+    assert flatten_model(LinearRegression().fit(X, y)) is None
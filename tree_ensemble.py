@@ -0,0 +1,263 @@
+import json
+
+import numpy as np
+
+# ============= FLAT TREE ENSEMBLE =============
+# Converts a fitted tree ensemble (sklearn or XGBoost) into flat NumPy node
+# arrays once at startup, then evaluates every tree for a row or a batch with
+# a handful of vectorized gathers instead of the libraries' generic predict().
+
+_IDENTITY_XGB_OBJECTIVES = {'reg:squarederror', 'reg:linear', 'reg:absoluteerror',
+                            'reg:pseudohubererror', 'reg:quantileerror'}
+
+
+class FlatTreeEnsemble:
+    """
+    All trees of an ensemble concatenated into flat node arrays.
+    Leaves point to themselves, so traversal is a fixed number of steps (max depth)
+    with no per-tree Python loop:
+
+        out = (base + sum_t(leaf_value_t)) / divisor   (accumulated tree by tree)
+    """
+
+    def __init__(self, feature, threshold, left, right, value, default_left, roots,
+                 max_depth, base_score=0.0, divisor=1.0, strict=False, acc_dtype=np.float64,
+                 n_features=None, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_score = base_score
+        self.divisor = divisor  # number of trees for forests (mean of trees)
+        self.strict = strict  # XGBoost splits on x < t, sklearn on x <= t
+        self.acc_dtype = np.dtype(acc_dtype)
+        self.n_features = n_features
+        self.feature_names = None if feature_names is None else list(feature_names)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    # ---------- builders ----------
+
+    @classmethod
+    def _from_node_lists(cls, trees, **kwargs):
+        """trees: iterable of (feature, threshold, left, right, value, default_left) per tree, local indices"""
+        features, thresholds, lefts, rights, values, defaults, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for feature, threshold, left, right, value, default_left in trees:
+            n = len(feature)
+            node_ids = np.arange(n) + offset
+            is_leaf = left < 0
+            # Leaves loop back to themselves so extra traversal steps are no-ops
+            lefts.append(np.where(is_leaf, node_ids, left + offset))
+            rights.append(np.where(is_leaf, node_ids, right + offset))
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(threshold)
+            values.append(value)
+            defaults.append(default_left)
+            roots.append(offset)
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            default_left=np.concatenate(defaults).astype(bool),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            **kwargs
+        )
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """DecisionTreeRegressor, RandomForestRegressor, ExtraTreesRegressor or GradientBoostingRegressor"""
+        name = type(model).__name__
+        if name == 'DecisionTreeRegressor':
+            estimators, base, divisor, step = [model], 0.0, 1.0, 1.0
+        elif name in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+            estimators = list(model.estimators_)
+            base, divisor, step = 0.0, float(len(estimators)), 1.0
+        elif name == 'GradientBoostingRegressor':
+            if model.init_ == 'zero':
+                base = 0.0
+            elif type(model.init_).__name__ == 'DummyRegressor':
+                base = float(np.ravel(model.init_.constant_)[0])
+            else:
+                raise ValueError(f"Unsupported GradientBoostingRegressor init: {model.init_!r}")
+            estimators = list(model.estimators_[:, 0])
+            divisor, step = 1.0, model.learning_rate
+        else:
+            raise ValueError(f"Unsupported model type: {name}")
+
+        def tree_arrays(estimator):
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Only single-output regressors are supported")
+            missing_left = getattr(tree, 'missing_go_to_left', None)
+            if missing_left is None:
+                missing_left = np.zeros(tree.node_count, dtype=bool)
+            value = tree.value[:, 0, 0]
+            # Pre-multiply GBR leaves by the learning rate, exactly as predict_stages does
+            value = value * step if step != 1.0 else value
+            return (tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                    value, missing_left)
+
+        return cls._from_node_lists(
+            (tree_arrays(est) for est in estimators),
+            base_score=base, divisor=divisor, strict=False, acc_dtype=np.float64,
+            n_features=getattr(model, 'n_features_in_', None),
+            feature_names=getattr(model, 'feature_names_in_', None)
+        )
+
+    @classmethod
+    def from_xgboost(cls, model):
+        """XGBRegressor (or a raw Booster) with a gbtree booster and identity link"""
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        config = json.loads(booster.save_raw(raw_format='json'))['learner']
+        objective = config['objective']['name']
+        if objective not in _IDENTITY_XGB_OBJECTIVES:
+            raise ValueError(f"Unsupported XGBoost objective: {objective}")
+        gbm = config['gradient_booster']
+        if gbm['name'] != 'gbtree':
+            raise ValueError(f"Unsupported XGBoost booster: {gbm['name']}")
+        if int(config['learner_model_param'].get('num_target', '1')) > 1:
+            raise ValueError("Only single-target XGBoost models are supported")
+
+        trees = gbm['model']['trees']
+        # Respect early stopping the same way XGBRegressor.predict does
+        best_iteration = getattr(model, 'best_iteration', None) if hasattr(model, 'get_booster') else None
+        if best_iteration is not None:
+            per_round = int(gbm['model']['gbtree_model_param'].get('num_parallel_tree', '1'))
+            trees = trees[:(best_iteration + 1) * per_round]
+
+        base_score = np.float32(config['learner_model_param']['base_score'].strip('[]'))
+
+        def tree_arrays(tree):
+            if any(tree.get('split_type', [])):
+                raise ValueError("Categorical XGBoost splits are not supported")
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            # For leaves, split_conditions holds the leaf value
+            value = np.where(left < 0, conditions, np.float32(0))
+            return (np.asarray(tree['split_indices'], dtype=np.int64), conditions, left,
+                    np.asarray(tree['right_children'], dtype=np.int64), value,
+                    np.asarray(tree['default_left'], dtype=bool))
+
+        return cls._from_node_lists(
+            (tree_arrays(tree) for tree in trees),
+            base_score=base_score, divisor=1.0, strict=True, acc_dtype=np.float32,
+            n_features=int(config['learner_model_param']['num_feature']),
+            feature_names=booster.feature_names
+        )
+
+    @classmethod
+    def from_model(cls, model):
+        """Dispatch on the model's library; raises ValueError for anything unsupported"""
+        if isinstance(model, cls):
+            return model
+        if hasattr(model, 'get_booster') or type(model).__name__ == 'Booster':
+            return cls.from_xgboost(model)
+        return cls.from_sklearn(model)
+
+    # ---------- serialization ----------
+
+    _ARRAY_FIELDS = ('feature', 'threshold', 'left', 'right', 'value', 'default_left', 'roots')
+
+    def to_arrays(self):
+        """(arrays, params) pair: node arrays for an .npz plus JSON-serializable scalars"""
+        arrays = {name: getattr(self, name) for name in self._ARRAY_FIELDS}
+        params = {
+            'max_depth': int(self.max_depth),
+            'base_score': float(self.base_score),
+            'divisor': float(self.divisor),
+            'strict': bool(self.strict),
+            'acc_dtype': self.acc_dtype.name,
+            'n_features': None if self.n_features is None else int(self.n_features),
+            'feature_names': self.feature_names,
+        }
+        return arrays, params
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        """Rebuild from to_arrays() output; arrays may be read-only memory maps"""
+        params = dict(params)
+        acc_dtype = np.dtype(params.pop('acc_dtype'))
+        params['base_score'] = acc_dtype.type(params['base_score'])
+        return cls(acc_dtype=acc_dtype, **{name: arrays[name] for name in cls._ARRAY_FIELDS}, **params)
+
+    # ---------- evaluation ----------
+
+    def leaf_indices(self, X):
+        """(n_rows, n_trees) global leaf node reached by every row in every tree"""
+        rows = np.arange(X.shape[0])[:, None]
+        idx = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        has_nan = np.isnan(X).any()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[idx]]
+            go_left = x < self.threshold[idx] if self.strict else x <= self.threshold[idx]
+            if has_nan:
+                go_left |= np.isnan(x) & self.default_left[idx]
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+        return idx
+
+    def predict(self, X):
+        """Drop-in replacement for model.predict on an already-encoded feature matrix"""
+        # Both sklearn and XGBoost evaluate splits on float32 inputs
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        leaf_values = self.value[self.leaf_indices(X)].astype(self.acc_dtype, copy=False)
+
+        # Accumulate tree by tree (cumsum is sequential) to reproduce library rounding
+        acc = np.empty((X.shape[0], self.n_trees + 1), dtype=self.acc_dtype)
+        acc[:, 0] = self.base_score
+        acc[:, 1:] = leaf_values
+        total = np.cumsum(acc, axis=1, dtype=self.acc_dtype)[:, -1]
+        if self.divisor != 1.0:
+            total = total / self.divisor
+        return total
+
+
+def _tree_depth(left, right):
+    """Depth (edges on the longest root-to-leaf path) of one tree in local indices"""
+    max_depth = 0
+    stack = [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if left[node] >= 0:
+            stack.append((left[node], depth + 1))
+            stack.append((right[node], depth + 1))
+        else:
+            max_depth = max(max_depth, depth)
+    return max_depth
+
+
+def flatten_model(model, check_X=None, tol=1e-6):
+    """
+    Convert `model` to a FlatTreeEnsemble, verifying it against model.predict on
+    `check_X` when given. Returns None (keep the original model) if the model is
+    unsupported or the outputs disagree by more than `tol`.
+    """
+    try:
+        flat = FlatTreeEnsemble.from_model(model)
+    except (ValueError, AttributeError, KeyError):
+        return None
+    if check_X is not None:
+        expected = np.asarray(model.predict(check_X), dtype=np.float64)
+        got = flat.predict(np.asarray(check_X)).astype(np.float64)
+        if not np.allclose(got, expected, rtol=tol, atol=tol):
+            return None
+    return flat